@@ -0,0 +1,112 @@
+# 比較改版前 SnowNLP + 逐行 re 的清理與 file_fulltext_cleaner 的速度，並確認輸出相同
+# 用法：py benchmarks/bench_clean.py [ocr_output.txt ...] [--pages 50 200] [--repeat 3]
+# 未指定檔案時產生模擬 OCR 輸出（中英混合、雜訊行、長編號、換頁符號）
+import os, sys, re, json, time, random, argparse
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import file_fulltext_cleaner
+
+def legacy_clean_text(text):
+  """
+  改版前的 FileFullTextExtractor.clean_text
+  """
+  lines = text.splitlines()
+  cleaned_lines = []
+  for line in lines:
+    line = line.strip()
+    if not line:
+      continue
+    if re.match(r'^--- Page \d+ - Rotate \d+° ---$', line):
+      continue
+    if re.match(r'^--- Sheet: Table \d+ ---$', line):
+      continue
+    if re.match(r'^--- Page \d+ Text ---$', line):
+      continue
+    if re.match(r'^[\W\dA-Za-z]{0,5}$', line):
+      continue
+    if len(re.sub(r'\s', '', line)) > 100 and re.match(r'^[\W\da-zA-Z]+$', line):
+      continue
+    line = re.sub(r'\s+', '', line)
+    line = re.sub(r'[^0-9\u4e00-\u9fffA-Za-z/-]', '', line)
+    cleaned_lines.append(line)
+  return ''.join(cleaned_lines)
+
+def legacy_clean_ocr_text(text):
+  """
+  改版前的 FileFullTextExtractor.clean_ocr_text（短句過濾的結果原本就未被使用，故省略）
+  """
+  from snownlp import SnowNLP
+  if not text:
+    return ''
+  text = re.sub(r' +', '', text)
+  sentences = SnowNLP(text).sentences
+  clean_sentences = list(map(lambda s: re.sub(r'[A-Za-z0-9一\/-]{20,}', '', s), sentences))
+  clean_text = legacy_clean_text(''.join(clean_sentences))
+  return clean_text if clean_text else text.strip()
+
+WORDS_ZH = ['檢驗', '報告', '法蘭', '螺栓', '扭力', '管線', '施工', '品質', '查驗', '紀錄', '設備', '規格', '承包商', '監造', '日期', '合格']
+WORDS_EN = ['Inspection', 'flange', 'bolt', 'torque', 'ASME', 'B16.5', 'Class', '150#', 'PSI', 'OK', 'NG', 'Rev.', 'No.']
+NOISE = ['|', '_', '~', '.', ',', '—', '“', '”', '(', ')', '[', ']', '°', '※', '■']
+
+def synthetic_ocr_page(rng):
+  lines = []
+  for _ in range(rng.randint(30, 60)):
+    kind = rng.random()
+    if kind < 0.1:
+      lines.append(''.join(rng.choice(NOISE) for _ in range(rng.randint(1, 6))))
+    elif kind < 0.15:
+      lines.append(''.join(rng.choice('ABCDEFGHJKLMNPQRSTUVWXYZ0123456789-/') for _ in range(rng.randint(20, 40))))
+    else:
+      tokens = []
+      for _ in range(rng.randint(4, 16)):
+        tokens.append(rng.choice(WORDS_ZH) if rng.random() < 0.6 else rng.choice(WORDS_EN))
+        if rng.random() < 0.15:
+          tokens.append(rng.choice('，。；：、？！'))
+        if rng.random() < 0.1:
+          tokens.append(str(rng.randint(0, 99999)))
+      lines.append(' '.join(tokens))
+  return '\n'.join(lines) + '\n\f'
+
+def synthetic_ocr_text(pages, seed=0):
+  rng = random.Random(seed)
+  return '\n'.join(synthetic_ocr_page(rng) for _ in range(pages))
+
+def timed(func, text, repeat):
+  started = time.perf_counter()
+  for _ in range(repeat):
+    result = func(text)
+  return (time.perf_counter() - started) / repeat, result
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser(description="文字清理效能比較")
+  parser.add_argument("files", nargs="*", help="OCR 輸出文字檔，未指定則使用模擬資料")
+  parser.add_argument("--pages", type=int, nargs="+", default=[50, 200])
+  parser.add_argument("--repeat", type=int, default=3)
+  args = parser.parse_args()
+
+  samples = []
+  for path in args.files:
+    with open(path, encoding='utf-8') as f:
+      samples.append((os.path.basename(path), f.read()))
+  if not samples:
+    samples = [(f'synthetic_{pages}_pages', synthetic_ocr_text(pages)) for pages in args.pages]
+
+  # 暖身：SnowNLP 第一次 import 載入模型的時間不計入
+  legacy_clean_ocr_text('暖身，測試。')
+
+  report = []
+  for name, text in samples:
+    size_mb = len(text.encode('utf-8')) / 1024 / 1024
+    legacy_seconds, legacy_output = timed(legacy_clean_ocr_text, text, args.repeat)
+    current_seconds, current_output = timed(file_fulltext_cleaner.clean_ocr_text, text, args.repeat)
+    report.append({
+      'sample': name,
+      'size_mb': round(size_mb, 3),
+      'legacy_seconds': round(legacy_seconds, 4),
+      'current_seconds': round(current_seconds, 4),
+      'speedup': round(legacy_seconds / current_seconds, 1) if current_seconds else None,
+      'current_mb_per_second': round(size_mb / current_seconds, 2) if current_seconds else None,
+      'identical_output': legacy_output == current_output,
+    })
+
+  print(json.dumps(report, indent=2, ensure_ascii=False))
@@ -0,0 +1,112 @@
+# 比較改版前 pandas + openpyxl 完整模式讀兩次與單次串流讀取 Excel 的耗時與尖峰記憶體，並比對輸出文字
+# 用法：py benchmarks/bench_excel.py [workbook.xlsx ...] [--rows 20000 100000] [--cols 20] [--images 0]
+# 未指定檔案時以 openpyxl write-only 模式產生量測資料表；每個組合在獨立 process 中執行以量測尖峰 RSS
+import os, sys, io, json, time, random, difflib, argparse, subprocess
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_preprocess import peak_rss, synthetic_image
+from file_fulltext_extractor import FileFullTextExtractor
+
+def legacy_extract(extractor, file_path):
+  """
+  改版前的 FileFullTextExtractor.extract_from_excel
+  """
+  import pandas as pd
+  import openpyxl
+  df_list = pd.read_excel(file_path, sheet_name=None, dtype=str)
+  all_text = ''
+  for sheet, df in df_list.items():
+    all_text += df.fillna('').to_string(index=False) + "\n"
+  wb = openpyxl.load_workbook(file_path)
+  for sheet_name in wb.sheetnames:
+    ws = wb[sheet_name]
+    for image in ws._images:
+      img = image._data() if hasattr(image, "_data") else image.ref
+      ocr_result = extractor.extract_from_image(img)
+      if ocr_result['status'] == 'ok' and ocr_result['text'].strip():
+        all_text += "\n" + ocr_result['text'].strip() + "\n"
+  return {'status': 'ok', 'text': extractor.clean_text(all_text.strip())}
+
+def current_extract(extractor, file_path):
+  return extractor.collect(extractor.iter_excel(file_path))
+
+def synthetic_workbook(path, rows, cols, images, seed=0):
+  """
+  模擬工地量測資料：日期、測點編號、中文說明與數值欄位，並在第一個工作表插入圖片
+  """
+  import openpyxl
+  from openpyxl.drawing.image import Image as XLImage
+  rng = random.Random(seed)
+  wb = openpyxl.Workbook(write_only=True)
+  ws = wb.create_sheet('量測紀錄')
+  ws.append(['日期', '測點', '說明'] + [f'讀數{i}' for i in range(cols - 3)])
+  for row in range(rows):
+    ws.append(
+      [f'2024-{row % 12 + 1:02d}-{row % 28 + 1:02d}', f'P-{row:06d}', rng.choice(['沉陷觀測', '傾斜計', '水位計', '應變計'])]
+      + [round(rng.uniform(-50, 50), 3) for _ in range(cols - 3)]
+    )
+  for i in range(images):
+    img = XLImage(io.BytesIO(synthetic_image(0.5)))
+    img.anchor = f'A{i * 30 + 1}'
+    ws.add_image(img)
+  wb.save(path)
+
+def measure(pipeline, file_path):
+  """
+  在子 process 內執行：回傳耗時、相對於暖身後的尖峰 RSS 增量與輸出文字
+  """
+  import openpyxl
+  import pandas  # 讓套件載入不計入尖峰記憶體
+  func = legacy_extract if pipeline == 'legacy' else current_extract
+  extractor = FileFullTextExtractor()
+  baseline = peak_rss()
+  started = time.perf_counter()
+  result = func(extractor, file_path)
+  return {
+    'pipeline': pipeline,
+    'seconds': round(time.perf_counter() - started, 3),
+    'peak_rss_delta_mb': round((peak_rss() - baseline) / 1024 / 1024, 1),
+    'text': result.get('text', ''),
+  }
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser(description="Excel 擷取效能比較")
+  parser.add_argument("files", nargs="*", help="xlsx 檔，未指定則產生量測資料表")
+  parser.add_argument("--rows", type=int, nargs="+", default=[20000, 100000])
+  parser.add_argument("--cols", type=int, default=20)
+  parser.add_argument("--images", type=int, default=0, help="每個產生的活頁簿插入的圖片數（需要 OCR 引擎）")
+  parser.add_argument("--child", nargs=2, metavar=("PIPELINE", "FILE"), help=argparse.SUPPRESS)
+  args = parser.parse_args()
+
+  if args.child:
+    print(json.dumps(measure(args.child[0], args.child[1]), ensure_ascii=False))
+    sys.exit()
+
+  files = list(args.files)
+  if not files:
+    import tempfile
+    temp_dir = tempfile.mkdtemp(prefix='bench_excel_')
+    for rows in args.rows:
+      path = os.path.join(temp_dir, f'synthetic_{rows}_rows.xlsx')
+      synthetic_workbook(path, rows, args.cols, args.images)
+      files.append(path)
+
+  report = []
+  for file_path in files:
+    entry = {'file': os.path.basename(file_path), 'size_mb': round(os.path.getsize(file_path) / 1024 / 1024, 2)}
+    texts = {}
+    for pipeline in ('legacy', 'current'):
+      output = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), '--child', pipeline, file_path],
+        capture_output=True, text=True, check=True
+      ).stdout
+      result = json.loads(output.strip().splitlines()[-1])
+      texts[pipeline] = result.pop('text')
+      entry[pipeline] = {k: v for k, v in result.items() if k != 'pipeline'}
+    entry['time_ratio'] = round(entry['current']['seconds'] / entry['legacy']['seconds'], 3) if entry['legacy']['seconds'] else None
+    # 舊版以第一列為欄名，空欄名會多出 Unnamed: N，不一定完全相同；大檔逐字比對太慢，另以字元組成的重疊率 (quick_ratio) 參考
+    entry['identical_output'] = texts['legacy'] == texts['current']
+    entry['char_overlap_with_legacy'] = round(difflib.SequenceMatcher(None, texts['legacy'], texts['current'], autojunk=False).quick_ratio(), 4)
+    report.append(entry)
+
+  print(json.dumps(report, indent=2, ensure_ascii=False))
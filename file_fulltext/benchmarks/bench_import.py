@@ -0,0 +1,57 @@
+# 量測 import 成本：延遲載入後的 file_fulltext_extractor、改版前一次載入全部套件、以及各格式第一次使用時的載入成本
+# 用法：py benchmarks/bench_import.py [--repeat 5]
+# 每次量測都在全新的 process 中執行，避免 sys.modules 快取影響結果
+import os, sys, json, argparse, statistics, subprocess
+
+base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, base_dir)
+
+# 改版前 file_fulltext_extractor 在模組載入時 import 的套件
+EAGER_MODULES = ['numpy', 'pandas', 'cv2', 'fitz', 'pytesseract', 'ezdxf', 'openpyxl', 'PIL.Image', 'docx', 'pptx', 'snownlp']
+
+def timed_import(statement):
+  code = (
+    "import sys, time\n"
+    f"sys.path.insert(0, {base_dir!r})\n"
+    "started = time.perf_counter()\n"
+    f"{statement}\n"
+    "print(time.perf_counter() - started)\n"
+  )
+  output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True).stdout
+  return float(output.strip().splitlines()[-1])
+
+def median_seconds(statement, repeat):
+  return round(statistics.median(timed_import(statement) for _ in range(repeat)), 4)
+
+def flatten(requires):
+  for requirement in requires:
+    if isinstance(requirement, tuple):
+      # OCR 後端擇一，以第一個已安裝的為準
+      from file_fulltext_extractor import _is_installed
+      installed = [r for r in requirement if _is_installed(r)]
+      if installed:
+        yield installed[0]
+    else:
+      yield requirement
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser(description="import 成本量測")
+  parser.add_argument("--repeat", type=int, default=5)
+  args = parser.parse_args()
+
+  from file_fulltext_extractor import FileFullTextExtractor
+
+  report = {
+    'lazy_extractor_import': median_seconds("import file_fulltext_extractor", args.repeat),
+    'eager_import_all': median_seconds("\n".join(f"import {m}" for m in EAGER_MODULES), args.repeat),
+    'available_formats': FileFullTextExtractor.available_formats(),
+    'first_use_by_handler': {},
+  }
+  # 同一個處理方法的副檔名共用相依套件，只量一次
+  for ext, (method, requires) in FileFullTextExtractor.HANDLERS.items():
+    if method in report['first_use_by_handler'] or ext not in report['available_formats']:
+      continue
+    statement = "\n".join(["import file_fulltext_extractor", *(f"import {m}" for m in flatten(requires))])
+    report['first_use_by_handler'][method] = median_seconds(statement, args.repeat)
+
+  print(json.dumps(report, indent=2, ensure_ascii=False))
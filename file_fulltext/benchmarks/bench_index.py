@@ -0,0 +1,98 @@
+# 以子字串比對 (LIKE '%...%') 為準，檢查本機全文索引的查詢結果並量測查詢時間
+# 用法：py benchmarks/bench_index.py [--docs 2000] [--queries 500] [--seed 0] [--output result.json]
+# 文件為 bench_clean 的模擬 OCR 輸出清理後的全文（含 A-12、M8/10 這類帶標點的編號），查詢詞取自文件中的片段
+# 有任何誤判（多出或缺少的結果）時結束代碼為 1
+import os, sys, json, time, random, tempfile, argparse
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_clean import synthetic_ocr_page
+from file_fulltext_cleaner import clean_ocr_text
+from file_fulltext_index import FileFullTextIndex
+
+# 固定的回歸案例：帶標點的查詢詞不可比對到標點不同或沒有標點的文件
+REGRESSION_DOCS = ['法蘭A-12螺栓', '法蘭A/12螺栓', '法蘭A12螺栓', '規格B16.5Class150#', 'BA-123']
+REGRESSION_QUERIES = ['A-12', 'A/12', 'A12', 'A-', '-12', 'B16.5', '16.', '150#']
+
+def synthetic_docs(count, seed):
+  rng = random.Random(seed)
+  docs = list(REGRESSION_DOCS)
+  while len(docs) < count:
+    text = clean_ocr_text('\n'.join(synthetic_ocr_page(rng) for _ in range(rng.randint(1, 3))))
+    if text:
+      docs.append(text)
+  return docs
+
+def sample_queries(docs, count, seed):
+  """
+  從文件中擷取 1～8 字的片段作為查詢詞，約四分之一的查詢含兩個詞
+  """
+  rng = random.Random(seed)
+  queries = list(REGRESSION_QUERIES)
+  while len(queries) < count:
+    terms = []
+    for _ in range(2 if rng.random() < 0.25 else 1):
+      text = rng.choice(docs)
+      length = rng.randint(1, 8)
+      start = rng.randint(0, max(len(text) - length, 0))
+      terms.append(text[start:start + length])
+    queries.append(' '.join(terms))
+  return queries
+
+def expected(docs, query):
+  terms = query.lower().split()
+  return {str(row_id) for row_id, text in enumerate(docs) if all(term in text.lower() for term in terms)}
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser(description="全文索引查詢正確性與速度")
+  parser.add_argument("--docs", type=int, default=2000)
+  parser.add_argument("--queries", type=int, default=500)
+  parser.add_argument("--seed", type=int, default=0)
+  parser.add_argument("--output", help="結果 JSON 檔")
+  args = parser.parse_args()
+
+  docs = synthetic_docs(args.docs, args.seed)
+  queries = sample_queries(docs, args.queries, args.seed)
+  lowered = [text.lower() for text in docs]
+
+  with tempfile.TemporaryDirectory() as tmp:
+    index = FileFullTextIndex(os.path.join(tmp, 'index.sqlite3'))
+    started = time.perf_counter()
+    index.apply('bench', 'docs', [(text, row_id) for row_id, text in enumerate(docs)])
+    index.optimize()
+    build_seconds = time.perf_counter() - started
+
+    false_positives = []
+    false_negatives = []
+    seconds = []
+    for query in queries:
+      started = time.perf_counter()
+      found = {row['id'] for row in index.search(query, limit=len(docs))}
+      seconds.append(time.perf_counter() - started)
+      want = expected(lowered, query)
+      if found - want:
+        false_positives.append({'query': query, 'count': len(found - want)})
+      if want - found:
+        false_negatives.append({'query': query, 'count': len(want - found)})
+    stats = index.stats()
+    index.close()
+
+  seconds.sort()
+  report = {
+    'documents': len(docs),
+    'chars': stats['chars'],
+    'index_mb': round(stats['bytes'] / 1024 / 1024, 2),
+    'build_seconds': round(build_seconds, 3),
+    'queries': len(queries),
+    'query_ms_median': round(seconds[len(seconds) // 2] * 1000, 2),
+    'query_ms_p95': round(seconds[int(len(seconds) * 0.95)] * 1000, 2),
+    'false_positives': sum(item['count'] for item in false_positives),
+    'false_negatives': sum(item['count'] for item in false_negatives),
+    'mismatched_queries': (false_positives + false_negatives)[:20],
+  }
+
+  text = json.dumps(report, indent=2, ensure_ascii=False)
+  if args.output:
+    with open(args.output, 'w', encoding='utf-8') as f:
+      f.write(text)
+  print(text)
+  sys.exit(1 if false_positives or false_negatives else 0)
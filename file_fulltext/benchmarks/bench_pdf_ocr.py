@@ -0,0 +1,66 @@
+# 比較掃描 PDF 以固定 3 倍渲染與 adaptive OCR（略過空白頁、依圖片 DPI 選倍率）的時間、OCR 像素量與文字差異
+# 用法：py benchmarks/bench_pdf_ocr.py scanned1.pdf scanned2.pdf ...
+# 若同目錄有同名 .txt（如 scanned1.txt）則視為正確文字，另外計算與正確文字的相似度
+import os, sys, json, time, argparse, difflib
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fitz  # PyMuPDF
+from file_fulltext_extractor import FileFullTextExtractor
+
+def ocr_plan(extractor, pdf_path):
+  """
+  統計需要 OCR 的頁數、略過的空白頁與總 OCR 像素
+  """
+  pages = skipped = pixels = 0
+  with fitz.open(pdf_path) as doc:
+    for page in doc:
+      if page.get_text("text").strip():
+        continue
+      pages += 1
+      scale = extractor.plan_pdf_page(page)
+      if scale is None:
+        skipped += 1
+        continue
+      pixels += int(page.rect.width * scale) * int(page.rect.height * scale)
+  return {'ocr_pages': pages, 'blank_pages_skipped': skipped, 'ocr_pixels': pixels}
+
+def similarity(a, b):
+  return round(difflib.SequenceMatcher(None, a, b, autojunk=False).ratio(), 4)
+
+def run(pdf_path, adaptive):
+  extractor = FileFullTextExtractor(adaptive_ocr=adaptive)
+  stats = ocr_plan(extractor, pdf_path)
+  started = time.perf_counter()
+  result = extractor.extract_text(pdf_path)
+  stats['seconds'] = round(time.perf_counter() - started, 3)
+  stats['text'] = result.get('text', '')
+  extractor.close()
+  return stats
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser(description="固定 3 倍與 adaptive OCR 比較")
+  parser.add_argument("paths", nargs="+", help="掃描 PDF")
+  args = parser.parse_args()
+
+  report = []
+  for pdf_path in args.paths:
+    fixed = run(pdf_path, False)
+    adaptive = run(pdf_path, True)
+    entry = {
+      'file': os.path.basename(pdf_path),
+      'fixed_3x': {k: v for k, v in fixed.items() if k != 'text'},
+      'adaptive': {k: v for k, v in adaptive.items() if k != 'text'},
+      'pixel_ratio': round(adaptive['ocr_pixels'] / fixed['ocr_pixels'], 3) if fixed['ocr_pixels'] else None,
+      'time_ratio': round(adaptive['seconds'] / fixed['seconds'], 3) if fixed['seconds'] else None,
+      # 以固定 3 倍的結果為基準
+      'similarity_to_fixed': similarity(fixed['text'], adaptive['text']),
+    }
+    truth_path = os.path.splitext(pdf_path)[0] + '.txt'
+    if os.path.exists(truth_path):
+      with open(truth_path, encoding='utf-8') as f:
+        truth = FileFullTextExtractor().clean_text(f.read())
+      entry['fixed_3x']['accuracy'] = similarity(truth, fixed['text'])
+      entry['adaptive']['accuracy'] = similarity(truth, adaptive['text'])
+    report.append(entry)
+
+  print(json.dumps(report, indent=2, ensure_ascii=False))
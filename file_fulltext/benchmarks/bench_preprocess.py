@@ -0,0 +1,122 @@
+# 比較舊版 PIL + NumPy 與新版 OpenCV 單一路徑的圖片前處理：每百萬像素耗時與尖峰記憶體
+# 用法：py benchmarks/bench_preprocess.py [image ...] [--megapixels 1 4 12] [--repeat 3]
+# 未指定圖片時產生指定大小的合成掃描圖；每個組合在獨立 process 中執行以量測尖峰 RSS
+import os, sys, io, json, time, argparse, subprocess
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import cv2 # opencv-python
+from PIL import Image, ImageDraw, ImageFilter, ImageEnhance
+
+def legacy_preprocess(file_path):
+  """
+  改版前的 FileFullTextExtractor.preprocess_image
+  """
+  img = Image.open(file_path)
+  img = img.convert('L')
+  width, height = img.size
+  img = img.resize((width*2, height*2), Image.Resampling.LANCZOS)
+  img = ImageEnhance.Contrast(img).enhance(2.0)
+  img = img.filter(ImageFilter.SHARPEN)
+  img_cv = np.array(img)
+  _, img_bin = cv2.threshold(img_cv, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+  return Image.fromarray(img_bin)
+
+def current_preprocess(file_path):
+  from file_fulltext_extractor import FileFullTextExtractor
+  return FileFullTextExtractor.preprocess_image(file_path)
+
+def synthetic_image(megapixels):
+  """
+  產生帶雜訊與文字的灰底 RGB 掃描圖，回傳 PNG bytes
+  """
+  width = int((megapixels * 1_000_000 / 1.414) ** 0.5)
+  height = int(width * 1.414)
+  rng = np.random.default_rng(0)
+  pixels = np.clip(rng.normal(225, 12, (height, width, 3)), 0, 255).astype(np.uint8)
+  img = Image.fromarray(pixels)
+  draw = ImageDraw.Draw(img)
+  for y in range(40, height - 40, 36):
+    draw.text((40, y), "Inspection record 0123456789 flange bolt torque OK", fill=(30, 30, 30))
+  buffer = io.BytesIO()
+  img.save(buffer, 'PNG')
+  return buffer.getvalue()
+
+def peak_rss():
+  """
+  目前 process 的尖峰 RSS (bytes)
+  Linux 的 ru_maxrss 會沿用 exec 前父 process 的值，因此優先讀 /proc 的 VmHWM
+  """
+  if os.path.exists('/proc/self/status'):
+    with open('/proc/self/status') as f:
+      for line in f:
+        if line.startswith('VmHWM:'):
+          return int(line.split()[1]) * 1024
+  if sys.platform == 'win32':
+    import psutil
+    return psutil.Process().memory_info().peak_wset
+  import resource
+  return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss  # macOS 單位為 bytes
+
+def measure(pipeline, image_path, repeat):
+  """
+  在子 process 內執行：回傳耗時與相對於讀入輸入後的尖峰 RSS 增量
+  """
+  func = legacy_preprocess if pipeline == 'legacy' else current_preprocess
+  # 以小圖暖身，讓 import 與函式庫初始化不計入尖峰記憶體
+  warmup_path = image_path + '.warmup.png'
+  Image.new('RGB', (32, 32), 'white').save(warmup_path)
+  func(warmup_path)
+  os.remove(warmup_path)
+  baseline = peak_rss()
+  started = time.perf_counter()
+  for _ in range(repeat):
+    func(image_path)
+  seconds = (time.perf_counter() - started) / repeat
+  with Image.open(image_path) as img:
+    megapixels = img.size[0] * img.size[1] / 1_000_000
+  return {
+    'pipeline': pipeline,
+    'megapixels': round(megapixels, 2),
+    'seconds': round(seconds, 4),
+    'seconds_per_megapixel': round(seconds / megapixels, 4),
+    'peak_rss_delta_mb': round((peak_rss() - baseline) / 1024 / 1024, 1),
+  }
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser(description="圖片前處理效能比較")
+  parser.add_argument("images", nargs="*", help="圖片檔，未指定則使用合成圖")
+  parser.add_argument("--megapixels", type=float, nargs="+", default=[1, 4, 12])
+  parser.add_argument("--repeat", type=int, default=3)
+  parser.add_argument("--child", nargs=2, metavar=("PIPELINE", "IMAGE"), help=argparse.SUPPRESS)
+  args = parser.parse_args()
+
+  if args.child:
+    print(json.dumps(measure(args.child[0], args.child[1], args.repeat)))
+    sys.exit()
+
+  images = list(args.images)
+  if not images:
+    import tempfile
+    temp_dir = tempfile.mkdtemp(prefix='bench_preprocess_')
+    for megapixels in args.megapixels:
+      path = os.path.join(temp_dir, f'synthetic_{megapixels}mp.png')
+      with open(path, 'wb') as f:
+        f.write(synthetic_image(megapixels))
+      images.append(path)
+
+  results = []
+  for image_path in images:
+    for pipeline in ('legacy', 'current'):
+      output = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), '--child', pipeline, image_path, '--repeat', str(args.repeat)],
+        capture_output=True, text=True, check=True
+      ).stdout
+      results.append({'image': os.path.basename(image_path), **json.loads(output.strip().splitlines()[-1])})
+
+    # 兩種前處理結果的像素一致率
+    legacy = np.asarray(legacy_preprocess(image_path))
+    current = current_preprocess(image_path)
+    results[-1]['pixel_agreement_with_legacy'] = round(float(np.mean(legacy == current)), 4)
+
+  print(json.dumps(results, indent=2, ensure_ascii=False))
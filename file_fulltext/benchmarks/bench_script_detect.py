@@ -0,0 +1,106 @@
+# 比較固定 eng+chi_tra 與依頁面挑選語言模型 (ocr_script_detect) 的 OCR 速度與字元準確率
+# 用法：py benchmarks/bench_script_detect.py [page.png ...] [--pages 10] [--seed 0] [--ocr-backend auto] [--output result.json]
+# 未指定圖片時以 corpus.py 的字型產生英文頁與中英混合頁；指定圖片時需要同名 .txt 作為正確文字
+import os, sys, json, time, random, difflib, argparse
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_clean import WORDS_EN
+from corpus import sentence, render_text_png
+
+def english_line(rng, words=(4, 8)):
+  tokens = [rng.choice(WORDS_EN) for _ in range(rng.randint(*words))]
+  if rng.random() < 0.3:
+    tokens.append(f'{rng.randint(0, 9999):04d}')
+  return ' '.join(tokens)
+
+def synthetic_pages(count, seed):
+  """
+  回傳 {'english': [(png bytes, 正確文字), ...], 'mixed': [...]}，每種 count 頁
+  """
+  rng = random.Random(seed)
+  pages = {'english': [], 'mixed': []}
+  for kind, make_line in (('english', english_line), ('mixed', lambda rng: sentence(rng, (4, 8)))):
+    for _ in range(count):
+      lines = [make_line(rng) for _ in range(30)]
+      pages[kind].append((render_text_png(lines, width=1240, height=1754, font_size=16), "\n".join(lines)))
+  return pages
+
+def load_pages(paths):
+  pages = []
+  for path in paths:
+    truth_path = os.path.splitext(path)[0] + '.txt'
+    if not os.path.exists(truth_path):
+      print(f"⚠ 略過 {path}：找不到正確文字 {truth_path}", file=sys.stderr)
+      continue
+    with open(path, 'rb') as f, open(truth_path, encoding='utf-8') as t:
+      pages.append((f.read(), t.read()))
+  return {'files': pages}
+
+def char_accuracy(text, truth):
+  """
+  去除空白後的字元相似度（difflib ratio），extractor 清理時會移除中文字間的空白
+  """
+  a = ''.join(text.split())
+  b = ''.join(truth.split())
+  if not b:
+    return 1.0 if not a else 0.0
+  return difflib.SequenceMatcher(None, a, b, autojunk=False).ratio()
+
+def run(pages, script_detect, ocr_backend):
+  from file_fulltext_extractor import FileFullTextExtractor
+  extractor = FileFullTextExtractor(ocr_backend=ocr_backend, ocr_script_detect=script_detect)
+  extractor.extract_from_image(pages[0][0])  # 暖身：載入語言模型
+  ocr = extractor.get_ocr()
+  stats_before = dict(getattr(ocr, 'stats', {}))
+
+  accuracies = []
+  started = time.perf_counter()
+  for png, truth in pages:
+    result = extractor.extract_from_image(png)
+    accuracies.append(char_accuracy(result.get('text', ''), truth))
+  seconds = time.perf_counter() - started
+
+  stats = getattr(ocr, 'stats', {})
+  extractor.close()
+  report = {
+    'backend': ocr.name,
+    'pages': len(pages),
+    'seconds': round(seconds, 3),
+    'pages_per_second': round(len(pages) / seconds, 3) if seconds else None,
+    'char_accuracy_mean': round(sum(accuracies) / len(accuracies), 4),
+    'char_accuracy_min': round(min(accuracies), 4),
+  }
+  if stats:
+    report['escalated'] = stats['escalated'] - stats_before.get('escalated', 0)
+  return report
+
+def compare(fixed, detect):
+  return {
+    'speedup': round(detect['pages_per_second'] / fixed['pages_per_second'], 3) if fixed['pages_per_second'] else None,
+    'char_accuracy_delta': round(detect['char_accuracy_mean'] - fixed['char_accuracy_mean'], 4),
+  }
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser(description="依頁面挑選 OCR 語言模型的速度與準確率比較")
+  parser.add_argument("paths", nargs="*", help="圖片檔，需要同名 .txt 作為正確文字")
+  parser.add_argument("--pages", type=int, default=10, help="未指定圖片時，英文頁與混合頁各產生的頁數")
+  parser.add_argument("--seed", type=int, default=0)
+  parser.add_argument("--ocr-backend", default='auto')
+  parser.add_argument("--output", help="結果 JSON 檔")
+  args = parser.parse_args()
+
+  page_sets = load_pages(args.paths) if args.paths else synthetic_pages(args.pages, args.seed)
+  results = {}
+  for kind, pages in page_sets.items():
+    if not pages:
+      continue
+    print(f"⏳ {kind}（{len(pages)} 頁）", file=sys.stderr)
+    fixed = run(pages, False, args.ocr_backend)
+    detect = run(pages, True, args.ocr_backend)
+    results[kind] = {'fixed': fixed, 'script_detect': detect, 'comparison': compare(fixed, detect)}
+
+  text = json.dumps(results, indent=2, ensure_ascii=False)
+  if args.output:
+    with open(args.output, 'w', encoding='utf-8') as f:
+      f.write(text)
+  print(text)
@@ -0,0 +1,152 @@
+# 以固定語料量測 FileFullTextExtractor 各格式的吞吐量、p50/p95 延遲、尖峰 RSS 與輸出大小，結果輸出為 JSON 以便跨 commit 比較
+# 用法：py benchmarks/bench_suite.py [--corpus DIR] [--scale 1] [--repeat 3] [--formats pdf docx ...] [--output result.json] [--compare base.json]
+# 語料不存在時以 benchmarks/corpus.py 產生；每個格式在獨立 process 中執行，第一次擷取（含套件載入）只暖身不計時
+import os, sys, json, time, hashlib, platform, argparse, subprocess, tempfile
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_preprocess import peak_rss
+from corpus import generate_corpus, load_corpus
+
+def percentile(values, q):
+  """
+  nearest-rank 百分位數
+  """
+  ordered = sorted(values)
+  if not ordered:
+    return None
+  index = max(int(round(q / 100 * len(ordered) + 0.5)) - 1, 0)
+  return ordered[min(index, len(ordered) - 1)]
+
+def measure(paths, repeat, ocr_backend):
+  """
+  在子 process 內執行：逐檔擷取 repeat 次，回傳延遲、吞吐量、尖峰 RSS 增量與輸出大小
+  """
+  from file_fulltext_extractor import FileFullTextExtractor
+  extractor = FileFullTextExtractor(ocr_backend=ocr_backend, image_cache='off')
+  extractor.extract_text(paths[0])  # 暖身：載入套件與 OCR 引擎
+  baseline = peak_rss()
+
+  latencies = []
+  output_chars = []
+  errors = {}
+  digest = hashlib.sha1()
+  input_bytes = 0
+  started = time.perf_counter()
+  for run in range(repeat):
+    for path in paths:
+      file_started = time.perf_counter()
+      result = extractor.extract_text(path)
+      latencies.append(time.perf_counter() - file_started)
+      input_bytes += os.path.getsize(path)
+      if result['status'] == 'ok':
+        output_chars.append(len(result['text']))
+      else:
+        error = result.get('error', '')[:120]
+        errors[error] = errors.get(error, 0) + 1
+      if run == 0:
+        digest.update(f"{os.path.basename(path)}\0{result['status']}\0{result.get('text', '')}\0".encode('utf-8'))
+  elapsed = time.perf_counter() - started
+  extractor.close()
+
+  return {
+    'files': len(paths),
+    'runs': len(latencies),
+    'failures': sum(errors.values()),
+    'errors': errors,
+    'files_per_second': round(len(latencies) / elapsed, 3) if elapsed else None,
+    'mb_per_second': round(input_bytes / 1024 / 1024 / elapsed, 3) if elapsed else None,
+    'latency_p50_seconds': round(percentile(latencies, 50), 4),
+    'latency_p95_seconds': round(percentile(latencies, 95), 4),
+    'latency_max_seconds': round(max(latencies), 4),
+    'peak_rss_delta_mb': round((peak_rss() - baseline) / 1024 / 1024, 1),
+    # 每個檔案第一次執行的輸出字數，repeat 之間應相同
+    'output_chars_total': sum(output_chars[:len(paths)]),
+    'output_chars_p50': percentile(output_chars, 50),
+    'output_chars_max': max(output_chars) if output_chars else None,
+    # 輸出文字的摘要，跨 commit 比對擷取結果是否改變
+    'output_sha1': digest.hexdigest(),
+  }
+
+def git_commit():
+  try:
+    return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+                          cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+  except Exception:
+    return None
+
+def compare(base, current):
+  """
+  與基準結果比較：ratio < 1 表示延遲降低 / 記憶體減少，吞吐量則是 > 1 表示變快
+  """
+  report = {}
+  for kind, now in current['formats'].items():
+    before = base['formats'].get(kind)
+    if not before:
+      continue
+    entry = {}
+    for key in ('latency_p50_seconds', 'latency_p95_seconds', 'files_per_second', 'peak_rss_delta_mb'):
+      if before.get(key) and now.get(key) is not None:
+        entry[f'{key}_ratio'] = round(now[key] / before[key], 3)
+    entry['output_changed'] = before.get('output_sha1') != now.get('output_sha1')
+    report[kind] = entry
+  return {'base_commit': base['meta'].get('commit'), 'commit': current['meta'].get('commit'), 'formats': report}
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser(description="擷取效能基準測試")
+  parser.add_argument("--corpus", default=os.path.join(tempfile.gettempdir(), 'fulltext_bench_corpus'), help="語料資料夾，不存在時自動產生")
+  parser.add_argument("--scale", type=int, default=1)
+  parser.add_argument("--seed", type=int, default=0)
+  parser.add_argument("--regenerate", action="store_true", help="重新產生語料")
+  parser.add_argument("--repeat", type=int, default=3)
+  parser.add_argument("--formats", nargs="*", help="只量測指定格式，如 text_pdf docx zip")
+  parser.add_argument("--ocr-backend", default='auto')
+  parser.add_argument("--output", help="結果 JSON 檔")
+  parser.add_argument("--compare", help="基準結果 JSON 檔，另輸出比值")
+  parser.add_argument("--child", nargs=2, metavar=("FORMAT", "PATHS_JSON"), help=argparse.SUPPRESS)
+  args = parser.parse_args()
+
+  if args.child:
+    print(json.dumps(measure(json.loads(args.child[1]), args.repeat, args.ocr_backend), ensure_ascii=False))
+    sys.exit()
+
+  corpus, manifest = load_corpus(args.corpus)
+  if corpus is None or args.regenerate or (manifest['scale'], manifest['seed']) != (args.scale, args.seed):
+    print(f"📦 產生語料：{args.corpus}", file=sys.stderr)
+    corpus = generate_corpus(args.corpus, args.scale, args.seed)
+
+  from file_fulltext_extractor import FileFullTextExtractor
+  result = {
+    'meta': {
+      'commit': git_commit(),
+      'extractor_version': FileFullTextExtractor.VERSION,
+      'python': platform.python_version(),
+      'platform': platform.platform(),
+      'cpu_count': os.cpu_count(),
+      'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+      'scale': args.scale,
+      'seed': args.seed,
+      'repeat': args.repeat,
+      'ocr_backend': args.ocr_backend,
+    },
+    'formats': {},
+  }
+  for kind, paths in corpus.items():
+    if args.formats and kind not in args.formats:
+      continue
+    print(f"⏳ {kind}（{len(paths)} 個檔案）", file=sys.stderr)
+    output = subprocess.run(
+      [sys.executable, os.path.abspath(__file__), '--child', kind, json.dumps(paths),
+       '--repeat', str(args.repeat), '--ocr-backend', args.ocr_backend],
+      capture_output=True, text=True, check=True
+    ).stdout
+    result['formats'][kind] = json.loads(output.strip().splitlines()[-1])
+
+  if args.compare:
+    with open(args.compare, encoding='utf-8') as f:
+      result['comparison'] = compare(json.load(f), result)
+
+  text = json.dumps(result, indent=2, ensure_ascii=False)
+  if args.output:
+    with open(args.output, 'w', encoding='utf-8') as f:
+      f.write(text)
+  print(text)
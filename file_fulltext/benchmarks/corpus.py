@@ -0,0 +1,218 @@
+# 產生固定內容的中英混合測試語料：文字型與掃描 PDF、含內嵌圖片的 DOCX/PPTX/XLSX、CSV/JSON/TXT、DXF 與（巢狀）ZIP
+# 用法：py benchmarks/corpus.py OUTPUT_DIR [--scale 1] [--seed 0]
+# 同一組 seed / scale 產生的文字與圖片內容相同；檔案 bytes 可能因函式庫寫入的時間戳記而不同
+import os, io, json, random, zipfile, argparse
+from datetime import datetime
+
+from bench_clean import WORDS_ZH, WORDS_EN
+
+FIXED_TIME = datetime(2024, 1, 1)
+ZIP_TIME = (2024, 1, 1, 0, 0, 0)
+CJK_FONT = 'china-t'  # PyMuPDF 內建的繁體中文字型
+
+def sentence(rng, words=(6, 16)):
+  tokens = []
+  for _ in range(rng.randint(*words)):
+    tokens.append(rng.choice(WORDS_ZH) if rng.random() < 0.6 else rng.choice(WORDS_EN))
+    if rng.random() < 0.1:
+      tokens.append(f'{rng.randint(0, 9999):04d}')
+  return ' '.join(tokens) + rng.choice(['。', '，', '；', ''])
+
+def render_text_png(lines, width=600, height=200, dpi=150, font_size=14):
+  """
+  以 PyMuPDF 將文字繪成 PNG（PIL 預設字型沒有中文），回傳 bytes
+  """
+  import fitz  # PyMuPDF
+  doc = fitz.open()
+  page = doc.new_page(width=width * 72 / dpi, height=height * 72 / dpi)
+  y = font_size
+  for line in lines:
+    page.insert_text((8, y), line, fontname=CJK_FONT, fontsize=font_size * 72 / dpi * 1.5)
+    y += font_size * 72 / dpi * 2
+  png = page.get_pixmap(dpi=dpi, colorspace=fitz.csGRAY).tobytes('png')
+  doc.close()
+  return png
+
+def save_pdf(doc, path):
+  doc.set_metadata({'creationDate': 'D:20240101000000', 'modDate': 'D:20240101000000', 'producer': 'corpus'})
+  doc.save(path, garbage=3, deflate=True, no_new_id=True)
+  doc.close()
+
+def text_pdf(path, rng, pages):
+  import fitz  # PyMuPDF
+  doc = fitz.open()
+  for _ in range(pages):
+    page = doc.new_page()
+    y = 60
+    while y < page.rect.height - 60:
+      page.insert_text((50, y), sentence(rng), fontname=CJK_FONT, fontsize=9)
+      y += 14
+  save_pdf(doc, path)
+
+def scanned_pdf(path, rng, pages, blank_every=4):
+  """
+  每頁是一張 150 DPI 的文字圖片，每 blank_every 頁插入一頁空白掃描頁
+  """
+  import fitz  # PyMuPDF
+  doc = fitz.open()
+  for index in range(pages):
+    page = doc.new_page()
+    lines = [] if index % blank_every == blank_every - 1 else [sentence(rng, (4, 8)) for _ in range(30)]
+    png = render_text_png(lines, width=1240, height=1754, font_size=16)
+    page.insert_image(page.rect, stream=png)
+  save_pdf(doc, path)
+
+def docx_file(path, rng, paragraphs, logo):
+  from docx import Document
+  from docx.shared import Inches
+  doc = Document()
+  doc.core_properties.created = doc.core_properties.modified = FIXED_TIME
+  doc.add_picture(io.BytesIO(logo), width=Inches(1.5))
+  for _ in range(paragraphs):
+    doc.add_paragraph(sentence(rng))
+  table = doc.add_table(rows=5, cols=4)
+  for row in table.rows:
+    for cell in row.cells:
+      cell.text = sentence(rng, (1, 3))
+  doc.add_picture(io.BytesIO(render_text_png([sentence(rng, (3, 6)) for _ in range(3)])), width=Inches(4))
+  doc.save(path)
+
+def pptx_file(path, rng, slides, logo):
+  from pptx import Presentation
+  from pptx.util import Inches
+  prs = Presentation()
+  prs.core_properties.created = prs.core_properties.modified = FIXED_TIME
+  for index in range(slides):
+    slide = prs.slides.add_slide(prs.slide_layouts[1])
+    slide.shapes.title.text = sentence(rng, (2, 5))
+    slide.placeholders[1].text = '\n'.join(sentence(rng) for _ in range(4))
+    slide.shapes.add_picture(io.BytesIO(logo), Inches(8), Inches(0.2), width=Inches(1.5))
+    if index % 3 == 0:
+      slide.shapes.add_picture(io.BytesIO(render_text_png([sentence(rng, (3, 6))])), Inches(1), Inches(5), width=Inches(6))
+  prs.save(path)
+
+def xlsx_file(path, rng, rows, logo):
+  import openpyxl
+  from openpyxl.drawing.image import Image as XLImage
+  wb = openpyxl.Workbook()
+  wb.properties.created = wb.properties.modified = FIXED_TIME
+  ws = wb.active
+  ws.title = '量測紀錄'
+  ws.append(['日期', '測點', '說明', '讀數1', '讀數2', '讀數3'])
+  for row in range(rows):
+    ws.append([f'2024-{row % 12 + 1:02d}-{row % 28 + 1:02d}', f'P-{row:06d}', sentence(rng, (2, 5))]
+              + [round(rng.uniform(-50, 50), 3) for _ in range(3)])
+  image = XLImage(io.BytesIO(logo))
+  image.anchor = 'H2'
+  ws.add_image(image)
+  wb.save(path)
+
+def csv_file(path, rng, rows):
+  with open(path, 'w', encoding='utf-8', newline='') as f:
+    f.write('id,name,note,value\n')
+    for row in range(rows):
+      f.write(f'{row},{rng.choice(WORDS_ZH)},{sentence(rng, (2, 6)).replace(",", " ")},{rng.uniform(0, 1000):.2f}\n')
+
+def json_file(path, rng, records):
+  data = {'project': '檢驗紀錄', 'records': [
+    {'id': index, 'title': sentence(rng, (2, 4)), 'items': [sentence(rng, (2, 6)) for _ in range(5)]}
+    for index in range(records)
+  ]}
+  with open(path, 'w', encoding='utf-8') as f:
+    json.dump(data, f, ensure_ascii=False, indent=2)
+
+def txt_file(path, rng, lines):
+  with open(path, 'w', encoding='utf-8') as f:
+    for _ in range(lines):
+      f.write(sentence(rng) + '\n')
+
+def dxf_file(path, rng, texts):
+  import ezdxf
+  doc = ezdxf.new('R2018')
+  msp = doc.modelspace()
+  for index in range(texts):
+    msp.add_text(sentence(rng, (1, 4)), dxfattribs={'height': 2.5}).set_placement((index % 20 * 40, index // 20 * 5))
+  doc.saveas(path)
+
+def zip_file(path, members, nested=None):
+  """
+  members: 要放入的檔案路徑；nested: 另包一層 ZIP 的檔案路徑
+  """
+  with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as zf:
+    for member in members:
+      with open(member, 'rb') as f:
+        zf.writestr(zipfile.ZipInfo(f'docs/{os.path.basename(member)}', ZIP_TIME), f.read())
+    if nested:
+      buffer = io.BytesIO()
+      with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as inner:
+        for member in nested:
+          with open(member, 'rb') as f:
+            inner.writestr(zipfile.ZipInfo(os.path.basename(member), ZIP_TIME), f.read())
+      zf.writestr(zipfile.ZipInfo('nested/inner.zip', ZIP_TIME), buffer.getvalue())
+
+def generate_corpus(output_dir, scale=1, seed=0):
+  """
+  產生語料並回傳 {格式: [檔案路徑, ...]}，同時寫入 output_dir/manifest.json
+  """
+  os.makedirs(output_dir, exist_ok=True)
+  rng = random.Random(seed)
+  logo = render_text_png(['ACME 營造股份有限公司', '品質管理部'], width=300, height=90)
+  corpus = {}
+
+  def add(kind, name, builder, *args):
+    path = os.path.join(output_dir, name)
+    builder(path, random.Random(rng.random()), *args)
+    corpus.setdefault(kind, []).append(path)
+
+  for index in range(3 * scale):
+    add('text_pdf', f'text_{index}.pdf', text_pdf, 20)
+  for index in range(2 * scale):
+    add('scanned_pdf', f'scanned_{index}.pdf', scanned_pdf, 4)
+  for index in range(3 * scale):
+    add('docx', f'report_{index}.docx', docx_file, 80, logo)
+  for index in range(2 * scale):
+    add('pptx', f'slides_{index}.pptx', pptx_file, 10, logo)
+  for index in range(2 * scale):
+    add('xlsx', f'measure_{index}.xlsx', xlsx_file, 5000, logo)
+  for index in range(2 * scale):
+    add('csv', f'table_{index}.csv', csv_file, 20000)
+  for index in range(3 * scale):
+    add('json', f'records_{index}.json', json_file, 300)
+  for index in range(3 * scale):
+    add('txt', f'notes_{index}.txt', txt_file, 5000)
+  for index in range(2 * scale):
+    add('dxf', f'drawing_{index}.dxf', dxf_file, 500)
+
+  for index in range(2 * scale):
+    path = os.path.join(output_dir, f'bundle_{index}.zip')
+    zip_file(path, [corpus['docx'][index], corpus['text_pdf'][index], corpus['csv'][index]],
+             nested=[corpus['txt'][index], corpus['json'][index]])
+    corpus.setdefault('zip', []).append(path)
+
+  with open(os.path.join(output_dir, 'manifest.json'), 'w', encoding='utf-8') as f:
+    json.dump({'scale': scale, 'seed': seed, 'files': {kind: [os.path.basename(p) for p in paths] for kind, paths in corpus.items()}},
+              f, ensure_ascii=False, indent=2)
+  return corpus
+
+def load_corpus(output_dir):
+  """
+  讀取既有語料的 manifest，回傳 ({格式: [檔案路徑, ...]}, manifest)；不存在時回傳 (None, None)
+  """
+  manifest_path = os.path.join(output_dir, 'manifest.json')
+  if not os.path.exists(manifest_path):
+    return None, None
+  with open(manifest_path, encoding='utf-8') as f:
+    manifest = json.load(f)
+  return {kind: [os.path.join(output_dir, name) for name in names] for kind, names in manifest['files'].items()}, manifest
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser(description="產生擷取效能測試語料")
+  parser.add_argument("output_dir")
+  parser.add_argument("--scale", type=int, default=1, help="各格式檔案數量倍數")
+  parser.add_argument("--seed", type=int, default=0)
+  args = parser.parse_args()
+
+  corpus = generate_corpus(args.output_dir, args.scale, args.seed)
+  for kind, paths in corpus.items():
+    size_mb = sum(os.path.getsize(p) for p in paths) / 1024 / 1024
+    print(f"✅ {kind}: {len(paths)} 個檔案，{size_mb:.1f} MB")
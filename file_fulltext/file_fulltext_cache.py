@@ -0,0 +1,88 @@
+import os, json, time, sqlite3, hashlib, threading
+
+class FileFullTextCache:
+  """
+  擷取結果快取：以檔案內容 SHA-256 + 擷取器版本與影響結果的設定（OCR 後端、語言、略過清單…）為 key，存放於 SQLite。
+  同一份附件上傳到多個專案時只需 OCR 一次；總大小超過 max_bytes 時依最近使用時間 (LRU) 淘汰。
+  命中率等統計由呼叫端依結果的 cached 欄位自行累計（見 FileFullTextProcessor.cache_stats）。
+  """
+  def __init__(self, cache_path, max_bytes=1024 * 1024 * 1024):
+    os.makedirs(os.path.dirname(os.path.abspath(cache_path)), exist_ok=True)
+    self.cache_path = cache_path
+    self.max_bytes = max_bytes
+    self.lock = threading.Lock()
+    # 多個 worker process 可共用同一個檔案，WAL 讓讀寫不互相阻塞
+    self.conn = sqlite3.connect(cache_path, timeout=30, check_same_thread=False)
+    self.conn.execute("PRAGMA journal_mode=WAL;")
+    self.conn.execute("""
+      CREATE TABLE IF NOT EXISTS extract_cache (
+        key TEXT PRIMARY KEY,
+        result TEXT NOT NULL,
+        size INTEGER NOT NULL,
+        elapsed REAL NOT NULL,
+        used_at REAL NOT NULL
+      );
+    """)
+    self.conn.execute("CREATE INDEX IF NOT EXISTS idx_extract_cache_used_at ON extract_cache (used_at);")
+    self.conn.commit()
+    # 快取總大小只在開啟時加總一次，之後由 put / evict 增減；其他 process 寫入的部分在下次開啟時才計入
+    self.total_bytes = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM extract_cache;").fetchone()[0]
+
+  @staticmethod
+  def file_digest(file_path, chunk_size=1024 * 1024):
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+      for chunk in iter(lambda: f.read(chunk_size), b''):
+        digest.update(chunk)
+    return digest.hexdigest()
+
+  def make_key(self, file_path, *parts):
+    return '|'.join([self.file_digest(file_path), *map(str, parts)])
+
+  def get(self, key):
+    """
+    回傳 {'result': 擷取結果, 'elapsed': 當初擷取花費秒數}，未命中回傳 None
+    """
+    with self.lock:
+      row = self.conn.execute("SELECT result, elapsed FROM extract_cache WHERE key = ?;", (key,)).fetchone()
+      if not row:
+        return None
+      self.conn.execute("UPDATE extract_cache SET used_at = ? WHERE key = ?;", (time.time(), key))
+      self.conn.commit()
+      return {'result': json.loads(row[0]), 'elapsed': row[1]}
+
+  def put(self, key, result, elapsed):
+    payload = json.dumps(result, ensure_ascii=False)
+    size = len(payload.encode('utf-8'))
+    with self.lock:
+      replaced = self.conn.execute("SELECT size FROM extract_cache WHERE key = ?;", (key,)).fetchone()
+      self.conn.execute(
+        "INSERT OR REPLACE INTO extract_cache (key, result, size, elapsed, used_at) VALUES (?, ?, ?, ?, ?);",
+        (key, payload, size, elapsed, time.time())
+      )
+      self.total_bytes += size - (replaced[0] if replaced else 0)
+      self.evict()
+      self.conn.commit()
+
+  def evict(self):
+    """
+    超過上限時，從最久未使用的項目開始刪除，直到低於上限的 90%
+    """
+    if self.total_bytes <= self.max_bytes:
+      return
+    # 其他 process 可能也寫入或淘汰過，淘汰前重新加總一次
+    total = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM extract_cache;").fetchone()[0]
+    target = self.max_bytes * 0.9
+    stale_keys = []
+    if total > self.max_bytes:
+      for key, size in self.conn.execute("SELECT key, size FROM extract_cache ORDER BY used_at;"):
+        if total <= target:
+          break
+        stale_keys.append((key,))
+        total -= size
+      self.conn.executemany("DELETE FROM extract_cache WHERE key = ?;", stale_keys)
+    self.total_bytes = total
+
+  def close(self):
+    with self.lock:
+      self.conn.close()
@@ -0,0 +1,129 @@
+import re
+
+# 所有規則預先編譯，對每一行只做一次比對
+_PAGE_HEADER = re.compile(r'--- (?:Page \d+ - Rotate \d+° |Sheet: Table \d+ |Page \d+ Text )---')
+_SHORT_NOISE = re.compile(r'[\W\dA-Za-z]{0,5}')
+_LONG_NOISE = re.compile(r'[\W\da-zA-Z]+')
+_WHITESPACE = re.compile(r'\s')
+# 只保留數字、中文、英文與 / -（空白也一併移除）
+_DROP_CHARS = re.compile(r'[^0-9\u4e00-\u9fffA-Za-z/-]')
+
+_SPACES = re.compile(r' +')
+_LINE_BREAK = re.compile(r'[\r\n]')
+_SENTENCE_DELIMITER = re.compile(r'[，。？！；]')
+_LONG_CODE = re.compile(r'[A-Za-z0-9一\/-]{20,}')
+
+def clean_text(text):
+  """
+  移除頁面標題、只含符號或亂碼的行，並去掉所有空白、換行與多餘符號
+  """
+  cleaned_lines = []
+  for line in text.splitlines():
+    line = line.strip()
+    if not line:
+      continue
+    # 頁面標題、只包含符號或亂碼的行
+    if _PAGE_HEADER.fullmatch(line) or _SHORT_NOISE.fullmatch(line):
+      continue
+    # 超長亂碼行（先以長度快速排除，多數行不必計算去空白後的長度）
+    if len(line) > 100 and _LONG_NOISE.fullmatch(line) and len(_WHITESPACE.sub('', line)) > 100:
+      continue
+    cleaned_lines.append(_DROP_CHARS.sub('', line))
+
+  return ''.join(cleaned_lines)
+
+def split_sentences(text):
+  """
+  輕量的中文斷句：先依換行、再依全形標點 ，。？！；切開，與 SnowNLP 的 sentences 結果相同，但不需載入模型
+  """
+  for line in _LINE_BREAK.split(text):
+    line = line.strip()
+    if not line:
+      continue
+    for sentence in _SENTENCE_DELIMITER.split(line):
+      sentence = sentence.strip()
+      if sentence:
+        yield sentence
+
+def clean_ocr_text(text):
+  """
+  將長串 OCR 文本斷句、移除過長的連續數字或英文編號，再交給 clean_text；清理後為空時回傳原文
+  """
+  if not text:
+    return ''
+
+  # 移除連續空白
+  text = _SPACES.sub('', text)
+
+  # 逐句移除過長編號後合併成單一文字
+  joined = ''.join(_LONG_CODE.sub('', sentence) for sentence in split_sentences(text))
+  cleaned = clean_text(joined)
+  return cleaned if cleaned else text.strip()
+
+# str.splitlines 除了 \r \n 之外的分行字元（如 Tesseract 每頁結尾的 \f），清理 OCR 文字時 \r \n 已在斷句時移除
+_SEGMENT_BREAK = re.compile(r'[\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029]')
+# 中文等非英數的文字字元：一行只要含有這類字元，就不會被判定為雜訊行
+_TEXT_CHAR = re.compile(r'[^\W\dA-Za-z]')
+
+def iter_clean_ocr_text(chunks, limit=None):
+  """
+  clean_ocr_text 的串流版本：chunks 為依序的文字片段（如 PDF 每頁），片段之間視為換行
+  逐段產生清理後的文字，合併結果與 clean_ocr_text('\n'.join(chunks)) 相同。
+  clean_text 以分行字元切行判斷雜訊，一行確定含有中文後剩下的部分只需逐字過濾，可立即輸出；
+  全英數的內容需等到該行結束才能判斷，整份清理後為空時才回傳去空白的原文
+  limit: 結果的字數上限（collect 的 max_text_length）。全英數的文件整份都是同一行、也不會輸出任何清理後的文字，
+  因此尚未輸出前保留的原文達到 limit 時，就以原文前段作為結果並停止讀取後續片段（之後才出現中文的文件結果會不同）；
+  尚未結束的一行超過長雜訊的判斷長度後，也只保留足以產生 limit 字的部分
+  """
+  fallback = []   # 尚未輸出任何文字前保留的原文
+  fallback_length = 0
+  carry = ''      # 尚未結束、也尚未確定含中文的一行
+  carry_length = 0  # carry 過濾後的字數
+  committed = False
+  for chunk in chunks:
+    chunk = _SPACES.sub('', chunk)
+    if fallback is not None:
+      fallback.append(chunk)
+      fallback_length += len(chunk) + 1
+
+    joined = ''.join(_LONG_CODE.sub('', sentence) for sentence in split_sentences(chunk))
+    segments = _SEGMENT_BREAK.split(joined)
+    for index, segment in enumerate(segments):
+      last = index == len(segments) - 1
+      if committed:
+        cleaned = _DROP_CHARS.sub('', segment)
+      elif not last:
+        cleaned = clean_text(carry + segment)
+        carry = ''
+      elif _TEXT_CHAR.search(segment) or (carry and _TEXT_CHAR.search(carry)):
+        cleaned = _DROP_CHARS.sub('', carry + segment)
+        carry = ''
+        committed = True
+      else:
+        # 過濾後超過 100 字的全英數行一定是長雜訊，除非之後出現中文而整行保留，此時只用得到前 limit 字
+        if not limit or carry_length < max(limit, 101):
+          carry += segment
+          carry_length += len(_DROP_CHARS.sub('', segment))
+        cleaned = ''
+      if not last:
+        committed = False
+        carry_length = 0
+      if cleaned:
+        fallback = None
+        yield cleaned
+
+    if limit and fallback is not None and fallback_length >= limit:
+      text = '\n'.join(fallback).strip()
+      if text:
+        yield text
+      return
+
+  if carry:
+    cleaned = clean_text(carry)
+    if cleaned:
+      fallback = None
+      yield cleaned
+  if fallback:
+    text = '\n'.join(fallback).strip()
+    if text:
+      yield text
@@ -1,6 +1,9 @@
-import os, shutil, json
+import os, shutil, json, time, argparse
 import mysql.connector
+from concurrent.futures import ThreadPoolExecutor
 from mysql.connector import Error
+from file_fulltext_targets import FileFullTextTargets
+from file_fulltext_index import FileFullTextIndex
 
 base_dir = os.path.dirname(os.path.abspath(__file__))
 
@@ -18,10 +21,21 @@ class FileFullEmpty:
     self.config_user = config.get('user', '')
     self.config_password = config.get('password', '')
     self.config_projects = config.get('projects', '')
+    self.config_target_refresh_seconds = config.get('target_refresh_seconds', 600)
+    # 清空時每批依主鍵範圍處理的筆數、批次間暫停秒數，以及同時處理的資料表數
+    self.config_reset_batch_size = config.get('reset_batch_size', 1000)
+    self.config_reset_pause_seconds = config.get('reset_pause_seconds', 0.2)
+    self.config_reset_workers = config.get('reset_workers', 1)
+    # 清空的資料一併從本機全文檢索索引移除，見 FileFullTextIndex
+    self.config_search_index_enabled = config.get('search_index_enabled', True)
+    self.config_search_index_path = config.get('search_index_path', '') or os.path.join(self.base_dir, 'cache', 'fulltext_index.sqlite3')
 
     self.conn = None
     self.cursor = None
 
+    self.targets = FileFullTextTargets(self.config_projects, self.config_target_refresh_seconds)
+    self.index = FileFullTextIndex(self.config_search_index_path) if self.config_search_index_enabled else None
+
   def connect_mysql(self):
     try:
       self.conn = mysql.connector.connect(host= self.config_host, user= self.config_user, password= self.config_password)
@@ -34,6 +48,9 @@ class FileFullEmpty:
       return False
 
   def close_mysql(self):
+    if self.index:
+      self.index.close()
+      self.index = None
     try:
       if self.cursor:
         self.cursor.close()
@@ -53,45 +70,108 @@ class FileFullEmpty:
     else:
       print(f"❌ 資料夾不存在或不是資料夾：{folder_path}")
 
-  def empty_fulltext(self):
+  def empty_fulltext(self, dry_run=False, workers=None):
+    """
+    清空各專案資料表中 [file_ 開頭的處理標記，讓資料重新被處理
+    dry_run: 只統計會被清空的筆數，不修改資料
+    workers: 同時處理的資料表數，每個資料表使用各自的連線；預設為 reset_workers
+    """
     if not self.conn or not self.cursor:
       print("❌ 尚未建立資料庫連線")
       return False
 
-    self.cursor.execute("SHOW DATABASES;")
-    all_databases = [row['Database'] for row in self.cursor.fetchall()]
-    filtered_databases = []
-    for proj in self.config_projects:
-      matched_dbs = [db for db in all_databases if db.startswith(proj['projectName'])]
-      filtered_databases.extend(matched_dbs)
-
-    for filtered_database in filtered_databases:
-      matched_project = next(
-        (c for c in self.config_projects if filtered_database.startswith(c["projectName"])),
-        None
-      )
-      if not matched_project:
-        continue
-
-      # 確認 table 是否存在
-      self.cursor.execute(f"SHOW TABLES FROM {filtered_database} LIKE '{matched_project['tableName']}';")
-      if not self.cursor.fetchone():
-        continue
-
-      try:
-        update_sql = f"""
-          UPDATE {filtered_database}.{matched_project['tableName']} SET {matched_project['fullTextCol']}='' WHERE {matched_project['fullTextCol']} LIKE '[file_%';
-        """
-        self.cursor.execute(update_sql)
-        self.conn.commit()
-        print(f"✅ 已清空：{filtered_database}.{matched_project['tableName']}.{matched_project['fullTextCol']}")
-      except Exception as e:
-        print(f"❌ 更新失敗：{filtered_database}.{matched_project['tableName']}，原因：{e}")
+    targets = self.targets.all(self.cursor)
+    workers = workers or self.config_reset_workers
+    started = time.monotonic()
+    if workers > 1 and len(targets) > 1:
+      with ThreadPoolExecutor(max_workers=workers) as pool:
+        counts = list(pool.map(lambda target: self.reset_target_with_connection(target, dry_run), targets))
+    else:
+      counts = [self.reset_target(target, dry_run, self.conn) for target in targets]
 
+    action = "待清空" if dry_run else "已清空"
+    print(f"📦 {len(targets)} 個資料表共{action} {sum(counts)} 筆，耗時 {time.monotonic() - started:.1f} 秒")
     self.close_mysql()
+    return True
+
+  def reset_target_with_connection(self, target, dry_run):
+    conn = mysql.connector.connect(host= self.config_host, user= self.config_user, password= self.config_password)
+    try:
+      return self.reset_target(target, dry_run, conn)
+    finally:
+      conn.close()
+
+  def reset_target(self, target, dry_run, conn):
+    """
+    依主鍵範圍分批清空單一資料表，每批先找出第 reset_batch_size 筆的主鍵作為上界，
+    只在該範圍內 UPDATE 並立即 commit，交易與列鎖都很短；批次之間暫停 reset_pause_seconds 秒。
+    啟用全文檢索索引時，先讀出該範圍內要清空的主鍵，commit 後從索引移除。
+    回傳清空（dry_run 時為待清空）的筆數
+    """
+    table = f"{target.database}.{target.table}"
+    id_col = target.project['idCol']
+    text_col = target.project['fullTextCol']
+    batch_size = max(int(self.config_reset_batch_size), 1)
+    cursor = conn.cursor()
+    try:
+      if dry_run:
+        cursor.execute(f"SELECT COUNT(*) FROM {table} WHERE {text_col} LIKE '[file_%';")
+        count = cursor.fetchone()[0]
+        print(f"🔎 {table}.{text_col} 待清空 {count} 筆")
+        return count
+
+      cursor.execute(f"SELECT MAX({id_col}) FROM {table};")
+      max_id = cursor.fetchone()[0]
+      reset_count = 0
+      batches = 0
+      last_id = None
+      while max_id is not None:
+        lower_sql, lower_params = (f"{id_col} > %s", (last_id,)) if last_id is not None else ("1 = 1", ())
+        cursor.execute(f"SELECT {id_col} FROM {table} WHERE {lower_sql} ORDER BY {id_col} LIMIT 1 OFFSET {batch_size - 1};", lower_params)
+        row = cursor.fetchone()
+        upper_id = row[0] if row else None
+        upper_sql, upper_params = (f" AND {id_col} <= %s", (upper_id,)) if upper_id is not None else ("", ())
+
+        reset_ids = []
+        if self.index:
+          cursor.execute(
+            f"SELECT {id_col} FROM {table} WHERE {lower_sql}{upper_sql} AND {text_col} LIKE '[file_%%';",
+            (*lower_params, *upper_params)
+          )
+          reset_ids = [row[0] for row in cursor.fetchall()]
+        cursor.execute(
+          f"UPDATE {table} SET {text_col} = '' WHERE {lower_sql}{upper_sql} AND {text_col} LIKE '[file_%%';",
+          (*lower_params, *upper_params)
+        )
+        reset_count += cursor.rowcount
+        conn.commit()
+        if reset_ids:
+          self.index.delete(target.database, target.table, reset_ids)
+        batches += 1
+
+        if upper_id is None:
+          break
+        last_id = upper_id
+        if batches % 10 == 0:
+          print(f"⏳ {table}.{text_col} 已清空 {reset_count} 筆（{id_col} {last_id} / {max_id}）")
+        time.sleep(self.config_reset_pause_seconds)
+
+      print(f"✅ 已清空：{table}.{text_col}（{reset_count} 筆，{batches} 批）")
+      return reset_count
+    except Exception as e:
+      print(f"❌ 更新失敗：{table}，原因：{e}")
+      return 0
+    finally:
+      cursor.close()
 
 if __name__ == "__main__":
+  parser = argparse.ArgumentParser(description="清空全文處理標記，讓資料重新被處理")
+  parser.add_argument("--dry-run", action="store_true", help="只統計各資料表會被清空的筆數，不修改資料")
+  parser.add_argument("--workers", type=int, default=None, help="同時處理的資料表數，預設依 config.json 的 reset_workers")
+  args = parser.parse_args()
+
   empty = FileFullEmpty(base_dir)
   if empty.connect_mysql():
-    empty.remove_folder(os.path.join(base_dir, 'downloads'))
-    empty.empty_fulltext()
+    if not args.dry_run:
+      empty.remove_folder(os.path.join(base_dir, 'downloads'))
+    empty.empty_fulltext(dry_run=args.dry_run, workers=args.workers)
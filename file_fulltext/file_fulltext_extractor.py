@@ -1,347 +1,956 @@
-import os, io, json, zipfile, re
-import numpy as np, pandas as pd
-import cv2 # opencv-python
-import fitz  # PyMuPDF
-import pytesseract, ezdxf, openpyxl
-from PIL import Image, ImageFilter, ImageEnhance
-from docx import Document
-from pptx import Presentation
-from snownlp import SnowNLP
+import os, io, json, zipfile, time, math, threading, hashlib
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, Future
+from concurrent.futures.process import BrokenProcessPool
+import importlib.util
+import file_fulltext_cleaner
+from file_fulltext_ocr import create_ocr_backend
+
+# 各格式需要的第三方套件一律在處理方法內 import，只處理 PDF 的執行不必載入 pandas、ezdxf
+
+# 平行 OCR 的 worker process 狀態：各自持有 extractor（含常駐 OCR 引擎）與目前開啟的 PDF
+_page_worker = {}
+
+def _init_page_worker(tesseract_lang, ocr_backend, adaptive_ocr, ocr_script_detect):
+  _page_worker['extractor'] = FileFullTextExtractor(tesseract_lang, ocr_backend=ocr_backend, adaptive_ocr=adaptive_ocr,
+                                                    ocr_script_detect=ocr_script_detect)
+
+def _ocr_pdf_page(file_path, page_num):
+  import fitz  # PyMuPDF
+  doc_key = (file_path, os.path.getmtime(file_path))
+  if _page_worker.get('doc_key') != doc_key:
+    if _page_worker.get('doc'):
+      _page_worker['doc'].close()
+    _page_worker['doc'] = fitz.open(file_path)
+    _page_worker['doc_key'] = doc_key
+  page = _page_worker['doc'].load_page(page_num)
+  return _page_worker['extractor'].ocr_pdf_page(page)
+
+class ExtractError(Exception):
+  """
+  處理方法無法擷取文字，訊息即為結果的 error
+  """
+
+def _is_installed(requirement):
+  if isinstance(requirement, tuple):
+    return any(map(_is_installed, requirement))
+  return importlib.util.find_spec(requirement) is not None
 
 class FileFullTextExtractor:
-  def __init__(self, tesseract_lang='eng+chi_tra'):
+  # 擷取或清理邏輯有變動時遞增，讓舊的快取結果失效
+  VERSION = '6'
+
+  # PIL ImageFilter.SHARPEN 的卷積核（除以 16）
+  SHARPEN_KERNEL = ((-2, -2, -2), (-2, 32, -2), (-2, -2, -2))
+
+  # 掃描頁 OCR 前的檢查參數，見 plan_pdf_page
+  FIXED_OCR_SCALE = 3           # 未啟用 adaptive_ocr 時的固定放大倍率
+  BLANK_INK_DELTA = 48          # 預覽中與背景灰階相差超過此值的像素視為墨跡
+  BLANK_PAGE_INK_PIXELS = 20    # 墨跡像素少於此數視為空白頁
+  OCR_MIN_DPI = 150
+  OCR_MAX_DPI = 216             # 等同原本固定 3 倍
+  OCR_MAX_PIXELS = 25_000_000   # 大圖面限制單頁總像素
+  SCANNED_PAGE_COVERAGE = 0.5   # 內嵌圖片覆蓋率達此比例視為掃描頁
+
+  CLEAN_BATCH_LINES = 1000      # 逐行來源（段落、列、文字檔）每批清理的行數
+  CSV_CHUNK_ROWS = 10000
+
+  # 副檔名 → (處理方法名稱, 需要的套件)；tuple 中的 tuple 表示其中之一即可（OCR 後端）
+  # 處理方法為產生器，依序產生清理後的文字片段，見 iter_text
+  _OCR = ('numpy', 'cv2', 'PIL', ('tesserocr', 'pytesseract'))
+  HANDLERS = {
+    ".pdf": ('iter_pdf', ('fitz', *_OCR)),
+    ".docx": ('iter_docx', ('docx', *_OCR)),
+    ".doc": ('iter_docx', ('docx', *_OCR)),
+    ".xlsx": ('iter_excel', ('openpyxl', *_OCR)),
+    ".xls": ('iter_excel', ('pandas', 'xlrd')),
+    ".pptx": ('iter_pptx', ('pptx', *_OCR)),
+    ".ppt": ('iter_pptx', ('pptx', *_OCR)),
+    ".jpg": ('iter_image', _OCR),
+    ".jpeg": ('iter_image', _OCR),
+    ".png": ('iter_image', _OCR),
+    ".bmp": ('iter_image', _OCR),
+    ".tif": ('iter_image', _OCR),
+    ".tiff": ('iter_image', _OCR),
+    ".txt": ('iter_txt', ()),
+    ".csv": ('iter_csv', ('pandas',)),
+    ".json": ('iter_json', ()),
+    #".dwg": ('iter_dwg_or_dxf', ('ezdxf',)),
+    ".dxf": ('iter_dwg_or_dxf', ('ezdxf',)),
+    ".zip": ('iter_zip', ()),
+  }
+
+  def __init__(self, tesseract_lang='eng+chi_tra', cache=None, ocr_backend='auto', pdf_ocr_workers=1, adaptive_ocr=True,
+               zip_workers=4, zip_max_depth=3, zip_max_bytes=512 * 1024 * 1024, zip_max_members=2000, max_text_length=None,
+               image_cache='exact', image_denylist_dir=None, collect_timings=False,
+               max_pages=None, max_entities=None, max_image_pixels=None, ocr_script_detect=False):
     self.lang = tesseract_lang
+    # 依每頁（每張圖片）的文字只執行需要的語言模型，見 ScriptDetectingOcr；結果可能與固定 lang 不同，快取鍵分開
+    self.ocr_script_detect = ocr_script_detect
+    # 不同 OCR 後端的結果也可能不同，同樣放進快取鍵
+    self.ocr_key = f"{ocr_backend}:{tesseract_lang}{'+detect' if ocr_script_detect else ''}"
+    self.cache = cache  # FileFullTextCache，None 表示不使用快取
+    self.ocr_backend = ocr_backend
+    self.ocr = None  # 第一次 OCR 時才建立，見 get_ocr
+    self.ocr_lock = threading.Lock()  # ZIP 成員平行處理時避免重複建立 OCR 引擎
+    # 掃描 PDF 逐頁平行 OCR 的 process 數量，1 表示在目前 process 逐頁處理
+    self.pdf_ocr_workers = pdf_ocr_workers
+    self.page_pool = None
+    # 依頁面內容略過空白頁並挑選渲染倍率，False 則一律以固定 3 倍渲染
+    self.adaptive_ocr = adaptive_ocr
+    # ZIP：成員平行處理的 thread 數、巢狀 ZIP 最多展開層數，以及單一檔案（含所有巢狀層）的解壓縮總量與成員數上限
+    self.zip_workers = zip_workers
+    self.zip_max_depth = zip_max_depth
+    self.zip_max_bytes = zip_max_bytes
+    self.zip_max_members = zip_max_members
+    # extract_text 回傳的文字上限（字數），達到後停止擷取，之後的頁面不再渲染或 OCR；None 表示不限制
+    self.max_text_length = max_text_length
+    # 圖片 OCR 結果快取（存在 cache 中）：'exact' 以灰階像素雜湊、'perceptual' 以 dHash 比對，'off' 不使用
+    self.image_cache = image_cache if cache else 'off'
+    # 已知雜訊圖片（公司 logo、用印章戳…）的資料夾，內嵌圖片與其中任一張相同時直接略過不 OCR
+    self.image_denylist_dir = image_denylist_dir
+    self.image_denylist = None  # 第一次處理圖片時才載入，見 get_image_denylist
+    self.image_denylist_digest = None  # 略過清單內容的雜湊，放進檔案快取鍵，見 get_image_denylist_digest
+    self.image_stats = {'ocr': 0, 'cached': 0, 'denied': 0}
+    self.image_lock = threading.Lock()
+    # 單一檔案的處理量上限：PDF 頁數、DXF 圖元數（超過的部分不處理，結果標記 truncated）與圖片像素數（超過則不解碼）；None 表示不限制
+    self.max_pages = max_pages
+    self.max_entities = max_entities
+    self.max_image_pixels = max_image_pixels
+    self.limits = set()  # 本次 extract_text 達到的上限，見 note_limit
+    # 各階段耗時與頁數，extract_text 時放進結果的 metrics；未啟用時為 None，各階段只多一次判斷
+    self.collect_timings = collect_timings
+    self.timings = None
+    self.timing_lock = threading.Lock()
+    # ZIP 成員在 thread pool 處理時，該 thread 所屬 ZIP 的停止旗標（見 collect），逐頁處理的方法每頁檢查一次
+    self.member_stop = threading.local()
+
+  def close(self):
+    if self.page_pool:
+      self.page_pool.shutdown(cancel_futures=True)
+      self.page_pool = None
+    if self.ocr:
+      self.ocr.close()
+      self.ocr = None
 
   def extract_text(self, file_path):
     ext = os.path.splitext(file_path)[1].lower()
-    handler = self.get_handler(ext)
-    if handler:
-      result = handler(file_path)
-      if result['status'] == 'ok':
-        # 將文字送到 clean_text 處理
-        # result['text'] = self.clean_text(result['text'])
-        result['text'] = result['text']
-      return result
+    if self.get_handler(ext):
+      started = time.perf_counter()
+      if self.collect_timings:
+        self.timings = {'seconds': {}, 'pages': 0, 'ocr_pages': 0}
+      cache_key = None
+      if self.cache:
+        cache_key = self.cache.make_key(file_path, ext, self.VERSION, self.ocr_key, self.adaptive_ocr, self.get_image_denylist_digest(),
+                                        self.max_text_length, self.max_pages, self.max_entities)
+        cached = self.cache.get(cache_key)
+        if cached:
+          result = {**cached['result'], 'cached': True, 'cache_saved_seconds': cached['elapsed']}
+          return self.attach_timings(result, started)
+
+      images_before = dict(self.image_stats)
+      self.limits = set()
+      result = self.collect(self.iter_text(file_path), self.max_text_length)
+      if result['status'] == 'ok' and self.limits:
+        result['truncated'] = True
+        result['limit'] = ','.join(sorted(self.limits))
+      if result['status'] == 'ok' and cache_key:
+        self.cache.put(cache_key, result, time.perf_counter() - started)
+      if cache_key:
+        result['cached'] = False
+      # 本次因圖片快取或略過清單而省下的 OCR 次數，不存入檔案快取
+      for name in ('cached', 'denied'):
+        if self.image_stats[name] > images_before[name]:
+          result[f'images_{name}'] = self.image_stats[name] - images_before[name]
+      if self.timings is not None:
+        self.timings['images_ocr'] = self.image_stats['ocr'] - images_before['ocr']
+      return self.attach_timings(result, started)
     return {'status': 'fail', 'error': f"Unsupported file type: {ext}"}
 
-  def get_handler(self, ext):
-    return {
-      ".pdf": self.extract_from_pdf,
-      ".docx": self.extract_from_docx,
-      ".doc": self.extract_from_docx,
-      ".xlsx": self.extract_from_excel,
-      ".xls": self.extract_from_excel,
-      ".pptx": self.extract_from_pptx,
-      ".ppt": self.extract_from_pptx,
-      ".jpg": self.extract_from_image,
-      ".jpeg": self.extract_from_image,
-      ".png": self.extract_from_image,
-      ".bmp": self.extract_from_image,
-      ".tif": self.extract_from_image,
-      ".tiff": self.extract_from_image,
-      ".txt": self.extract_from_txt,
-      ".csv": self.extract_from_csv,
-      ".json": self.extract_from_json,
-      #".dwg": self.extract_from_dwg_or_dxf,
-      ".dxf": self.extract_from_dwg_or_dxf,
-      ".zip": self.extract_from_zip,
-    }.get(ext)
-
-  def extract_from_pdf(self, file_path):
-    all_text = ''
-
-    # 1️⃣ 嘗試文字型 PDF（含表格座標排序）
+  def attach_timings(self, result, started):
+    """
+    將本次擷取的階段耗時放進結果的 metrics（不存入檔案快取），見 FileFullTextMetrics
+    """
+    if self.timings is None:
+      return result
+    timings, self.timings = self.timings, None
+    timings['seconds']['extract'] = time.perf_counter() - started
+    result['metrics'] = timings
+    return result
+
+  def timer(self):
+    # 啟用計時時回傳起始時間，否則回傳 None，見 add_timing
+    return time.perf_counter() if self.timings is not None else None
+
+  def add_timing(self, stage, started, count=None):
+    """
+    累計階段耗時；started 為 timer() 的回傳值，None 表示未啟用。count 為同時累計的計數欄位（如 ocr_pages）
+    ZIP 成員在多個 thread 中處理，累計時加鎖
+    """
+    if started is None or self.timings is None:
+      return
+    elapsed = time.perf_counter() - started
+    with self.timing_lock:
+      seconds = self.timings['seconds']
+      seconds[stage] = seconds.get(stage, 0.0) + elapsed
+      if count:
+        self.timings[count] += 1
+
+  def note_limit(self, name):
+    """
+    記錄處理方法因上限而提前停止（pages / entities），extract_text 會在結果加上 truncated 與 limit
+    """
+    self.limits.add(name)
+
+  def count_timing(self, count):
+    if self.timings is not None:
+      with self.timing_lock:
+        self.timings[count] += 1
+
+  def iter_timed(self, chunks, spent, name):
+    """
+    計時用的產生器包裝：只累計 chunks 產生片段的時間（不含呼叫端處理片段的時間）到 spent[name]
+    """
     try:
-      doc = fitz.open(file_path)
-    except Exception as e:
-      return {'status': 'fail', 'error': f'Cannot open PDF: {e}'}
+      while True:
+        started = time.perf_counter()
+        try:
+          chunk = next(chunks)
+        except StopIteration:
+          return
+        finally:
+          spent[name] += time.perf_counter() - started
+        yield chunk
+    finally:
+      chunks.close()
+
+  def iter_text(self, file_path):
+    """
+    串流擷取：依序產生清理後的文字片段（PDF 每頁、投影片、工作表中的一批列、ZIP 成員…），
+    片段直接串接即為完整結果。呼叫端提前停止讀取時，後續頁面不會再渲染或 OCR；無法處理時拋出 ExtractError
+    file_path: 檔案路徑或記憶體中的檔案，見 source_name
+    """
+    ext = os.path.splitext(self.source_name(file_path))[1].lower()
+    handler = self.get_handler(ext)
+    if not handler:
+      raise ExtractError(f"Unsupported file type: {ext}")
+    yield from handler(file_path)
 
-    # 2️⃣ OCR 提取
-    for page_num in range(len(doc)):
-      page = doc.load_page(page_num)
-      page_text = ""
+  def collect(self, chunks, max_text_length=None, stop=None):
+    """
+    將文字片段合併成 {'status', 'text'} 結果；超過 max_text_length 字時截斷、加上 truncated 並停止讀取
+    stop: threading.Event，每讀完一個片段檢查一次，已設定時放棄其餘片段（結果不會被使用）；
+    片段可能涵蓋多頁（如 PDF 的串流清理），處理期間也放在 member_stop，由 iter_pdf_pages 逐頁檢查
+    """
+    parts = []
+    length = 0
+    previous_stop = getattr(self.member_stop, 'event', None)
+    if stop is not None:
+      self.member_stop.event = stop
+    try:
+      for chunk in chunks:
+        if stop is not None and stop.is_set():
+          return {'status': 'fail', 'error': 'cancelled'}
+        if max_text_length and length + len(chunk) > max_text_length:
+          parts.append(chunk[:max_text_length - length])
+          return {'status': 'ok', 'text': ''.join(parts), 'truncated': True}
+        parts.append(chunk)
+        length += len(chunk)
+    except ExtractError as e:
+      return {'status': 'fail', 'error': str(e)}
+    finally:
+      chunks.close()  # 讓處理方法立即關閉檔案、取消尚未開始的 OCR
+      self.member_stop.event = previous_stop
+    return {'status': 'ok', 'text': ''.join(parts)}
+
+  def member_stopped(self):
+    stop = getattr(self.member_stop, 'event', None)
+    return stop is not None and stop.is_set()
+
+  def iter_clean_lines(self, lines):
+    """
+    clean_text 逐行處理，逐行來源每 CLEAN_BATCH_LINES 行清理一次，結果與整份一次清理相同
+    """
+    batch = []
+    for line in lines:
+      batch.append(line)
+      if len(batch) >= self.CLEAN_BATCH_LINES:
+        text = self.clean_text("\n".join(batch))
+        batch = []
+        if text:
+          yield text
+    if batch:
+      text = self.clean_text("\n".join(batch))
+      if text:
+        yield text
+
+  def get_ocr(self):
+    """
+    取得常駐的 OCR 引擎，整個 extractor 生命週期內重複使用
+    """
+    with self.ocr_lock:
+      if self.ocr is None:
+        self.ocr = create_ocr_backend(self.ocr_backend, self.lang, self.ocr_script_detect)
+    return self.ocr
 
-      # 1️⃣ 嘗試直接取文字
-      try:
-        page_text = page.get_text("text")
-        if page_text.strip():
-          all_text += f"\n{page_text}"
-      except Exception as e:
-        print( f"⚠ fitz get_text error page {page_num+1}: {e}")
-      # 2️⃣ OCR fallback
-      if not page_text.strip():
+  @classmethod
+  def available_formats(cls):
+    """
+    回傳目前環境已安裝相依套件、實際可處理的副檔名
+    """
+    return sorted(ext for ext, (_, requires) in cls.HANDLERS.items() if all(map(_is_installed, requires)))
+
+  def get_handler(self, ext):
+    entry = self.HANDLERS.get(ext)
+    return getattr(self, entry[0]) if entry else None
+
+  @staticmethod
+  def source_name(file_path):
+    """
+    處理方法的輸入可以是檔案路徑或記憶體中的檔案（ZIP 成員，io.BytesIO 且 name 為成員路徑）
+    """
+    return file_path if isinstance(file_path, str) else getattr(file_path, 'name', '')
+
+  def iter_pdf(self, file_path):
+    """
+    逐頁擷取 PDF：先嘗試直接取文字，沒有文字的頁面再 OCR；整份文件以 iter_clean_ocr_text 串流清理
+    """
+    import fitz  # PyMuPDF
+    try:
+      if isinstance(file_path, str):
+        doc = fitz.open(file_path)
+      else:
+        doc = fitz.open(stream=file_path.getvalue(), filetype='pdf')
+    except Exception as e:
+      raise ExtractError(f'Cannot open PDF: {e}') from e
+
+    pages = self.iter_pdf_pages(doc, file_path)
+    spent = None
+    if self.timings is not None:
+      # 串流清理與逐頁擷取交錯進行，清理耗時 = 清理產生器的總耗時 - 其中等待頁面文字的時間
+      spent = {'pages': 0.0, 'cleaned': 0.0}
+      pages = self.iter_timed(pages, spent, 'pages')
+    cleaned = file_fulltext_cleaner.iter_clean_ocr_text(pages, self.max_text_length)
+    if spent is not None:
+      cleaned = self.iter_timed(cleaned, spent, 'cleaned')
+    try:
+      found = False
+      for text in cleaned:
+        found = True
+        yield text
+      if not found:
+        raise ExtractError('PDF無法提取文字')
+    finally:
+      cleaned.close()
+      doc.close()
+      if spent is not None and self.timings is not None:
+        with self.timing_lock:
+          seconds = self.timings['seconds']
+          seconds['clean'] = seconds.get('clean', 0.0) + max(spent['cleaned'] - spent['pages'], 0.0)
+
+  def iter_pdf_pages(self, doc, file_path):
+    """
+    依頁序產生每頁的原始文字，略過沒有文字的頁面
+    pdf_ocr_workers > 1 時掃描頁送到 process pool 平行 OCR：同時 OCR 的頁數不超過 worker 數，
+    排隊等待輸出的頁面不超過 worker 數的兩倍；停止讀取時取消尚未開始的頁面
+    worker process 以路徑重新開啟 PDF，記憶體中的 PDF（ZIP 成員）在目前 process 逐頁處理
+    """
+    parallel = self.pdf_ocr_workers > 1 and isinstance(file_path, str)
+    pending = deque()  # 依頁序排隊的 (頁碼, 文字或 OCR future)
+
+    def head_ready():
+      head = pending[0][1]
+      if not isinstance(head, Future) or head.done():
+        return True
+      running = sum(isinstance(text, Future) for _, text in pending)
+      return running >= self.pdf_ocr_workers or len(pending) >= self.pdf_ocr_workers * 2
+
+    page_count = len(doc)
+    if self.max_pages and page_count > self.max_pages:
+      print(f"⚠ PDF 共 {page_count} 頁，只處理前 {self.max_pages} 頁")
+      self.note_limit('pages')
+      page_count = self.max_pages
+    try:
+      for page_num in range(page_count):
+        if self.member_stopped():
+          return
+        page = doc.load_page(page_num)
+        page_text = ""
+
+        # 1️⃣ 嘗試直接取文字
+        started = self.timer()
         try:
-          pix = page.get_pixmap(matrix=fitz.Matrix(3, 3))  # 放大 3倍
-          img = Image.open(io.BytesIO(pix.tobytes("png")))
-          ocr_text = pytesseract.image_to_string(img, lang=self.lang, config='--psm 6')
-          if ocr_text.strip():
-            all_text += f"\n{ocr_text}"
+          page_text = page.get_text("text")
         except Exception as e:
-          print(f"⚠ OCR error page {page_num+1}: {e}")
-
-    # 回傳結果
-    all_text = all_text.strip()
-    if all_text:
-      return {'status': 'ok', 'text': self.clean_ocr_text(all_text)}
-    else:
-      return {'status': 'fail', 'error': 'PDF無法提取文字'}
+          print( f"⚠ fitz get_text error page {page_num+1}: {e}")
+        self.add_timing('pdf_text', started, 'pages')
+        # 2️⃣ OCR fallback
+        if not page_text.strip():
+          self.count_timing('ocr_pages')
+          if parallel:
+            page_text = self.submit_pdf_page(file_path, page_num)
+          else:
+            try:
+              page_text = self.ocr_pdf_page(page)
+            except Exception as e:
+              print(f"⚠ OCR error page {page_num+1}: {e}")
+        pending.append((page_num, page_text))
+
+        while pending and head_ready():
+          page_text = self.pdf_page_result(*pending.popleft())
+          if page_text.strip():
+            yield page_text
+
+      while pending:
+        page_text = self.pdf_page_result(*pending.popleft())
+        if page_text.strip():
+          yield page_text
+    finally:
+      for _, page_text in pending:
+        if isinstance(page_text, Future):
+          page_text.cancel()
 
+  def plan_pdf_page(self, page):
+    """
+    OCR 前的快速檢查，回傳渲染倍率；空白頁回傳 None
+    - 以 72 DPI 灰階預覽中偏離背景（中位數）的像素數判斷空白頁
+    - 內嵌圖片覆蓋大半頁面時視為掃描頁，依覆蓋面積最大的圖片（掃描影像本身，而非 logo、印章等小圖）的實際 DPI 決定倍率，
+      放大超過原始解析度不會增加資訊
+    - 依頁面大小限制單頁總像素
+    """
+    import numpy as np
+    import fitz  # PyMuPDF
+    if not self.adaptive_ocr:
+      return self.FIXED_OCR_SCALE
+
+    probe = page.get_pixmap(colorspace=fitz.csGRAY, alpha=False)
+    pixels = np.frombuffer(probe.samples, dtype=np.uint8)
+    if pixels.size == 0:
+      return None
+    background = int(np.median(pixels))
+    ink = np.count_nonzero(np.abs(pixels.astype(np.int16) - background) > self.BLANK_INK_DELTA)
+    if ink < self.BLANK_PAGE_INK_PIXELS:
+      return None
+
+    rect = page.rect
+    page_area = max(rect.width * rect.height, 1)
+    covered = 0
+    largest = 0
+    image_dpi = 0
+    for info in page.get_image_info():
+      bbox = fitz.Rect(info['bbox'])
+      visible = bbox & rect
+      if visible.is_empty:
+        continue
+      area = visible.width * visible.height
+      covered += area
+      bbox_inches = max(bbox.width, bbox.height) / 72
+      if area > largest and bbox_inches > 0:
+        largest = area
+        image_dpi = max(info['width'], info['height']) / bbox_inches
+
+    dpi = self.OCR_MAX_DPI
+    if image_dpi and covered / page_area >= self.SCANNED_PAGE_COVERAGE:
+      dpi = min(max(image_dpi, self.OCR_MIN_DPI), self.OCR_MAX_DPI)
+    return min(dpi / 72, math.sqrt(self.OCR_MAX_PIXELS / page_area))
+
+  def ocr_pdf_page(self, page):
+    import numpy as np
+    import fitz  # PyMuPDF
+    started = self.timer()
+    scale = self.plan_pdf_page(page)
+    if scale is None:
+      self.add_timing('pdf_render', started)
+      return ''  # 空白頁不 OCR
+    # 直接渲染成灰階並包成陣列，省去 PNG 編碼再解碼
+    pix = page.get_pixmap(matrix=fitz.Matrix(scale, scale), colorspace=fitz.csGRAY, alpha=False)
+    img = np.frombuffer(pix.samples_mv, dtype=np.uint8).reshape(pix.height, pix.stride)[:, :pix.width]
+    self.add_timing('pdf_render', started)
+    return self.run_ocr(img, scale=1)
+
+  def run_ocr(self, gray, scale):
+    # 前處理並 OCR，兩個階段分別計時
+    started = self.timer()
+    img = self.preprocess_image(gray, scale)
+    self.add_timing('preprocess', started)
+    started = self.timer()
+    text = self.get_ocr().image_to_string(img)
+    self.add_timing('ocr', started)
+    return text
+
+  def submit_pdf_page(self, file_path, page_num):
+    """
+    將一頁送到 OCR process pool，pool 在第一次使用時建立並跨檔案重複使用
+    """
+    if self.page_pool is None:
+      self.page_pool = ProcessPoolExecutor(
+        max_workers=self.pdf_ocr_workers,
+        initializer=_init_page_worker,
+        initargs=(self.lang, self.ocr_backend, self.adaptive_ocr, self.ocr_script_detect)
+      )
+    return self.page_pool.submit(_ocr_pdf_page, file_path, page_num)
+
+  def pdf_page_result(self, page_num, page_text):
+    if not isinstance(page_text, Future):
+      return page_text
+    started = self.timer()
+    try:
+      return page_text.result()
+    except Exception as e:
+      print(f"⚠ OCR error page {page_num+1}: {e}")
+      if isinstance(e, BrokenProcessPool) and self.page_pool:
+        # worker 異常結束，pool 已無法使用，下一頁重新建立
+        self.page_pool.shutdown(cancel_futures=True)
+        self.page_pool = None
+      return ''
+    finally:
+      # 平行 OCR 在 worker process 內渲染與辨識，這裡只記錄等待結果的時間
+      self.add_timing('ocr_wait', started)
 
-  def extract_from_docx(self, file_path):
+  def iter_docx(self, file_path):
+    from docx import Document
     try:
       doc = Document(file_path)
-      all_text = ""
 
       # 1️⃣ 段落文字
-      for p in doc.paragraphs:
-        if p.text.strip():
-          all_text += p.text.strip() + "\n"
+      yield from self.iter_clean_lines(p.text.strip() for p in doc.paragraphs if p.text.strip())
 
       # 2️⃣ 表格文字
       for table in doc.tables:
-        for row in table.rows:
-          row_text = "\n".join(cell.text.strip() for cell in row.cells if cell.text.strip())
-          if row_text:
-            all_text += row_text + "\n"
+        rows = ("\n".join(cell.text.strip() for cell in row.cells if cell.text.strip()) for row in table.rows)
+        yield from self.iter_clean_lines(row_text for row_text in rows if row_text)
 
       # 3️⃣ 內嵌圖片 OCR
       for rel in doc.part._rels:
         rel_obj = doc.part._rels[rel]
         if "image" in rel_obj.target_ref:
-          image_data = rel_obj.target_part.blob
-          img = Image.open(io.BytesIO(image_data))
-          ocr_result = self.extract_from_image(img)
+          ocr_result = self.extract_from_image(rel_obj.target_part.blob)
           if ocr_result['status'] == 'ok' and ocr_result['text'].strip():
-            all_text += "\n" + ocr_result['text'].strip() + "\n"
-
-      # 4️⃣ 清理文字
-      return {'status': 'ok', 'text': self.clean_text(all_text.strip())}
+            text = self.clean_text(ocr_result['text'].strip())
+            if text:
+              yield text
 
     except Exception as e:
-      return {'status': 'fail', 'error': f'DOCX extract error: {e}'}
+      raise ExtractError(f'DOCX extract error: {e}') from e
 
+  def iter_excel(self, file_path):
+    """
+    單次串流讀取：openpyxl read-only 模式逐列讀出儲存格文字，記憶體用量不隨工作表大小增加；
+    內嵌圖片直接從 xlsx 套件的 xl/media 取出 OCR，不必再以完整模式載入活頁簿
+    舊版 .xls 不是 zip 套件，改由 pandas (xlrd) 讀取文字
+    """
+    if not zipfile.is_zipfile(file_path):
+      yield from self.iter_xls(file_path)
+      return
 
-  def extract_from_excel(self, file_path):
+    import openpyxl
     try:
-      # 1️⃣ 讀取所有 sheet
-      df_list = pd.read_excel(file_path, sheet_name=None, dtype=str)
-      all_text = ''
-
-      for sheet, df in df_list.items():
-        # 將表格文字加入
-        all_text += df.fillna('').to_string(index=False) + "\n"
+      # 1️⃣ 逐列讀取所有 sheet
+      wb = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+      try:
+        for ws in wb.worksheets:
+          rows = ([str(value) for value in row if value is not None and value != ''] for row in ws.iter_rows(values_only=True))
+          yield from self.iter_clean_lines(' '.join(cells) for cells in rows if cells)
+      finally:
+        wb.close()
 
       # 2️⃣ 處理內嵌圖片
-      wb = openpyxl.load_workbook(file_path)
-      for sheet_name in wb.sheetnames:
-        ws = wb[sheet_name]
-        for image in ws._images:  # openpyxl 內嵌圖片物件
-          img = image._data() if hasattr(image, "_data") else image.ref
-          # image 是 PIL.Image 可以直接 OCR，如果不是則用 BytesIO 轉
-          if isinstance(img, bytes):
-            img = Image.open(io.BytesIO(img))
-          ocr_result = self.extract_from_image(img)
+      if hasattr(file_path, 'seek'):
+        file_path.seek(0)  # 記憶體中的檔案已被 openpyxl 讀到結尾
+      with zipfile.ZipFile(file_path) as package:
+        for info in package.infolist():
+          ext = os.path.splitext(info.filename)[1].lower()
+          is_image = self.HANDLERS.get(ext, (None,))[0] == 'iter_image'
+          if not (info.filename.startswith('xl/media/') and is_image):
+            continue  # 略過 EMF/WMF 等無法 OCR 的格式
+          ocr_result = self.extract_from_image(package.read(info))
           if ocr_result['status'] == 'ok' and ocr_result['text'].strip():
-            all_text += "\n" + ocr_result['text'].strip() + "\n"
-
-      # 3️⃣ 清理文字
-      return {'status': 'ok', 'text': self.clean_text(all_text.strip())}
+            text = self.clean_text(ocr_result['text'].strip())
+            if text:
+              yield text
 
     except Exception as e:
-      return {'status': 'fail', 'error': f'Excel parse error: {e}'}
+      raise ExtractError(f'Excel parse error: {e}') from e
 
+  def iter_xls(self, file_path):
+    import pandas as pd
+    try:
+      if hasattr(file_path, 'seek'):
+        file_path.seek(0)
+      df_list = pd.read_excel(file_path, sheet_name=None, dtype=str)
+      for sheet, df in df_list.items():
+        text = self.clean_text(df.fillna('').to_string(index=False))
+        if text:
+          yield text
+    except Exception as e:
+      raise ExtractError(f'Excel parse error: {e}') from e
 
-  def extract_from_pptx(self, file_path):
+  def iter_pptx(self, file_path):
+    from pptx import Presentation
     try:
       prs = Presentation(file_path)
-      all_text = ''
 
+      # 每張投影片清理一次
       for slide in prs.slides:
+        lines = []
         for shape in slide.shapes:
           # 文字
           if hasattr(shape, "text") and shape.text.strip():
-            all_text += shape.text.strip() + "\n"
+            lines.append(shape.text.strip())
 
           # 圖片
           if shape.shape_type == 13:  # MSO_SHAPE_TYPE.PICTURE == 13
-            image = shape.image
-            img =Image.open(io.BytesIO(image.blob))
-            ocr_result = self.extract_from_image(img)
+            ocr_result = self.extract_from_image(shape.image.blob)
             if ocr_result.get('status') == 'ok' and ocr_result.get('text').strip():
-              all_text += ocr_result['text'].strip() + "\n"
+              lines.append(ocr_result['text'].strip())
 
-      return {'status': 'ok', 'text': self.clean_text(all_text.strip())}
+        text = self.clean_text("\n".join(lines))
+        if text:
+          yield text
 
     except Exception as e:
-      return {'status': 'fail', 'error': f'PowerPoint parse error: {e}'}
+      raise ExtractError(f'PowerPoint parse error: {e}') from e
+
+  @staticmethod
+  def load_gray(source):
+    """
+    將 OCR 輸入讀成灰階 uint8 陣列
+    source: 檔案路徑、bytes、file-like、numpy 陣列或 PIL.Image
+    """
+    import numpy as np
+    import cv2 # opencv-python
+    from PIL import Image
+    if isinstance(source, np.ndarray):
+      if source.ndim == 3:
+        return cv2.cvtColor(source, cv2.COLOR_RGBA2GRAY if source.shape[2] == 4 else cv2.COLOR_RGB2GRAY)
+      return source
+    if isinstance(source, Image.Image):
+      return np.asarray(source.convert('L'))
+
+    if isinstance(source, str):
+      # np.fromfile 可讀取中文路徑，cv2.imread 在 Windows 上不行
+      buffer = np.fromfile(source, dtype=np.uint8)
+    elif hasattr(source, 'read'):
+      buffer = np.frombuffer(source.read(), dtype=np.uint8)
+    else:
+      buffer = np.frombuffer(source, dtype=np.uint8)
+    img = cv2.imdecode(buffer, cv2.IMREAD_GRAYSCALE)
+    if img is None:
+      # OpenCV 無法解碼的格式交給 PIL
+      img = np.asarray(Image.open(io.BytesIO(buffer)).convert('L'))
+    return img
 
   @staticmethod
-  def preprocess_image(file_path):
-    img = Image.open(file_path)
-    img = img.convert('L') # 灰階
+  def preprocess_image(source, scale=2):
+    """
+    OCR 前處理：灰階 → 放大 → 提升對比 → 銳化 → Otsu 二值化
+    全程以 OpenCV 在同一個 uint8 陣列上原地運算，不在 PIL / NumPy 之間來回複製
+    source: 見 load_gray；scale: 放大倍率，PDF 頁面已依 DPI 渲染時傳 1
+    """
+    import numpy as np
+    import cv2 # opencv-python
+    img = FileFullTextExtractor.load_gray(source)
 
     # 放大
-    width, height = img.size
-    img = img.resize((width*2, height*2), Image.Resampling.LANCZOS)
+    if scale != 1:
+      img = cv2.resize(img, None, fx=scale, fy=scale, interpolation=cv2.INTER_LANCZOS4)
 
-    # 提升對比
-    enhancer = ImageEnhance.Contrast(img)
-    img = enhancer.enhance(2.0)
+    # 提升對比，等同 PIL ImageEnhance.Contrast(2.0)：以平均灰階為中心放大 2 倍
+    mean = int(cv2.mean(img)[0] + 0.5)
+    if scale != 1:
+      cv2.addWeighted(img, 2.0, img, 0, -mean, dst=img)
+    else:
+      img = cv2.addWeighted(img, 2.0, img, 0, -mean)  # 不改動呼叫端傳入的陣列
 
-    # 銳化
-    img = img.filter(ImageFilter.SHARPEN)
+    # 銳化，等同 PIL ImageFilter.SHARPEN
+    cv2.filter2D(img, -1, np.array(FileFullTextExtractor.SHARPEN_KERNEL, dtype=np.float32) / 16, dst=img)
 
-    # 轉成 numpy array 做二值化
-    img_cv = np.array(img)
-    _, img_bin = cv2.threshold(img_cv, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
-    return Image.fromarray(img_bin)
+    # 二值化
+    cv2.threshold(img, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU, dst=img)
+    return img
 
-  def extract_from_image(self, file_input):
+  def iter_image(self, file_input, scale=2):
     """
-    file_input: 可以是檔案路徑(str) 或 PIL.Image.Image
+    file_input: 檔案路徑(str)、圖片 bytes、file-like、numpy 陣列或 PIL.Image.Image，一律經過 preprocess_image
+    文件中重複出現的 logo、印章、信頭只 OCR 一次：結果依圖片雜湊存入快取，與略過清單相同的圖片直接略過
     """
+    self.check_image_size(file_input)
     try:
-      # 如果是路徑就先 preprocess
-      if isinstance(file_input, str):
-          img = self.preprocess_image(file_input)
-      else:  # 假設已經是 PIL.Image
-          img = file_input
-
-      # 嘗試多種 PSM
-      text = pytesseract.image_to_string(img, lang=self.lang, config='--psm 6')
-      return {'status': 'ok', 'text': self.clean_ocr_text(text)}
+      gray = self.load_gray(file_input)
+      image_key = self.image_key(gray) if self.image_cache != 'off' or self.image_denylist_dir else None
+      if image_key and image_key in self.get_image_denylist():
+        self.count_image('denied')
+        return
+
+      cache_key = None
+      if self.image_cache != 'off':
+        cache_key = '|'.join(['image', image_key, self.VERSION, self.ocr_key, str(scale)])
+        cached = self.cache.get(cache_key)
+        if cached:
+          self.count_image('cached')
+          text = cached['result']['text']
+          if text:
+            yield text
+          return
+
+      started = time.perf_counter()
+      text = self.clean_ocr_text(self.run_ocr(gray, scale))
+      self.count_image('ocr')
+      if cache_key:
+        self.cache.put(cache_key, {'text': text}, time.perf_counter() - started)
     except Exception as e:
-      return {'status': 'fail', 'error': f'OCR error in image: {e}'}
+      raise ExtractError(f'OCR error in image: {e}') from e
+    if text:
+      yield text
 
-  def extract_from_txt(self, file_path):
+  def check_image_size(self, source):
+    """
+    解碼前以 PIL 讀取圖檔標頭檢查像素數，超過 max_image_pixels 的圖片（如數億像素的 TIFF 圖面）不解碼
+    PIL 無法辨識的格式交給 load_gray 處理
+    """
+    from PIL import Image
+    if not self.max_image_pixels:
+      return
+    if isinstance(source, (bytes, bytearray, memoryview)):
+      source = io.BytesIO(source)
+    elif not isinstance(source, str) and not hasattr(source, 'read'):
+      return  # 已解碼的陣列或 PIL.Image
+    position = source.tell() if hasattr(source, 'tell') else None
     try:
-      with open(file_path, encoding='utf-8') as f:
-        text = f.read()
-      return {'status': 'ok', 'text': self.clean_text(text)}
+      with Image.open(source) as img:
+        width, height = img.size
+    except Image.DecompressionBombError as e:
+      raise ExtractError(f'Image too large: {e}') from e
+    except Exception:
+      return
+    finally:
+      if position is not None:
+        source.seek(position)
+    if width * height > self.max_image_pixels:
+      raise ExtractError(f'Image too large: {width}x{height} pixels')
+
+  def image_key(self, gray):
+    """
+    圖片雜湊，含原始尺寸
+    - exact: 灰階像素的 SHA-1，內容相同但檔案格式或中繼資料不同的圖片也會命中
+    - perceptual: 32x32 dHash，另可容忍輕度重新壓縮（如 JPEG 品質 80 以上）造成的差異。
+      文字圖片只差幾個字時，16x16 這類常見尺寸就會雜湊相同，因此採較細的格點；尺寸不同一律視為不同圖片
+    """
+    import numpy as np
+    import cv2 # opencv-python
+    height, width = gray.shape[:2]
+    if self.image_cache == 'perceptual':
+      small = cv2.resize(gray, (33, 32), interpolation=cv2.INTER_AREA)
+      bits = np.packbits(small[:, 1:] > small[:, :-1])
+      return f'dhash:{width}x{height}:{bits.tobytes().hex()}'
+    return f'sha1:{width}x{height}:{hashlib.sha1(np.ascontiguousarray(gray)).hexdigest()}'
+
+  def get_image_denylist(self):
+    with self.image_lock:
+      if self.image_denylist is None:
+        self.image_denylist = set()
+        if self.image_denylist_dir and os.path.isdir(self.image_denylist_dir):
+          for name in sorted(os.listdir(self.image_denylist_dir)):
+            path = os.path.join(self.image_denylist_dir, name)
+            if self.HANDLERS.get(os.path.splitext(name)[1].lower(), (None,))[0] != 'iter_image':
+              continue
+            try:
+              self.image_denylist.add(self.image_key(self.load_gray(path)))
+            except Exception as e:
+              print(f"⚠ 無法載入略過清單圖片 {name}: {e}")
+      return self.image_denylist
+
+  def get_image_denylist_digest(self):
+    """
+    略過清單的內容不同，文件中被略過的圖片就不同；未設定略過清單時為空字串
+    """
+    if self.image_denylist_digest is None:
+      denylist = self.get_image_denylist() if self.image_denylist_dir else ()
+      self.image_denylist_digest = hashlib.sha1('\n'.join(sorted(denylist)).encode()).hexdigest()[:12] if denylist else ''
+    return self.image_denylist_digest
+
+  def count_image(self, name):
+    with self.image_lock:
+      self.image_stats[name] += 1
+
+  def extract_from_image(self, file_input, scale=2):
+    # 文件內嵌圖片使用，回傳 {'status', 'text'}
+    return self.collect(self.iter_image(file_input, scale))
+
+  def iter_txt(self, file_path):
+    try:
+      if isinstance(file_path, str):
+        f = open(file_path, encoding='utf-8')
+      else:
+        f = io.TextIOWrapper(file_path, encoding='utf-8')
+      with f:
+        yield from self.iter_clean_lines(f)
     except Exception as e:
-      return {'status': 'fail', 'error': f'TXT parse error: {e}'}
+      raise ExtractError(f'TXT parse error: {e}') from e
 
-  def extract_from_csv(self, file_path):
+  def iter_csv(self, file_path):
+    """
+    分批讀取，只有第一批輸出欄名；欄位型別由 pandas 逐批推斷
+    """
+    import pandas as pd
     try:
-      text = pd.read_csv(file_path).to_string(index=False)
-      return {'status': 'ok', 'text': self.clean_text(text)}
+      for index, df in enumerate(pd.read_csv(file_path, chunksize=self.CSV_CHUNK_ROWS)):
+        text = self.clean_text(df.to_string(index=False, header=index == 0))
+        if text:
+          yield text
     except Exception as e:
-      return {'status': 'fail', 'error': f'CSV parse error: {e}'}
+      raise ExtractError(f'CSV parse error: {e}') from e
 
-  def extract_from_json(self, file_path):
+  def iter_json(self, file_path):
     try:
-      with open(file_path, encoding='utf-8') as f:
-        text = json.dumps(json.load(f), indent=2, ensure_ascii=False)
-      return {'status': 'ok', 'text': self.clean_text(text)}
+      if isinstance(file_path, str):
+        with open(file_path, encoding='utf-8') as f:
+          text = json.dumps(json.load(f), indent=2, ensure_ascii=False)
+      else:
+        text = json.dumps(json.load(file_path), indent=2, ensure_ascii=False)
     except Exception as e:
-      return {'status': 'fail', 'error': f'JSON parse error: {e}'}
+      raise ExtractError(f'JSON parse error: {e}') from e
+    text = self.clean_text(text)
+    if text:
+      yield text
 
-  def extract_from_dwg_or_dxf(self, file_path):
+  def iter_dwg_or_dxf(self, file_path):
     """
     支援 DXF，自動檢測 DWG/DXF：
     - DXF: 提取文字
     - DWG: 提示需轉 DXF
     """
-    try:
-      ext = os.path.splitext(file_path)[1].lower()
+    ext = os.path.splitext(self.source_name(file_path))[1].lower()
+    if ext == '.dwg':
+      raise ExtractError(f'DWG file detected: {self.source_name(file_path)}. Please convert to DXF first.')
+    elif ext != '.dxf':
+      raise ExtractError(f'Unsupported CAD file type: {ext}')
 
-      if ext == '.dxf':
+    import ezdxf
+    try:
+      if isinstance(file_path, str):
         doc = ezdxf.readfile(file_path)
-        msp = doc.modelspace()
-        texts = [e.dxf.text for e in msp if e.dxftype() in ['TEXT', 'MTEXT']]
-        return {'status': 'ok', 'text': self.clean_text('\n'.join(texts))}
-
-      elif ext == '.dwg':
-        return {'status': 'fail', 'error': f'DWG file detected: {file_path}. Please convert to DXF first.'}
-
       else:
-        return {'status': 'fail', 'error': f'Unsupported CAD file type: {ext}'}
-
+        # 二進位串流由 recover 依 $DWGCODEPAGE 判斷編碼
+        from ezdxf import recover
+        doc, _ = recover.read(file_path)
+      msp = doc.modelspace()
+      yield from self.iter_clean_lines(self.iter_dxf_texts(msp))
     except Exception as e:
-      return {'status': 'fail', 'error': f'CAD parse error: {e}'}
-
-  def extract_from_zip(self, file_path):
+      raise ExtractError(f'CAD parse error: {e}') from e
+
+  def iter_dxf_texts(self, msp):
+    for count, entity in enumerate(msp):
+      if self.max_entities and count >= self.max_entities:
+        print(f"⚠ 圖元超過 {self.max_entities} 個，略過其餘圖元")
+        self.note_limit('entities')
+        return
+      if entity.dxftype() in ['TEXT', 'MTEXT']:
+        yield entity.dxf.text
+
+  def iter_zip(self, file_path, depth=0, budget=None):
+    """
+    ZIP 成員直接讀進記憶體 (io.BytesIO) 交給對應的處理方法，不在工作目錄寫暫存檔
+    - 成員以 thread pool 平行處理，同時處理中的成員不超過 zip_workers 個，依成員順序輸出
+    - 巢狀 ZIP 在讀取成員的 thread 內遞迴展開，最多 zip_max_depth 層
+    - budget: 所有巢狀層共用的解壓縮總量與成員數額度，用完即停止讀取其餘成員，zip bomb 不會卡住 worker
+    - 無法處理的成員（含巢狀 ZIP）略過，不影響其他成員
+    - 結束讀取（含達到文字上限而提前關閉）時不等待處理中的成員，成員每處理完一頁檢查 budget['stop'] 後自行停止
+    """
+    if budget is None:
+      budget = {'bytes': self.zip_max_bytes, 'members': self.zip_max_members, 'exceeded': False, 'stop': threading.Event()}
     try:
-      result_text = ''
-      with zipfile.ZipFile(file_path, 'r') as zip_ref:
-        for file_name in zip_ref.namelist():
-          # result_text += f'--- ZIP ENTRY: {file_name} ---\n'
-          ext = os.path.splitext(file_name)[1].lower()
-          handler = self.get_handler(ext)
-          if handler:
-            # 讀取檔案內容到暫存檔
-            with zip_ref.open(file_name) as f:
-              tmp_path = f'./temp_{os.path.basename(file_name)}'
-              with open(tmp_path, 'wb') as tmp_f:
-                tmp_f.write(f.read())
-            # 呼叫對應 extract 函式
-            extracted = handler(tmp_path)
-            if extracted['status'] == 'ok':
-              result_text += extracted['text'] + '\n'
-            # else:
-            #   result_text += f"[Failed to extract {file_name}]: {extracted.get('error', '')}\n"
-            os.remove(tmp_path)
-          # else:
-            result_text += f"[No handler for {file_name}]\n"
-      return {'status': 'ok', 'text': self.clean_text(result_text)}
+      zip_ref = zipfile.ZipFile(file_path, 'r')
     except Exception as e:
-      return {'status': 'fail', 'error': f'ZIP parse error: {e}'}
+      raise ExtractError(f'ZIP parse error: {e}') from e
 
-  def clean_text(self, text):
-    # 移除頁面標題及多餘符號，並去掉所有空白與換行
-    lines = text.splitlines()
-    cleaned_lines = []
-    for line in lines:
-      line = line.strip()
-      if not line:
-        continue
-
-      # 移除頁面標題
-      if re.match(r'^--- Page \d+ - Rotate \d+° ---$', line):
-        continue
-      if re.match(r'^--- Sheet: Table \d+ ---$', line):
+    pool = ThreadPoolExecutor(max_workers=self.zip_workers)
+    pending = deque()
+    try:
+      for ext, member in self.read_zip_members(zip_ref, depth, budget):
+        if ext == '.zip':
+          while pending:
+            yield from self.zip_member_text(pending.popleft())
+          try:
+            yield from self.iter_zip(member, depth + 1, budget)
+          except ExtractError:
+            pass
+          continue
+
+        pending.append(pool.submit(self.collect, self.get_handler(ext)(member), stop=budget['stop']))
+        while pending and (pending[0].done() or len(pending) >= self.zip_workers):
+          yield from self.zip_member_text(pending.popleft())
+
+      while pending:
+        yield from self.zip_member_text(pending.popleft())
+    except ExtractError:
+      raise
+    except Exception as e:
+      raise ExtractError(f'ZIP parse error: {e}') from e
+    finally:
+      if depth == 0:
+        budget['stop'].set()  # 最外層結束時其餘成員的結果都不再需要；巢狀層結束時外層的成員仍在處理
+      pool.shutdown(wait=False, cancel_futures=True)
+      zip_ref.close()
+
+  def zip_member_text(self, future):
+    extracted = future.result()
+    if extracted['status'] == 'ok':
+      text = self.clean_text(extracted['text'] + '\n')
+      if text:
+        yield text
+
+  def read_zip_members(self, zip_ref, depth, budget):
+    """
+    依序讀出有對應處理方法的 ZIP 成員，產生 (副檔名, io.BytesIO)，BytesIO.name 為成員路徑
+    超過層數的巢狀 ZIP 與無法讀取（如加密）的成員略過；宣告的大小可能造假，實際讀取也只讀到剩餘額度為止
+    """
+    for info in zip_ref.infolist():
+      if budget['exceeded']:
+        return
+      ext = os.path.splitext(info.filename)[1].lower()
+      if info.is_dir() or not self.get_handler(ext):
         continue
-      if re.match(r'^--- Page \d+ Text ---$', line):
+      if ext == '.zip' and depth >= self.zip_max_depth:
+        print(f"⚠ 略過超過 {self.zip_max_depth} 層的巢狀 ZIP: {info.filename}")
         continue
 
-      # 移除只包含符號或亂碼的行
-      if re.match(r'^[\W\dA-Za-z]{0,5}$', line):
-        continue
-      # 移除超長亂碼行
-      if len(re.sub(r'\s', '', line)) > 100 and re.match(r'^[\W\da-zA-Z]+$', line):
-        continue
-      # 移除所有空白
-      line = re.sub(r'\s+', '', line)
-      # 去掉多餘的符號
-      line = re.sub(r'[^0-9\u4e00-\u9fffA-Za-z/-]', '', line)
-      cleaned_lines.append(line)
+      if budget['members'] <= 0:
+        print(f"⚠ ZIP 成員數超過上限 {self.zip_max_members}，略過其餘成員")
+        budget['exceeded'] = True
+        return
+      data = b''
+      if info.file_size <= budget['bytes']:
+        try:
+          with zip_ref.open(info) as f:
+            data = f.read(budget['bytes'] + 1)
+        except Exception as e:
+          print(f"⚠ 無法讀取 ZIP 成員 {info.filename}: {e}")
+          continue
+      if info.file_size > budget['bytes'] or len(data) > budget['bytes']:
+        print(f"⚠ ZIP 解壓縮總量超過上限 {self.zip_max_bytes // 1024 // 1024} MB，略過其餘成員")
+        budget['exceeded'] = True
+        return
+
+      budget['members'] -= 1
+      budget['bytes'] -= len(data)
+      member = io.BytesIO(data)
+      member.name = info.filename
+      yield ext, member
 
-    return ''.join(cleaned_lines)
+  def clean_text(self, text):
+    # 移除頁面標題及多餘符號，並去掉所有空白與換行，見 file_fulltext_cleaner
+    started = self.timer()
+    text = file_fulltext_cleaner.clean_text(text)
+    self.add_timing('clean', started)
+    return text
 
   def clean_ocr_text(self, text, min_len=6):
     """
     將長串 OCR 文本斷句、過濾噪音，輸出乾淨文字
-    min_len: 最短字數，過濾太短或無意義片段
+    min_len: 保留參數以相容舊呼叫端；舊版的短句過濾結果並未被使用，輸出不受此值影響
     """
-    if not text:
-      return ''
-
-    # 移除連續空白
-    text = re.sub(r' +', '', text)
-
-    # 用 SnowNLP 自動斷句
-    s = SnowNLP(text)
-    sentences = s.sentences
-
-    # 過濾短句、全為符號或單字的片段
-    clean_sentences = []
-    for sent in sentences:
-      sent = sent.strip()
-      if len(sent) >= min_len and not re.fullmatch(r'[\d\W_]+', sent):
-        clean_sentences.append(sent)
-    # 移除過長的連續數字或英文編號一
-    clean_sentences = list(map(lambda s: re.sub(r'[A-Za-z0-9一\/-]{20,}', '', s), sentences))
-
-    # 合併成單一文字
-    clean_text = self.clean_text(''.join(clean_sentences))
-    return clean_text if clean_text else text.strip()
+    started = self.timer()
+    text = file_fulltext_cleaner.clean_ocr_text(text)
+    self.add_timing('clean', started)
+    return text
@@ -0,0 +1,274 @@
+import os, re, json, time, string, sqlite3, argparse, threading
+
+base_dir = os.path.dirname(os.path.abspath(__file__))
+
+# 中日韓文字（含相容字與假名、韓文音節）、英數字與標點，以二元組 (bigram) 建立索引
+# 擷取的全文已去除所有空白，英文單字、料號與中文黏在一起（如 bolttorque、flange6937），只能以子字串比對
+# 標點（半形、中文標點與全形字元）設為 FTS5 的 tokenchars 一併切詞，A-12 才不會與 A/12 或 A12 相符
+PUNCTUATION = string.punctuation + ''.join(map(chr, range(0x3001, 0x3040))) + ''.join(map(chr, range(0xff01, 0xff61)))
+WORD_RUN = re.compile(
+  r'[0-9A-Za-z\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\uac00-\ud7af' + re.escape(PUNCTUATION) + ']+'
+)
+# FTS5 參數以單引號包住、內含的單引號重複一次；整段再放進 SQL 字串時同樣重複單引號
+FTS_TOKENIZE = ("unicode61 remove_diacritics 2 tokenchars '" + PUNCTUATION.replace("'", "''") + "'").replace("'", "''")
+
+def to_bigrams(text):
+  """
+  將連續的中日韓文字、英數字與標點拆成重疊的二元組，並在最後補上該段的最後一個字，例如「法蘭M8」→「法蘭 蘭M M8 8」；
+  其餘文字原樣保留，交給 FTS5 的 unicode61 斷詞（不分大小寫）。每個字都是某個 token 的開頭，單字查詢可用前綴比對
+  """
+  parts = []
+  position = 0
+  for match in WORD_RUN.finditer(text):
+    parts.append(text[position:match.start()])
+    run = match.group()
+    parts.extend(run[i:i + 2] for i in range(len(run) - 1))
+    parts.append(run[-1])
+    position = match.end()
+  parts.append(text[position:])
+  return ' '.join(parts)
+
+def to_match_query(query):
+  """
+  以空白分隔的查詢詞全部都要出現 (AND)；每個詞轉成與索引相同的二元組後以片語比對（即子字串比對），
+  詞尾不補最後一個字（文件中該字後面可能還有字），詞尾只有一個字時改用前綴比對
+  """
+  phrases = []
+  for term in query.split():
+    tokens = to_bigrams(term).split()
+    prefix = False
+    if WORD_RUN.fullmatch(term[-1]):
+      run = WORD_RUN.findall(term)[-1]
+      if len(run) > 1:
+        tokens = tokens[:-1]
+      else:
+        prefix = True
+    if tokens:
+      phrase = '"' + ' '.join(tokens).replace('"', '""') + '"'
+      phrases.append(phrase + ('*' if prefix else ''))
+  return ' AND '.join(phrases)
+
+class FileFullTextIndex:
+  """
+  擷取結果的本機全文檢索索引（SQLite FTS5），鍵為 (資料庫, 資料表, id)，取代跨資料庫的 LIKE '%...%' 全表掃描：
+  - 中文與英數字都以二元組切詞，見 to_bigrams；查詢詞可比對全文中任意位置的子字串，與 LIKE '%...%' 相同
+  - 背景寫回 (FileFullTextWriter) 寫入資料庫後同步更新：全文寫入索引，狀態標記（[file_ 開頭）或空值則從索引移除
+  - FileFullEmpty 清空標記時一併移除對應的資料；其他主機擷取的資料可用 --rebuild 從資料庫補建
+  """
+  PREVIEW_CHARS = 120
+  # 切詞方式改變時遞增，舊版的索引在開啟時清空，需以 --rebuild 補建
+  SCHEMA_VERSION = 3
+
+  def __init__(self, index_path):
+    os.makedirs(os.path.dirname(os.path.abspath(index_path)), exist_ok=True)
+    self.index_path = index_path
+    self.lock = threading.Lock()
+    # 寫回執行緒更新、查詢或 FileFullEmpty 的多個執行緒可同時使用，WAL 讓讀寫不互相阻塞
+    self.conn = sqlite3.connect(index_path, timeout=30, check_same_thread=False)
+    self.conn.execute("PRAGMA journal_mode=WAL;")
+    version = self.conn.execute("PRAGMA user_version;").fetchone()[0]
+    if version != self.SCHEMA_VERSION:
+      exists = self.conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'documents';").fetchone()
+      if exists:
+        print(f"⚠ 全文索引格式已變更，已清空 {index_path}，請執行 py file_fulltext_index.py --rebuild 補建")
+      self.conn.execute("DROP TABLE IF EXISTS documents_fts;")
+      self.conn.execute("DROP TABLE IF EXISTS documents;")
+      self.conn.execute(f"PRAGMA user_version = {self.SCHEMA_VERSION};")
+    self.conn.execute("""
+      CREATE TABLE IF NOT EXISTS documents (
+        doc_id INTEGER PRIMARY KEY,
+        db_name TEXT NOT NULL,
+        table_name TEXT NOT NULL,
+        row_id TEXT NOT NULL,
+        chars INTEGER NOT NULL,
+        preview TEXT NOT NULL,
+        indexed_at REAL NOT NULL,
+        UNIQUE (db_name, table_name, row_id)
+      );
+    """)
+    self.conn.execute(f"CREATE VIRTUAL TABLE IF NOT EXISTS documents_fts USING fts5(body, tokenize='{FTS_TOKENIZE}');")
+    self.conn.commit()
+
+  @staticmethod
+  def is_marker(text):
+    return not text or text.startswith('[file_')
+
+  def apply(self, database, table, rows):
+    """
+    依寫回資料庫的內容更新索引；rows 為 [(全文或狀態標記, id), ...]
+    """
+    with self.lock:
+      for text, row_id in rows:
+        if self.is_marker(text):
+          self.remove(database, table, row_id)
+        else:
+          self.upsert(database, table, row_id, text)
+      self.conn.commit()
+
+  def delete(self, database, table, row_ids):
+    with self.lock:
+      for row_id in row_ids:
+        self.remove(database, table, row_id)
+      self.conn.commit()
+
+  def upsert(self, database, table, row_id, text):
+    preview = ' '.join(text[:self.PREVIEW_CHARS * 2].split())[:self.PREVIEW_CHARS]
+    row = self.conn.execute(
+      "SELECT doc_id FROM documents WHERE db_name = ? AND table_name = ? AND row_id = ?;",
+      (database, table, str(row_id))
+    ).fetchone()
+    if row:
+      doc_id = row[0]
+      self.conn.execute(
+        "UPDATE documents SET chars = ?, preview = ?, indexed_at = ? WHERE doc_id = ?;",
+        (len(text), preview, time.time(), doc_id)
+      )
+      self.conn.execute("DELETE FROM documents_fts WHERE rowid = ?;", (doc_id,))
+    else:
+      doc_id = self.conn.execute(
+        "INSERT INTO documents (db_name, table_name, row_id, chars, preview, indexed_at) VALUES (?, ?, ?, ?, ?, ?);",
+        (database, table, str(row_id), len(text), preview, time.time())
+      ).lastrowid
+    self.conn.execute("INSERT INTO documents_fts (rowid, body) VALUES (?, ?);", (doc_id, to_bigrams(text)))
+
+  def remove(self, database, table, row_id):
+    row = self.conn.execute(
+      "SELECT doc_id FROM documents WHERE db_name = ? AND table_name = ? AND row_id = ?;",
+      (database, table, str(row_id))
+    ).fetchone()
+    if row:
+      self.conn.execute("DELETE FROM documents_fts WHERE rowid = ?;", (row[0],))
+      self.conn.execute("DELETE FROM documents WHERE doc_id = ?;", (row[0],))
+
+  def search(self, query, database=None, table=None, limit=20):
+    """
+    回傳依相關度 (bm25) 排序的 [{'database', 'table', 'id', 'chars', 'preview', 'rank'}, ...]
+    """
+    match = to_match_query(query)
+    if not match:
+      return []
+    filters = ''
+    params = [match]
+    if database:
+      filters += " AND d.db_name = ?"
+      params.append(database)
+    if table:
+      filters += " AND d.table_name = ?"
+      params.append(table)
+    search_sql = f"""
+      SELECT d.db_name, d.table_name, d.row_id, d.chars, d.preview, bm25(documents_fts) AS rank
+      FROM documents_fts JOIN documents d ON d.doc_id = documents_fts.rowid
+      WHERE documents_fts MATCH ?{filters}
+      ORDER BY rank LIMIT ?;
+    """
+    with self.lock:
+      rows = self.conn.execute(search_sql, (*params, int(limit))).fetchall()
+    return [
+      {'database': db_name, 'table': table_name, 'id': row_id, 'chars': chars, 'preview': preview, 'rank': round(rank, 3)}
+      for db_name, table_name, row_id, chars, preview, rank in rows
+    ]
+
+  def rebuild(self, conn, targets, batch_size=500):
+    """
+    從資料庫補建索引：依主鍵順序分批讀取各資料表已擷取的全文（略過空值與狀態標記），同時移除索引中已不存在全文的資料
+    conn: MySQL 連線；targets: FileFullTextTargets.all() 的結果
+    """
+    total = 0
+    cursor = conn.cursor()
+    try:
+      for target in targets:
+        id_col = target.project['idCol']
+        text_col = target.project['fullTextCol']
+        with self.lock:
+          indexed = {row[0] for row in self.conn.execute(
+            "SELECT row_id FROM documents WHERE db_name = ? AND table_name = ?;", (target.database, target.table)
+          )}
+        last_id = None
+        count = 0
+        while True:
+          lower_sql, lower_params = (f"{id_col} > %s", (last_id,)) if last_id is not None else ("1 = 1", ())
+          cursor.execute(
+            f"SELECT {id_col}, {text_col} FROM {target.database}.{target.table} "
+            f"WHERE {lower_sql} AND {text_col} <> '' AND {text_col} NOT LIKE '[file_%%' ORDER BY {id_col} LIMIT {int(batch_size)};",
+            lower_params
+          )
+          rows = cursor.fetchall()
+          if not rows:
+            break
+          self.apply(target.database, target.table, [(text, row_id) for row_id, text in rows])
+          indexed.difference_update(str(row_id) for row_id, _ in rows)
+          count += len(rows)
+          last_id = rows[-1][0]
+        self.delete(target.database, target.table, indexed)
+        print(f"✅ 已建立索引：{target.database}.{target.table}（{count} 筆，移除 {len(indexed)} 筆）")
+        total += count
+    finally:
+      cursor.close()
+    return total
+
+  def stats(self):
+    with self.lock:
+      documents, chars = self.conn.execute("SELECT COUNT(*), COALESCE(SUM(chars), 0) FROM documents;").fetchone()
+      tables = self.conn.execute("SELECT COUNT(*) FROM (SELECT DISTINCT db_name, table_name FROM documents);").fetchone()[0]
+    return {
+      'documents': documents,
+      'tables': tables,
+      'chars': chars,
+      'bytes': os.path.getsize(self.index_path) if os.path.exists(self.index_path) else 0,
+    }
+
+  def optimize(self):
+    # 合併 FTS5 的索引片段，大量更新後可加快查詢
+    with self.lock:
+      self.conn.execute("INSERT INTO documents_fts (documents_fts) VALUES ('optimize');")
+      self.conn.commit()
+
+  def close(self):
+    with self.lock:
+      self.conn.close()
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser(description="查詢擷取全文的本機索引")
+  parser.add_argument("query", nargs="*", help="查詢詞，以空白分隔的詞都要出現")
+  parser.add_argument("--database", help="只查詢指定資料庫")
+  parser.add_argument("--table", help="只查詢指定資料表")
+  parser.add_argument("--limit", type=int, default=20)
+  parser.add_argument("--json", action="store_true", help="以 JSON 輸出結果")
+  parser.add_argument("--rebuild", action="store_true", help="從資料庫補建索引（含其他主機擷取的資料）")
+  parser.add_argument("--stats", action="store_true", help="顯示索引筆數與大小")
+  args = parser.parse_args()
+
+  with open(os.path.join(base_dir, "config.json"), "r", encoding="utf-8") as f:
+    config = json.load(f)
+  index = FileFullTextIndex(config.get('search_index_path', '') or os.path.join(base_dir, 'cache', 'fulltext_index.sqlite3'))
+
+  if args.rebuild:
+    import mysql.connector
+    from file_fulltext_targets import FileFullTextTargets
+    conn = mysql.connector.connect(host=config.get('host', ''), user=config.get('user', ''), password=config.get('password', ''))
+    try:
+      cursor = conn.cursor(dictionary=True)
+      targets = FileFullTextTargets(config.get('projects', ''), config.get('target_refresh_seconds', 600)).all(cursor)
+      cursor.close()
+      started = time.monotonic()
+      total = index.rebuild(conn, targets)
+      index.optimize()
+      print(f"📦 {len(targets)} 個資料表共索引 {total} 筆，耗時 {time.monotonic() - started:.1f} 秒")
+    finally:
+      conn.close()
+
+  if args.stats:
+    stats = index.stats()
+    print(f"📦 索引 {stats['documents']} 筆（{stats['tables']} 個資料表，{stats['chars']} 字），檔案 {stats['bytes'] / 1024 / 1024:.1f} MB")
+
+  if args.query:
+    started = time.perf_counter()
+    results = index.search(' '.join(args.query), args.database, args.table, args.limit)
+    elapsed = time.perf_counter() - started
+    if args.json:
+      print(json.dumps(results, indent=2, ensure_ascii=False))
+    else:
+      print(f"🔎 {len(results)} 筆結果（{elapsed * 1000:.1f} ms）")
+      for result in results:
+        print(f"  {result['database']}.{result['table']} id={result['id']}（{result['chars']} 字）：{result['preview']}")
+  index.close()
@@ -0,0 +1,213 @@
+import os, json, time, threading
+from datetime import datetime
+
+class FileFullTextMetrics:
+  """
+  擷取流程的階段耗時與屬性：
+  - 每個檔案處理完寫一行 JSON 到 jsonl_path，含資料庫、資料表、id、副檔名、大小、頁數、OCR 頁數、結果狀態與各階段秒數
+    （download 背景下載、download_wait 等待下載、extract 擷取總耗時，及擷取內的 pdf_text / pdf_render / preprocess / ocr / ocr_wait / clean）
+  - 探索資料表 (discover)、計算待處理筆數 (backlog)、認領 (claim)、批次寫回 (write) 與更新全文索引 (index) 不屬於單一檔案，只計入累計值；
+    各資料表的待處理筆數另輸出為 gauge
+  - 累計值每 prometheus_interval 秒以 Prometheus 文字格式覆寫 prometheus_path，供 node_exporter textfile collector 讀取
+  jsonl_path 與 prometheus_path 都未設定時不啟用，各方法直接返回，擷取器也不計時
+  """
+  # 直方圖上限（秒）
+  BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+  def __init__(self, jsonl_path='', prometheus_path='', prometheus_interval=15):
+    self.jsonl_path = jsonl_path
+    self.prometheus_path = prometheus_path
+    self.prometheus_interval = prometheus_interval
+    self.enabled = bool(jsonl_path or prometheus_path)
+    self.lock = threading.Lock()  # 寫回在背景執行緒回報
+    self.jsonl = None
+    self.records = {}  # (database, table, id) -> 處理中檔案的紀錄
+    self.stages = {}  # stage -> {'count', 'sum', 'buckets'}
+    self.files = {}  # (ext, status) -> 檔案數
+    self.totals = {'bytes': 0, 'pages': 0, 'ocr_pages': 0, 'text_chars': 0}
+    self.backlog = []  # FileFullTextScheduler.backlog()
+    self.written_at = time.monotonic()
+
+  def begin(self, database, project, row, save_path, download_seconds=None, wait_seconds=None):
+    """
+    檔案下載完成、開始擷取時建立紀錄
+    """
+    if not self.enabled:
+      return
+    record = {
+      'database': database,
+      'table': project['tableName'],
+      'id': row[project['idCol']],
+      'ext': os.path.splitext(save_path)[1].lower(),
+      'bytes': os.path.getsize(save_path) if os.path.exists(save_path) else 0,
+      'started': time.perf_counter(),
+      'stages': {},
+    }
+    if download_seconds is not None:
+      record['stages']['download'] = download_seconds
+    if wait_seconds is not None:
+      record['stages']['download_wait'] = wait_seconds
+    with self.lock:
+      self.records[(database, project['tableName'], record['id'])] = record
+
+  def finish(self, database, project, row, status, result=None, error=None):
+    """
+    結果交給寫回後結束紀錄：寫一行 JSON 並計入累計值
+    status: ok / empty / fail / timeout / memory_limit / not_found；result 為 extract_text 的結果，含擷取器回報的 metrics
+    """
+    if not self.enabled:
+      return
+    key = (database, project['tableName'], row[project['idCol']])
+    with self.lock:
+      record = self.records.pop(key, None)
+    if record is None:
+      return
+
+    record['status'] = status
+    record['total'] = time.perf_counter() - record.pop('started')
+    if result:
+      timings = result.get('metrics') or {}
+      record['stages'].update(timings.get('seconds', {}))
+      record['pages'] = timings.get('pages', 0)
+      record['ocr_pages'] = timings.get('ocr_pages', 0)
+      record['images_ocr'] = timings.get('images_ocr', 0)
+      record['images_cached'] = result.get('images_cached', 0)
+      record['images_denied'] = result.get('images_denied', 0)
+      record['text_chars'] = len(result.get('text') or '')
+      if 'cached' in result:
+        record['cached'] = result['cached']
+      if result.get('truncated'):
+        record['truncated'] = True
+      error = error or result.get('error')
+    if error:
+      record['error'] = str(error)[:200]
+
+    with self.lock:
+      for stage, seconds in record['stages'].items():
+        self.add_stage(stage, seconds)
+      self.add_stage('total', record['total'])
+      self.files[(record['ext'], status)] = self.files.get((record['ext'], status), 0) + 1
+      self.totals['bytes'] += record['bytes']
+      for name in ('pages', 'ocr_pages', 'text_chars'):
+        self.totals[name] += record.get(name, 0)
+      if self.jsonl_path:
+        self.write_jsonl(record)
+    self.write_prometheus()
+
+  def observe(self, stage, seconds):
+    """
+    不屬於單一檔案的階段（discover / backlog / claim / write / index），只計入累計值
+    """
+    if not self.enabled:
+      return
+    with self.lock:
+      self.add_stage(stage, seconds)
+
+  def set_backlog(self, backlog):
+    """
+    各資料表的待處理筆數，隨累計值輸出為 gauge
+    """
+    if not self.enabled:
+      return
+    with self.lock:
+      self.backlog = backlog
+    self.write_prometheus()
+
+  def add_stage(self, stage, seconds):
+    entry = self.stages.get(stage)
+    if entry is None:
+      entry = self.stages[stage] = {'count': 0, 'sum': 0.0, 'buckets': [0] * len(self.BUCKETS)}
+    entry['count'] += 1
+    entry['sum'] += seconds
+    for index, bound in enumerate(self.BUCKETS):
+      if seconds <= bound:
+        entry['buckets'][index] += 1
+
+  def write_jsonl(self, record):
+    if self.jsonl is None:
+      os.makedirs(os.path.dirname(os.path.abspath(self.jsonl_path)), exist_ok=True)
+      self.jsonl = open(self.jsonl_path, 'a', encoding='utf-8', buffering=1)
+    line = {'time': datetime.now().strftime('%Y-%m-%d %H:%M:%S'), **record}
+    line['stages'] = {stage: round(seconds, 4) for stage, seconds in record['stages'].items()}
+    line['total'] = round(record['total'], 4)
+    self.jsonl.write(json.dumps(line, ensure_ascii=False, default=str) + "\n")
+
+  def write_prometheus(self, force=False):
+    if not self.prometheus_path:
+      return
+    now = time.monotonic()
+    if not force and now - self.written_at < self.prometheus_interval:
+      return
+    self.written_at = now
+
+    with self.lock:
+      lines = [
+        "# HELP fulltext_stage_seconds Time spent in each fulltext pipeline stage.",
+        "# TYPE fulltext_stage_seconds histogram",
+      ]
+      for stage, entry in sorted(self.stages.items()):
+        for bound, count in zip(self.BUCKETS, entry['buckets']):
+          lines.append(f'fulltext_stage_seconds_bucket{{stage="{stage}",le="{bound}"}} {count}')
+        lines.append(f'fulltext_stage_seconds_bucket{{stage="{stage}",le="+Inf"}} {entry["count"]}')
+        lines.append(f'fulltext_stage_seconds_sum{{stage="{stage}"}} {entry["sum"]:.6f}')
+        lines.append(f'fulltext_stage_seconds_count{{stage="{stage}"}} {entry["count"]}')
+      lines += [
+        "# HELP fulltext_files_total Files processed by extension and result status.",
+        "# TYPE fulltext_files_total counter",
+      ]
+      for (ext, status), count in sorted(self.files.items()):
+        lines.append(f'fulltext_files_total{{ext="{ext}",status="{status}"}} {count}')
+      for name, value in self.totals.items():
+        lines.append(f"# TYPE fulltext_{name}_total counter")
+        lines.append(f"fulltext_{name}_total {value}")
+      if self.backlog:
+        lines += [
+          "# HELP fulltext_backlog Pending rows per table, capped at backlog_count_limit.",
+          "# TYPE fulltext_backlog gauge",
+        ]
+        for row in self.backlog:
+          if row.get('estimated'):
+            continue  # 無索引未計數的資料表
+          lines.append(f'fulltext_backlog{{project="{row["project"]}",database="{row["database"]}",table="{row["table"]}"}} {row["pending"]}')
+
+    # 先寫暫存檔再取代，collector 不會讀到寫一半的檔案
+    os.makedirs(os.path.dirname(os.path.abspath(self.prometheus_path)), exist_ok=True)
+    temp_path = f"{self.prometheus_path}.{os.getpid()}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+      f.write("\n".join(lines) + "\n")
+    os.replace(temp_path, self.prometheus_path)
+
+  def close(self):
+    if not self.enabled:
+      return
+    self.write_prometheus(force=True)
+    with self.lock:
+      if self.jsonl:
+        self.jsonl.close()
+        self.jsonl = None
+
+class FileFullTextProfiler:
+  """
+  抽樣以 cProfile 分析擷取：每 every 個檔案分析一次，結果存成 profile_dir/<時間>_<檔名>.prof，
+  可用 py -m pstats 或 snakeviz 檢視。every 為 0 或未設定 profile_dir 時不啟用
+  """
+  def __init__(self, profile_dir='', every=0):
+    self.profile_dir = profile_dir
+    self.every = every if profile_dir else 0
+    self.count = 0
+
+  def run(self, func, file_path):
+    if not self.every:
+      return func(file_path)
+    self.count += 1
+    if self.count % self.every:
+      return func(file_path)
+
+    import cProfile
+    profiler = cProfile.Profile()
+    try:
+      return profiler.runcall(func, file_path)
+    finally:
+      os.makedirs(self.profile_dir, exist_ok=True)
+      name = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{os.getpid()}_{os.path.basename(file_path)}.prof"
+      profiler.dump_stats(os.path.join(self.profile_dir, name))
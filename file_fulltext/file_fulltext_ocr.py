@@ -0,0 +1,144 @@
+import os, shutil, threading
+
+class PytesseractOcr:
+  """
+  透過 pytesseract 呼叫 tesseract 執行檔；每次呼叫都會啟動新 process 並重新載入語言模型
+  """
+  name = 'pytesseract'
+
+  def __init__(self, lang='eng+chi_tra', config='--psm 6'):
+    import pytesseract
+    self.pytesseract = pytesseract
+    self.lang = lang
+    self.config = config
+
+  def image_to_string(self, img):
+    return self.pytesseract.image_to_string(img, lang=self.lang, config=self.config)
+
+  def word_confidences(self, img):
+    # 各辨識出字詞的信心度 (0-100)
+    data = self.pytesseract.image_to_data(img, lang=self.lang, config=self.config, output_type=self.pytesseract.Output.DICT)
+    return [float(conf) for conf, text in zip(data['conf'], data['text']) if text.strip() and float(conf) >= 0]
+
+  def close(self):
+    pass
+
+class TesserocrOcr:
+  """
+  透過 tesserocr (Tesseract C API) 常駐一個已載入語言模型的引擎，跨呼叫重複使用，
+  省去每張圖片重新啟動 tesseract 與載入 traineddata 的成本
+  """
+  name = 'tesserocr'
+
+  def __init__(self, lang='eng+chi_tra', psm=6, tessdata_path=None):
+    import tesserocr
+    tessdata_path = tessdata_path or self.find_tessdata()
+    # tesserocr.PSM 只是常數集合（PSM.SINGLE_BLOCK == 6），不能以 PSM(6) 建立，直接傳入整數
+    options = {'lang': lang, 'psm': psm}
+    if tessdata_path:
+      options['path'] = tessdata_path
+    self.api = tesserocr.PyTessBaseAPI(**options)
+    self.lang = lang
+    # 同一個引擎不可同時辨識多張圖片
+    self.lock = threading.Lock()
+
+  @staticmethod
+  def find_tessdata():
+    """
+    優先使用 TESSDATA_PREFIX，否則找 PATH 上 tesseract 執行檔旁的 tessdata 資料夾（如 D:\\Tesseract-OCR\\tessdata）
+    """
+    if os.environ.get('TESSDATA_PREFIX'):
+      return os.environ['TESSDATA_PREFIX']
+    tesseract = shutil.which('tesseract')
+    if tesseract:
+      tessdata = os.path.join(os.path.dirname(tesseract), 'tessdata')
+      if os.path.isdir(tessdata):
+        return tessdata
+    return None
+
+  def image_to_string(self, img):
+    from PIL import Image
+    if not isinstance(img, Image.Image):
+      img = Image.fromarray(img)
+    with self.lock:
+      self.api.SetImage(img)
+      return self.api.GetUTF8Text()
+
+  def word_confidences(self, img):
+    from PIL import Image
+    if not isinstance(img, Image.Image):
+      img = Image.fromarray(img)
+    with self.lock:
+      self.api.SetImage(img)
+      self.api.Recognize()
+      return [float(conf) for conf in self.api.AllWordConfidences()]
+
+  def close(self):
+    with self.lock:
+      self.api.End()
+
+class ScriptDetectingOcr:
+  """
+  依每張圖片的文字挑選語言模型：先以 probe_lang（lang 的第一個語言，通常是 eng）辨識縮小 PROBE_SCALE 倍的圖片，
+  字詞夠多、平均信心度達 MIN_CONFIDENCE 且低信心字詞比例不超過 MAX_LOW_RATIO 時，視為只有該語言的文字，以 probe_lang 辨識原圖；
+  否則（中文字在英文模型下會辨識成低信心的零碎字詞）改用完整的 lang。英文規格表、圖面、料表不必執行較慢的中英混合模型
+  """
+  PROBE_SCALE = 0.5
+  MIN_WORDS = 3
+  MIN_CONFIDENCE = 80
+  LOW_CONFIDENCE = 60
+  MAX_LOW_RATIO = 0.1
+
+  def __init__(self, name='auto', lang='eng+chi_tra'):
+    self.lang = lang
+    self.probe_lang = lang.split('+')[0]
+    self.full = create_ocr_backend(name, lang)
+    self.probe = create_ocr_backend(name, self.probe_lang)
+    self.name = f'{self.full.name}+detect'
+    self.stats = {'probe': 0, 'escalated': 0}  # 試辨識次數與改用完整 lang 的次數
+    self.lock = threading.Lock()
+
+  def image_to_string(self, img):
+    escalate = not self.is_probe_script(img)
+    with self.lock:
+      self.stats['probe'] += 1
+      self.stats['escalated'] += escalate
+    return (self.full if escalate else self.probe).image_to_string(img)
+
+  def is_probe_script(self, img):
+    import cv2 # opencv-python
+    import numpy as np
+    img = np.asarray(img)
+    small = cv2.resize(img, None, fx=self.PROBE_SCALE, fy=self.PROBE_SCALE, interpolation=cv2.INTER_AREA)
+    confidences = self.probe.word_confidences(small)
+    if len(confidences) < self.MIN_WORDS:
+      return False
+    low = sum(1 for conf in confidences if conf < self.LOW_CONFIDENCE)
+    return sum(confidences) / len(confidences) >= self.MIN_CONFIDENCE and low / len(confidences) <= self.MAX_LOW_RATIO
+
+  def close(self):
+    self.probe.close()
+    self.full.close()
+
+OCR_BACKENDS = {
+  'pytesseract': PytesseractOcr,
+  'tesserocr': TesserocrOcr,
+}
+
+def create_ocr_backend(name='auto', lang='eng+chi_tra', script_detect=False):
+  """
+  name: 'auto' 優先使用常駐引擎 tesserocr，無法使用時改用 pytesseract；
+        'tesserocr' / 'pytesseract' 指定後端
+  script_detect: lang 含多個語言時，依圖片文字挑選語言模型，見 ScriptDetectingOcr
+  """
+  if script_detect and '+' in lang:
+    return ScriptDetectingOcr(name, lang)
+  if name != 'auto' and name not in OCR_BACKENDS:
+    raise ValueError(f"Unknown OCR backend: {name}")
+  if name in ('auto', 'tesserocr'):
+    try:
+      return TesserocrOcr(lang)
+    except Exception as e:
+      # 'auto' 也要說明原因，否則每頁改用 pytesseract 啟動新 process 卻無從得知
+      print(f"⚠ tesserocr 無法使用，改用 pytesseract：{type(e).__name__}: {e}")
+  return PytesseractOcr(lang)
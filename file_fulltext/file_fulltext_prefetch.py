@@ -0,0 +1,107 @@
+import os, time, threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+class _Deferred(Exception):
+  """
+  預先下載會超過磁碟上限，改由取用時再下載
+  """
+
+class FileFullTextPrefetcher:
+  """
+  背景預先下載：以共用的 requests.Session 在背景執行緒下載接下來 depth 個檔案，
+  讓下載與擷取重疊進行。已預先下載、尚未處理完的檔案總大小不超過 max_bytes，
+  超過上限的檔案不在背景下載，輪到它時才在取用端同步下載。
+  """
+  def __init__(self, session, depth=2, max_bytes=512 * 1024 * 1024, timeout=30):
+    self.session = session
+    self.depth = max(depth, 1)
+    self.max_bytes = max_bytes
+    self.timeout = timeout
+    self.pool = ThreadPoolExecutor(max_workers=self.depth, thread_name_prefix='prefetch')
+    self.queue = deque()  # (item, url, save_path, future)
+    self.lock = threading.Lock()
+    self.used_bytes = 0
+    self.file_bytes = {}  # save_path -> 已計入上限的位元組數
+    self.download_seconds = {}  # save_path -> 下載耗時，見 FileFullTextMetrics
+
+  def __len__(self):
+    return len(self.queue)
+
+  def submit(self, item, url, save_path):
+    future = self.pool.submit(self.download, url, save_path, True)
+    self.queue.append((item, url, save_path, future))
+
+  def take(self):
+    """
+    依提交順序取出下一個檔案，回傳 (item, save_path, error)
+    """
+    item, url, save_path, future = self.queue.popleft()
+    try:
+      try:
+        future.result()
+      except _Deferred:
+        self.download(url, save_path, False)
+      return item, save_path, None
+    except Exception as e:
+      return item, save_path, e
+
+  def download(self, url, save_path, background):
+    os.makedirs(os.path.dirname(save_path), exist_ok=True)
+    started = time.perf_counter()
+    try:
+      with self.session.get(url, stream=True, timeout=self.timeout) as response:
+        response.raise_for_status()
+        if background:
+          self.reserve(save_path, int(response.headers.get('Content-Length') or 0), background, check_only=True)
+        with open(save_path, "wb") as f:
+          for chunk in response.iter_content(chunk_size=64 * 1024):
+            self.reserve(save_path, len(chunk), background)
+            f.write(chunk)
+    except Exception:
+      self.release(save_path)
+      raise
+    self.download_seconds[save_path] = time.perf_counter() - started
+    return save_path
+
+  def reserve(self, save_path, size, background, check_only=False):
+    with self.lock:
+      if background and self.used_bytes + size > self.max_bytes:
+        raise _Deferred()
+      if not check_only:
+        self.used_bytes += size
+        self.file_bytes[save_path] = self.file_bytes.get(save_path, 0) + size
+
+  def release(self, save_path):
+    """
+    檔案處理完畢（或下載失敗）後歸還額度並刪除檔案
+    """
+    with self.lock:
+      self.used_bytes -= self.file_bytes.pop(save_path, 0)
+      self.download_seconds.pop(save_path, None)
+    if os.path.exists(save_path):
+      try:
+        os.remove(save_path)
+      except Exception as e:
+        print(f"⚠ 無法刪除檔案 {save_path}，原因: {e}")
+
+  def cancel(self):
+    """
+    取消尚未開始的下載，並清除已下載但未處理的檔案，回傳這些檔案的 item
+    """
+    items = []
+    while self.queue:
+      item, _, save_path, future = self.queue.popleft()
+      future.cancel()
+      try:
+        future.result()
+      except Exception:
+        pass
+      self.release(save_path)
+      items.append(item)
+    return items
+
+  def close(self):
+    items = self.cancel()
+    self.pool.shutdown(wait=True)
+    return items
@@ -1,34 +1,236 @@
-import os, json, re, requests, urllib3, socket
-import mysql.connector
-from datetime import datetime
-from mysql.connector import Error
+import os, json, re, time, signal, threading, requests, urllib3, socket, uuid
+from collections import deque
+from datetime import datetime, timedelta
+from mysql.connector import Error, pooling
+from requests.adapters import HTTPAdapter
 from file_fulltext_extractor import FileFullTextExtractor
+from file_fulltext_cache import FileFullTextCache
+from file_fulltext_targets import FileFullTextTargets
+from file_fulltext_scheduler import FileFullTextScheduler
+from file_fulltext_prefetch import FileFullTextPrefetcher
+from file_fulltext_writer import FileFullTextWriter
+from file_fulltext_metrics import FileFullTextMetrics, FileFullTextProfiler
+from file_fulltext_supervisor import FileFullTextSupervisor
+from file_fulltext_index import FileFullTextIndex
 
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
+def _create_extractor(options):
+  cache = None
+  if options.get('cache_path'):
+    cache = FileFullTextCache(options['cache_path'], options['cache_max_bytes'])
+  return FileFullTextExtractor(
+    cache=cache,
+    ocr_backend=options['ocr_backend'],
+    pdf_ocr_workers=options['pdf_ocr_workers'],
+    adaptive_ocr=options['adaptive_ocr'],
+    ocr_script_detect=options['ocr_script_detect'],
+    zip_workers=options['zip_workers'],
+    zip_max_depth=options['zip_max_depth'],
+    zip_max_bytes=options['zip_max_bytes'],
+    zip_max_members=options['zip_max_members'],
+    max_text_length=options['max_text_length'],
+    image_cache=options['image_cache'],
+    image_denylist_dir=options['image_denylist_dir'],
+    collect_timings=options['collect_timings'],
+    max_pages=options['max_pages'],
+    max_entities=options['max_entities'],
+    max_image_pixels=options['max_image_pixels'],
+  )
+
+# worker process 內的 extractor 與抽樣 profiler，由 _init_extract_worker 於 process 啟動時建立一次
+_worker_extractor = None
+_worker_profiler = None
+
+def _init_extract_worker(options):
+  global _worker_extractor, _worker_profiler
+  # Ctrl+C 由主程序處理（常駐模式會等進行中的檔案完成），worker 不跟著中斷
+  signal.signal(signal.SIGINT, signal.SIG_IGN)
+  _worker_extractor = _create_extractor(options)
+  _worker_profiler = FileFullTextProfiler(options['profile_dir'], options['profile_every'])
+
+def _extract_in_worker(file_path):
+  return _worker_profiler.run(_worker_extractor.extract_text, file_path)
+
 class FileFullTextProcessor:
+  # 常駐模式重新載入設定時，這些設定變動需要重建對應的元件，見 reload_config
+  CONNECTION_CONFIG = ('host', 'user', 'password', 'mysql_pool_size', 'write_batch_size', 'write_flush_seconds', 'write_batch_max_mb')
+  HTTP_CONFIG = ('prefetch_depth', 'prefetch_max_mb', 'http_pool_size')
+  METRICS_CONFIG = ('metrics_jsonl_path', 'metrics_prometheus_path', 'metrics_prometheus_interval')
+  SUPERVISOR_CONFIG = ('extract_timeout_seconds', 'extract_max_rss_mb', 'extract_max_jobs')
+  INDEX_CONFIG = ('search_index_enabled', 'search_index_path')
+  # 擷取結果 status → 狀態標記
+  BUDGET_MARKERS = {'timeout': 'file_timeout', 'memory_limit': 'file_memory_limit'}
+
   def __init__(self, base_dir, config_file="config.json"):
     self.base_dir = base_dir
+    self.config_path = os.path.join(self.base_dir, config_file)
+    self.load_config()
+
+    self.pool = None
+    self.conn = None
+    self.cursor = None
+    self.writer = None
+    # 標記中的主機 IP 只解析一次
+    self.host_ip = socket.gethostbyname(socket.gethostname())
+
+    # 認領狀態：worker token、各資料表的 keyset 游標、本機待處理佇列
+    self.worker_token = uuid.uuid4().hex[:12]
+    self.claim_seq = 0
+    self.claim_cursors = {}
+    self.claimed_rows = deque()
+
+    self.targets = FileFullTextTargets(self.config_projects, self.config_target_refresh_seconds)
+    self.scheduler = FileFullTextScheduler(self.config_backlog_refresh_seconds, self.config_backlog_count_limit)
+    self.metrics = self.create_metrics()
+    self.index = self.create_index()
+    self.profiler = FileFullTextProfiler(self.config_profile_dir, self.config_profile_every)
+
+    # 擷取器設定，主程序與 worker process 共用
+    self.extractor_options = self.build_extractor_options()
+    self.extractor = _create_extractor(self.extractor_options)
+    self.supervisor = None  # 擷取用的子 process，跨批次重複使用，見 get_supervisor
+    self.cache_stats = {'hits': 0, 'misses': 0, 'saved_seconds': 0.0, 'images_cached': 0, 'images_denied': 0}
+    self.create_session()
+
+    # 常駐模式：收到結束訊號後設定，閒置等待時可立即喚醒
+    self.stop_event = threading.Event()
+
+  def load_config(self):
     try:
-      with open(os.path.join(self.base_dir, config_file), "r", encoding="utf-8") as f:
+      with open(self.config_path, "r", encoding="utf-8") as f:
         config = json.load(f)
     except Error as e:
       print("❌ 連線錯誤：", e)
+    self.config_mtime = os.path.getmtime(self.config_path)
 
     self.config_file_url = config.get('file_url', '')
     self.config_host = config.get('host', '')
     self.config_user = config.get('user', '')
     self.config_password = config.get('password', '')
     self.config_projects = config.get('projects', '')
+    self.config_claim_batch_size = config.get('claim_batch_size', 10)
+    self.config_claim_lease_seconds = config.get('claim_lease_seconds', 3600)
+    self.config_target_refresh_seconds = config.get('target_refresh_seconds', 600)
+    # 各資料表待處理筆數的重新計算間隔與計數上限，見 FileFullTextScheduler；專案的 priority / maxConcurrency 設定在 projects 中
+    self.config_backlog_refresh_seconds = config.get('backlog_refresh_seconds', 60)
+    self.config_backlog_count_limit = config.get('backlog_count_limit', 100000)
+    self.config_cache_enabled = config.get('cache_enabled', True)
+    self.config_cache_path = config.get('cache_path', '') or os.path.join(self.base_dir, 'cache', 'fulltext_cache.sqlite3')
+    self.config_cache_max_mb = config.get('cache_max_mb', 1024)
+    # 本機全文檢索索引（SQLite FTS5），寫回資料庫時同步更新，以 py file_fulltext_index.py 查詢，見 FileFullTextIndex
+    self.config_search_index_enabled = config.get('search_index_enabled', True)
+    self.config_search_index_path = config.get('search_index_path', '') or os.path.join(self.base_dir, 'cache', 'fulltext_index.sqlite3')
+    self.config_image_cache = config.get('image_cache', 'exact')
+    self.config_image_denylist_dir = config.get('image_denylist_dir', '') or os.path.join(self.base_dir, 'image_denylist')
+    self.config_prefetch_depth = config.get('prefetch_depth', 2)
+    self.config_prefetch_max_mb = config.get('prefetch_max_mb', 512)
+    self.config_http_pool_size = config.get('http_pool_size', 8)
+    self.config_ocr_backend = config.get('ocr_backend', 'auto')
+    self.config_pdf_ocr_workers = config.get('pdf_ocr_workers', 1)
+    self.config_adaptive_ocr = config.get('adaptive_ocr', True)
+    # 先以英文模型試辨識縮小的圖片，只有英文的頁面不執行中英混合模型；啟用前建議以 benchmarks/bench_script_detect.py 比較準確率
+    self.config_ocr_script_detect = config.get('ocr_script_detect', False)
+    self.config_zip_workers = config.get('zip_workers', 4)
+    self.config_zip_max_depth = config.get('zip_max_depth', 3)
+    self.config_zip_max_mb = config.get('zip_max_mb', 512)
+    self.config_zip_max_members = config.get('zip_max_members', 2000)
+    # 單一欄位的全文上限（字數），預設約 3 MB 的 UTF-8 中文，低於 MySQL 5.7 預設 max_allowed_packet；0 表示不限制
+    self.config_max_text_length = config.get('max_text_length', 1000000)
+    self.config_mysql_pool_size = config.get('mysql_pool_size', 3)
+    self.config_write_batch_size = config.get('write_batch_size', 50)
+    self.config_write_flush_seconds = config.get('write_flush_seconds', 2)
+    self.config_write_batch_max_mb = config.get('write_batch_max_mb', 4)
+    # 擷取預算：預設每個檔案在受監督的子 process 中擷取，超過時間或記憶體上限即終止並標記 [file_timeout] / [file_memory_limit]；
+    # 子 process 每處理 extract_max_jobs 件重新啟動。頁數、圖元數與圖片像素數上限見 FileFullTextExtractor，0 表示不限制
+    self.config_extract_isolated = config.get('extract_isolated', True)
+    self.config_extract_timeout_seconds = config.get('extract_timeout_seconds', 600)
+    self.config_extract_max_rss_mb = config.get('extract_max_rss_mb', 2048)
+    self.config_extract_max_jobs = config.get('extract_max_jobs', 200)
+    self.config_extract_max_pages = config.get('extract_max_pages', 2000)
+    self.config_extract_max_entities = config.get('extract_max_entities', 500000)
+    self.config_extract_max_image_mp = config.get('extract_max_image_mp', 150)
+    # 階段耗時紀錄：JSON lines 與 Prometheus 文字檔路徑，都留空則不啟用；另可每 N 個檔案以 cProfile 分析一次
+    self.config_metrics_jsonl_path = config.get('metrics_jsonl_path', '')
+    self.config_metrics_prometheus_path = config.get('metrics_prometheus_path', '')
+    self.config_metrics_prometheus_interval = config.get('metrics_prometheus_interval', 15)
+    self.config_profile_dir = config.get('profile_dir', '')
+    self.config_profile_every = config.get('profile_every', 0)
+    # 常駐模式：閒置時輪詢間隔由 idle_poll_min_seconds 起每次加倍，最多 idle_poll_max_seconds；每 config_check_seconds 秒檢查設定檔
+    self.config_idle_poll_min_seconds = config.get('idle_poll_min_seconds', 5)
+    self.config_idle_poll_max_seconds = config.get('idle_poll_max_seconds', 300)
+    self.config_config_check_seconds = config.get('config_check_seconds', 30)
+    # 認領在取出佇列時續期，之後還要下載、等待與擷取，租期太短仍可能在處理中逾時
+    if self.config_claim_lease_seconds < self.config_extract_timeout_seconds * 2:
+      print(f"⚠ claim_lease_seconds ({self.config_claim_lease_seconds}) 小於 extract_timeout_seconds 的兩倍，處理中的資料可能被其他主機重新認領")
 
-    self.conn = None
-    self.cursor = None
+  def create_metrics(self):
+    return FileFullTextMetrics(
+      self.config_metrics_jsonl_path,
+      self.config_metrics_prometheus_path,
+      self.config_metrics_prometheus_interval
+    )
+
+  def create_index(self):
+    return FileFullTextIndex(self.config_search_index_path) if self.config_search_index_enabled else None
+
+  def close_index(self):
+    if self.index:
+      self.index.close()
+      self.index = None
+
+  def build_extractor_options(self):
+    return {
+      'cache_path': self.config_cache_path if self.config_cache_enabled else '',
+      'cache_max_bytes': self.config_cache_max_mb * 1024 * 1024,
+      'ocr_backend': self.config_ocr_backend,
+      'pdf_ocr_workers': self.config_pdf_ocr_workers,
+      'adaptive_ocr': self.config_adaptive_ocr,
+      'ocr_script_detect': self.config_ocr_script_detect,
+      'zip_workers': self.config_zip_workers,
+      'zip_max_depth': self.config_zip_max_depth,
+      'zip_max_bytes': self.config_zip_max_mb * 1024 * 1024,
+      'zip_max_members': self.config_zip_max_members,
+      'max_text_length': self.config_max_text_length or None,
+      'image_cache': self.config_image_cache,
+      'image_denylist_dir': self.config_image_denylist_dir,
+      'collect_timings': self.metrics.enabled,
+      'profile_dir': self.config_profile_dir,
+      'profile_every': self.config_profile_every,
+      'max_pages': self.config_extract_max_pages or None,
+      'max_entities': self.config_extract_max_entities or None,
+      'max_image_pixels': int(self.config_extract_max_image_mp * 1000000) or None,
+    }
+
+  def create_session(self):
+    # 共用連線池的 HTTP session，避免每個檔案都重新 TCP + TLS 交握
+    self.session = requests.Session()
+    self.session.verify = False
+    adapter = HTTPAdapter(pool_connections=self.config_http_pool_size, pool_maxsize=self.config_http_pool_size)
+    self.session.mount('http://', adapter)
+    self.session.mount('https://', adapter)
+    self.prefetcher = FileFullTextPrefetcher(self.session, self.config_prefetch_depth, self.config_prefetch_max_mb * 1024 * 1024)
 
   def connect_mysql(self):
     try:
-      self.conn = mysql.connector.connect(host= self.config_host, user= self.config_user, password= self.config_password)
+      # 認領用的連線與背景寫回共用同一個連線池
+      self.pool = pooling.MySQLConnectionPool(
+        pool_name=f"fulltext_{self.worker_token}",
+        pool_size=max(self.config_mysql_pool_size, 2),
+        host= self.config_host, user= self.config_user, password= self.config_password
+      )
+      self.conn = self.pool.get_connection()
       if self.conn.is_connected():
         self.cursor = self.conn.cursor(dictionary=True)
+        self.writer = FileFullTextWriter(
+          self.pool,
+          self.config_write_batch_size,
+          self.config_write_flush_seconds,
+          self.config_write_batch_max_mb * 1024 * 1024,
+          self.metrics,
+          self.index,
+          self.claim_pattern()
+        )
         print(f"✅ 成功連線到 {self.config_host} MySQL 伺服器")
         return True
     except Error as e:
@@ -36,109 +238,475 @@ class FileFullTextProcessor:
       return False
 
   def close_mysql(self):
+    # 清除尚未處理的預先下載檔案，連同已認領未處理的資料一併釋放，交由下次執行（或其他主機）處理
+    unprocessed = self.prefetcher.close()
+    self.session.close()
+    self.close_supervisor()
+    self.extractor.close()
+    self.close_connection(unprocessed)
+    self.close_index()
+    self.metrics.close()
+
+  def close_connection(self, unprocessed=()):
     try:
+      # 先寫回所有暫存的結果，再釋放認領、關閉連線
+      if self.writer:
+        self.writer.close()
+        self.writer = None
       if self.cursor:
+        self.release_claims(list(unprocessed) + list(self.claimed_rows))
+        self.claimed_rows.clear()
         self.cursor.close()
+        self.cursor = None
+      # 連線中斷時仍在處理中的資料已無法寫回，不再計入同時處理數
+      self.scheduler.inflight.clear()
       if self.conn and self.conn.is_connected():
         self.conn.close()
         print(f"🔒 {self.config_host} 資料庫連線已關閉")
     except Error as e:
       print("❌ 關閉錯誤：", e)
 
+  def release_claims(self, claimed):
+    """
+    將已認領但未處理的資料清回空值，只清除本程序認領、仍是 [file_processing] 的資料列
+    claimed: [(database, project, row), ...]
+    """
+    groups = {}
+    for database, project, row in claimed:
+      groups.setdefault((database, project['tableName']), (project, []))[1].append(row[project['idCol']])
+      self.scheduler.finished(project)
+
+    released = 0
+    for (database, table), (project, ids) in groups.items():
+      placeholders = ', '.join(['%s'] * len(ids))
+      release_sql = f"""
+        UPDATE {database}.{table}
+        SET {project['fullTextCol']} = ''
+        WHERE {project['idCol']} IN ({placeholders})
+          AND {project['fullTextCol']} LIKE %s;
+      """
+      self.cursor.execute(release_sql, (*ids, self.claim_pattern()))
+      released += self.cursor.rowcount
+    if groups:
+      self.conn.commit()
+      print(f"🔓 已釋放 {released} 筆尚未處理的認領")
+
+  def claim_rows(self, database, project, batch_size=None):
+    """
+    認領一批待處理資料：沿 idCol 做 keyset 掃描，以單一 UPDATE 寫入帶有 worker token 的
+    [file_processing] 標記，再讀回標記相符的資料列。多台主機同時執行時，同一筆只會被一方認領。
+    超過 claim_lease_seconds 仍停留在 [file_processing] 的資料視為失效認領，可再被認領；
+    租期從每筆取出佇列時（renew_claim）重新起算，寫回結果時也只更新標記仍屬於本程序的資料列。
+    """
+    batch_size = batch_size or self.config_claim_batch_size
+    table = f"{database}.{project['tableName']}"
+    id_col = project['idCol']
+    text_col = project['fullTextCol']
+    cursor_key = (database, project['tableName'])
+
+    self.claim_seq += 1
+    now = datetime.now()
+    marker = f"{self.status_marker('file_processing', now)} | worker:{self.worker_token}-{self.claim_seq}"
+    lease_expired = self.lease_expired(now)
+
+    for last_id in (self.claim_cursors.get(cursor_key), None):
+      keyset_sql, keyset_params = (f"{id_col} > %s AND ", (last_id,)) if last_id is not None else ("", ())
+      # '[file_processing] ' 長度為 18，其後 19 字元為標記時間
+      claim_sql = f"""
+        UPDATE {table}
+        SET {text_col} = %s
+        WHERE {keyset_sql}({text_col} = '' OR {text_col} IS NULL
+          OR ({text_col} LIKE '[file_processing]%%' AND SUBSTRING({text_col}, 19, 19) < %s))
+        ORDER BY {id_col}
+        LIMIT {int(batch_size)};
+      """
+      self.cursor.execute(claim_sql, (marker, *keyset_params, lease_expired))
+      claimed_count = self.cursor.rowcount
+      self.conn.commit()
+
+      if claimed_count > 0:
+        select_sql = f"""
+          SELECT * FROM {table}
+          WHERE {keyset_sql}{text_col} = %s
+          ORDER BY {id_col}
+          LIMIT {int(batch_size)};
+        """
+        self.cursor.execute(select_sql, (*keyset_params, marker))
+        rows = self.cursor.fetchall()
+        if rows:
+          self.claim_cursors[cursor_key] = rows[-1][id_col]
+        return rows
+
+      # 游標之後已無資料，從頭再掃一次
+      self.claim_cursors.pop(cursor_key, None)
+      if last_id is None:
+        break
+
+    return []
+
+  def lease_expired(self, now=None):
+    now = now or datetime.now()
+    return (now - timedelta(seconds=self.config_claim_lease_seconds)).strftime('%Y-%m-%d %H:%M:%S')
+
+  def claim_pattern(self):
+    # 本程序寫入的認領標記（LIKE 樣式），釋放認領與寫回結果時只動標記相符的資料列
+    return f"[file_processing]% | worker:{self.worker_token}-%"
+
+  def next_claimed_row(self):
+    """
+    從本機佇列取出下一筆已認領資料；佇列空了就由 scheduler 挑選資料表認領新的一批。
+    取出時重新蓋上認領時間（見 renew_claim），認領已失效的資料直接略過
+    """
+    while True:
+      claimed = self.next_queued_row()
+      if not claimed or self.renew_claim(*claimed):
+        return claimed
+
+  def next_queued_row(self):
+    if not self.claimed_rows:
+      started = time.perf_counter() if self.targets.is_expired() else None
+      targets = self.targets.all(self.cursor)
+      if started is not None:
+        self.metrics.observe('discover', time.perf_counter() - started)
+      if self.scheduler.is_expired(targets):
+        self.refresh_backlog(targets)
+
+      while True:
+        target, limit = self.scheduler.next_target(self.config_claim_batch_size)
+        if not target:
+          if not self.scheduler.should_recount():
+            break
+          self.refresh_backlog(targets)
+          continue
+        started = time.perf_counter()
+        rows = self.claim_rows(target.database, target.project, limit)
+        self.metrics.observe('claim', time.perf_counter() - started)
+        self.scheduler.claimed(target, len(rows), limit)
+        if rows:
+          self.claimed_rows.extend((target.database, target.project, row) for row in rows)
+          break
+
+    return self.claimed_rows.popleft() if self.claimed_rows else None
+
+  def renew_claim(self, database, project, row):
+    """
+    以目前時間更新認領標記，排在批次後段的資料不會在本機佇列等待期間認領逾時、被其他主機重複認領；
+    標記已不是認領時寫入的（逾時被重新認領或被清空）則回傳 False，由對方處理
+    """
+    text_col = project['fullTextCol']
+    old_marker = row[text_col]
+    marker = self.status_marker('file_processing') + old_marker[old_marker.index(' | worker:'):]
+    if marker == old_marker:
+      return True  # 同一秒內認領，不必更新
+    renew_sql = f"""
+      UPDATE {database}.{project['tableName']}
+      SET {text_col} = %s
+      WHERE {project['idCol']} = %s AND {text_col} = %s;
+    """
+    self.cursor.execute(renew_sql, (marker, row[project['idCol']], old_marker))
+    renewed = self.cursor.rowcount
+    self.conn.commit()
+    if not renewed:
+      print(f"⚠ {database}.{project['tableName']}.{project['idCol']} = {row[project['idCol']]} 的認領已失效，略過")
+      self.scheduler.finished(project)
+      return False
+    row[text_col] = marker
+    return True
+
+  def refresh_backlog(self, targets=None):
+    started = time.perf_counter()
+    self.scheduler.refresh(self.cursor, targets if targets is not None else self.targets.all(self.cursor), self.lease_expired())
+    # 結束這次讀取的交易：認領連線未開啟 autocommit，REPEATABLE READ 的快照會保留到下次 commit，
+    # 沒有資料可認領時不會有 commit，之後的閒置輪詢都只會數到舊快照、看不到新加入的資料
+    self.conn.commit()
+    self.metrics.observe('backlog', time.perf_counter() - started)
+    self.metrics.set_backlog(self.scheduler.backlog())
+
+  def report_backlog(self):
+    """
+    顯示各專案的待處理筆數、權重與本次認領筆數
+    """
+    if not self.scheduler.entries:
+      self.refresh_backlog()
+    self.scheduler.report()
+
+  def update_fulltext(self, database, project, row, text):
+    # 交給背景寫回，依資料表分批 UPDATE，見 FileFullTextWriter
+    self.writer.put(database, project, row, text)
+
+  def status_marker(self, tag, now=None):
+    now = now or datetime.now()
+    return f"[{tag}] {now.strftime('%Y-%m-%d %H:%M:%S')} | IP:{self.host_ip}"
+
   def process_missing_texts(self):
     if not self.conn or not self.cursor:
       print("❌ 尚未建立資料庫連線")
       return False
 
-    self.cursor.execute("SHOW DATABASES;")
-    all_databases = [row['Database'] for row in self.cursor.fetchall()]
-    filtered_databases = []
-    for proj in self.config_projects:
-      matched_dbs = [db for db in all_databases if db.startswith(proj['projectName'])]
-      filtered_databases.extend(matched_dbs)
-
-    for filtered_database in filtered_databases:
-      matched_project = next(
-        (c for c in self.config_projects if filtered_database.startswith(c["projectName"])),
-        None
+    downloaded = self.next_downloaded_row()
+    if not downloaded:
+      return False  # 沒有缺漏資料
+
+    database, project, row, save_path, error = downloaded
+    try:
+      if error:
+        raise error
+      if self.config_extract_isolated:
+        result = self.get_supervisor(1).run(save_path)
+      else:
+        result = self.profiler.run(self.extractor.extract_text, save_path)
+      self.apply_result(database, project, row, result)
+
+    except Exception as e:
+      self.mark_not_found(database, project, row, e)
+
+    finally:
+      self.prefetcher.release(save_path)
+
+    return True  # 有處理到一筆
+
+  def process_with_workers(self, workers, deadline=None):
+    """
+    多 process 模式：主程序負責認領、下載與寫回資料庫，擷取交給受監督的子 process（見 FileFullTextSupervisor），
+    每個子 process 各自持有一個 FileFullTextExtractor
+    deadline: time.monotonic() 時間，超過後不再送出新檔案，等進行中的完成即返回；收到結束訊號時亦同
+    回傳是否處理了任何資料
+    """
+    if not self.conn or not self.cursor:
+      print("❌ 尚未建立資料庫連線")
+      return False
+
+    max_pending = workers * 2  # 每個 worker 多排一件，下載時 worker 不會閒置
+    processed = False
+    supervisor = self.get_supervisor(workers)
+    while True:
+      while len(supervisor) < max_pending and not self.stop_event.is_set() and (deadline is None or time.monotonic() < deadline):
+        downloaded = self.next_downloaded_row()
+        if not downloaded:
+          break
+        processed = True
+        database, project, row, save_path, error = downloaded
+        if error:
+          self.mark_not_found(database, project, row, error)
+          self.prefetcher.release(save_path)
+          continue
+        supervisor.submit((database, project, row, save_path), save_path)
+
+      if not len(supervisor):
+        return processed
+
+      for (database, project, row, save_path), result in supervisor.wait():
+        try:
+          self.apply_result(database, project, row, result)
+        finally:
+          self.prefetcher.release(save_path)
+
+  def get_supervisor(self, workers):
+    if self.supervisor is not None and self.supervisor.workers != workers:
+      self.close_supervisor()
+    if self.supervisor is None:
+      self.supervisor = FileFullTextSupervisor(
+        workers, _init_extract_worker, (self.extractor_options,), _extract_in_worker,
+        timeout=self.config_extract_timeout_seconds,
+        max_rss_bytes=self.config_extract_max_rss_mb * 1024 * 1024,
+        max_jobs=self.config_extract_max_jobs
       )
-      if not matched_project:
-        continue
+    return self.supervisor
+
+  def close_supervisor(self):
+    if self.supervisor is not None:
+      self.supervisor.close()
+      self.supervisor = None
+
+  def run_daemon(self, workers=1):
+    """
+    常駐模式：擷取器（含 OCR 引擎）、worker process、資料庫與 HTTP 連線持續重複使用
+    - 沒有待處理資料時以指數退避輪詢，idle_poll_min_seconds 起每次加倍，最多 idle_poll_max_seconds 秒
+    - 每 config_check_seconds 秒檢查 config.json，有變動時重新載入，見 reload_config
+    - 收到 SIGTERM / SIGINT 後不再認領，處理完進行中的檔案即返回；其餘已認領資料於 close_mysql 釋放
+    """
+    self.install_signal_handlers()
+    delay = 0
+    while not self.stop_event.is_set():
+      if self.config_changed():
+        self.reload_config()
+
+      deadline = time.monotonic() + self.config_config_check_seconds
+      try:
+        if workers > 1:
+          processed = self.process_with_workers(workers, deadline)
+        else:
+          processed = False
+          while not self.stop_event.is_set() and time.monotonic() < deadline and self.process_missing_texts():
+            processed = True
+      except Error as e:
+        print(f"❌ 資料庫錯誤，重新連線：{e}")
+        self.close_connection(self.prefetcher.cancel())
+        processed = False
+        if not self.connect_mysql():
+          delay = self.config_idle_poll_max_seconds
 
-      # 確認 table 是否存在
-      self.cursor.execute(f"SHOW TABLES FROM {filtered_database} LIKE '{matched_project['tableName']}';")
-      if not self.cursor.fetchone():
+      if processed:
+        delay = 0
         continue
+      delay = min(max(delay * 2, self.config_idle_poll_min_seconds), self.config_idle_poll_max_seconds)
+      print(f"⏳ 沒有待處理資料，{delay} 秒後再檢查")
+      # 分段等待：Windows 上長時間的 Event.wait 不會被 Ctrl+C 中斷
+      wake_at = time.monotonic() + delay
+      while not self.stop_event.is_set() and time.monotonic() < wake_at:
+        self.stop_event.wait(min(1, wake_at - time.monotonic()))
+      self.scheduler.invalidate()
 
-      sql = f"""
-        SELECT * FROM {filtered_database}.{matched_project['tableName']}
-        WHERE {matched_project['fullTextCol']}='' OR {matched_project['fullTextCol']} IS NULL
-        ORDER BY RAND()
-        LIMIT 1;
-      """
-      self.cursor.execute(sql)
-      row = self.cursor.fetchone()
+  def install_signal_handlers(self):
+    def handle(signum, frame):
+      print(f"⚠ 收到結束訊號 {signal.Signals(signum).name}，處理完進行中的檔案後結束（再按一次 Ctrl+C 立即中斷）")
+      self.stop_event.set()
+      signal.signal(signal.SIGINT, signal.default_int_handler)
 
-      if row:
-        filename = os.path.basename(row[matched_project['filePathCol']])
-        save_path = os.path.join(self.base_dir, "downloads", filename)
-        os.makedirs(os.path.dirname(save_path), exist_ok=True)
+    signal.signal(signal.SIGTERM, handle)
+    signal.signal(signal.SIGINT, handle)
+    if hasattr(signal, 'SIGBREAK'):
+      signal.signal(signal.SIGBREAK, handle)  # Windows 關閉主控台視窗
 
-        try:
-          file_url = f"{self.config_file_url}/{matched_project['projectName']}/api/{re.sub(r'\.\/', '', row[matched_project['filePathCol']])}"
-          response = requests.get(file_url, stream=True, timeout=30, verify=False)
-          response.raise_for_status()
-
-          with open(save_path, "wb") as f:
-            for chunk in response.iter_content(chunk_size=8192):
-              f.write(chunk)
-          print(f"✅ [{filtered_database}.{matched_project['tableName']}.{matched_project['idCol']}={row[matched_project['idCol']]}] 檔案下載完成 → {save_path}")
-
-          update_sql = f"""
-            UPDATE {filtered_database}.{matched_project['tableName']}
-            SET {matched_project['fullTextCol']} = %s
-            WHERE {matched_project['idCol']} = %s;
-          """
-          self.cursor.execute(update_sql, ( f"[file_processing] {datetime.now().strftime('%Y-%m-%d %H:%M:%S')} | IP:{socket.gethostbyname(socket.gethostname())}", row[matched_project['idCol']]))
-          self.conn.commit()
-
-          extractor = FileFullTextExtractor()
-          result = extractor.extract_text(save_path)
-
-          if result['status'] == 'ok':
-            text_to_update = result['text'] if result['text'] else f"[file_extract_empty] {datetime.now().strftime('%Y-%m-%d %H:%M:%S')} | IP:{socket.gethostbyname(socket.gethostname())}"
-            update_sql = f"""
-              UPDATE {filtered_database}.{matched_project['tableName']}
-              SET {matched_project['fullTextCol']} = %s
-              WHERE {matched_project['idCol']} = %s;
-            """
-            self.cursor.execute(update_sql, (text_to_update, row[matched_project['idCol']]))
-            self.conn.commit()
-
-            if result['text']:
-              print(f"✅ 資料庫更新成功：{filtered_database}.{matched_project['tableName']}.{matched_project['idCol']} = {row[matched_project['idCol']]}")
-            else:
-              print("❌ 文本提取為空值")
-
-            return True  # 有處理到一筆
-
-          else:
-            print(f"❌ 文本提取失敗：{result.get('error', '未知錯誤')}")
-
-        except Exception as e:
-          update_sql = f"""
-            UPDATE {filtered_database}.{matched_project['tableName']}
-            SET {matched_project['fullTextCol']} = %s
-            WHERE {matched_project['idCol']} = %s;
-          """
-          self.cursor.execute(update_sql, ( f"[file_not_found] {datetime.now().strftime('%Y-%m-%d %H:%M:%S')} | IP:{socket.gethostbyname(socket.gethostname())}", row[matched_project['idCol']]))
-          self.conn.commit()
-          print(f"❌ 檔案下載或處理失敗：{e}")
+  def config_changed(self):
+    try:
+      return os.path.getmtime(self.config_path) != self.config_mtime
+    except OSError:
+      return False
 
-        finally:
-          self.safe_remove(save_path)
+  def reload_config(self):
+    """
+    重新載入 config.json：已認領未處理的資料先釋放，再依變動的設定重建對應元件，
+    未變動的元件（已載入的擷取器、OCR 引擎、worker process、連線）繼續使用
+    """
+    before = {name: value for name, value in vars(self).items() if name.startswith('config_') and name != 'config_mtime'}
+    try:
+      self.load_config()
+    except Exception as e:
+      print(f"❌ 設定檔讀取失敗，沿用目前設定：{e}")
+      self.config_mtime = os.path.getmtime(self.config_path)
+      return
+    changed = {name[len('config_'):] for name, value in before.items() if getattr(self, name) != value}
+    if not changed:
+      return
+    print(f"🔄 已重新載入設定：{', '.join(sorted(changed))}")
+
+    unprocessed = self.prefetcher.cancel()
+    if changed & set(self.CONNECTION_CONFIG):
+      self.close_connection(unprocessed)
+      self.connect_mysql()
+    else:
+      self.release_claims(unprocessed + list(self.claimed_rows))
+      self.claimed_rows.clear()
+
+    self.targets = FileFullTextTargets(self.config_projects, self.config_target_refresh_seconds)
+    self.scheduler = FileFullTextScheduler(self.config_backlog_refresh_seconds, self.config_backlog_count_limit)
+    self.claim_cursors.clear()
+    self.profiler = FileFullTextProfiler(self.config_profile_dir, self.config_profile_every)
+    if changed & set(self.METRICS_CONFIG):
+      self.metrics.close()
+      self.metrics = self.create_metrics()
+      if self.writer:
+        self.writer.metrics = self.metrics
+    if changed & set(self.INDEX_CONFIG):
+      if self.writer:
+        self.writer.flush()
+      self.close_index()
+      self.index = self.create_index()
+      if self.writer:
+        self.writer.index = self.index
+    if changed & set(self.HTTP_CONFIG):
+      self.prefetcher.close()
+      self.session.close()
+      self.create_session()
+
+    if changed & set(self.SUPERVISOR_CONFIG):
+      self.close_supervisor()
+    options = self.build_extractor_options()
+    if options != self.extractor_options:
+      self.extractor_options = options
+      self.close_supervisor()
+      self.extractor.close()
+      self.extractor = _create_extractor(options)
+
+  def fill_prefetch(self):
+    """
+    認領並排入背景下載，讓佇列維持 prefetch_depth 個檔案
+    """
+    while len(self.prefetcher) < self.prefetcher.depth and not self.stop_event.is_set():
+      claimed = self.next_claimed_row()
+      if not claimed:
+        break
+      database, project, row = claimed
+      # 檔名加上資料庫與 id，避免不同專案的同名檔案互相覆蓋
+      filename = f"{database}_{row[project['idCol']]}_{os.path.basename(row[project['filePathCol']])}"
+      save_path = os.path.join(self.base_dir, "downloads", filename)
+      file_url = f"{self.config_file_url}/{project['projectName']}/api/{re.sub(r'\.\/', '', row[project['filePathCol']])}"
+      self.prefetcher.submit(claimed, file_url, save_path)
+
+  def next_downloaded_row(self):
+    """
+    取出下一筆已下載的資料，回傳 (database, project, row, save_path, error)；沒有資料回傳 None
+    """
+    self.fill_prefetch()
+    if not len(self.prefetcher):
+      return None
+    started = time.perf_counter()
+    (database, project, row), save_path, error = self.prefetcher.take()
+    wait_seconds = time.perf_counter() - started
+    # 立即補上下一批，讓下載與擷取同時進行
+    self.fill_prefetch()
+    self.metrics.begin(database, project, row, save_path, self.prefetcher.download_seconds.pop(save_path, None), wait_seconds)
+    if not error:
+      print(f"✅ [{database}.{project['tableName']}.{project['idCol']}={row[project['idCol']]}] 檔案下載完成 → {save_path}")
+    return database, project, row, save_path, error
+
+  def apply_result(self, database, project, row, result):
+    if 'cached' in result:
+      if result['cached']:
+        self.cache_stats['hits'] += 1
+        self.cache_stats['saved_seconds'] += result.get('cache_saved_seconds', 0.0)
+      else:
+        self.cache_stats['misses'] += 1
+    self.cache_stats['images_cached'] += result.get('images_cached', 0)
+    self.cache_stats['images_denied'] += result.get('images_denied', 0)
+
+    if result['status'] == 'ok':
+      text_to_update = result['text'] if result['text'] else self.status_marker('file_extract_empty')
+      self.update_fulltext(database, project, row, text_to_update)
+
+      if result.get('limit'):
+        print(f"⚠ 超過擷取上限（{result['limit']}），只擷取前段內容")
+      elif result.get('truncated'):
+        print(f"⚠ 全文超過 {self.config_max_text_length} 字，已截斷")
+      if result['text']:
+        print(f"✅ 資料庫更新成功：{database}.{project['tableName']}.{project['idCol']} = {row[project['idCol']]}")
+      else:
+        print("❌ 文本提取為空值")
+      self.metrics.finish(database, project, row, 'ok' if result['text'] else 'empty', result)
+      self.scheduler.finished(project)
+
+    else:
+      # 標記失敗，避免認領逾時後被反覆重試；超過時間或記憶體上限另以不同標記區分
+      status = result['status'] if result['status'] in self.BUDGET_MARKERS else 'fail'
+      self.update_fulltext(database, project, row, self.status_marker(self.BUDGET_MARKERS.get(status, 'file_extract_fail')))
+      print(f"❌ 文本提取失敗：{result.get('error', '未知錯誤')}")
+      self.metrics.finish(database, project, row, status, result)
+      self.scheduler.finished(project)
+
+  def mark_not_found(self, database, project, row, error):
+    self.update_fulltext(database, project, row, self.status_marker('file_not_found'))
+    print(f"❌ 檔案下載或處理失敗：{error}")
+    self.metrics.finish(database, project, row, 'not_found', error=error)
+    self.scheduler.finished(project)
 
-    return False  # 沒有缺漏資料
+  def report_cache_stats(self):
+    lookups = self.cache_stats['hits'] + self.cache_stats['misses']
+    if lookups:
+      print(f"📦 擷取快取命中 {self.cache_stats['hits']}/{lookups} ({self.cache_stats['hits'] / lookups:.1%})，節省約 {self.cache_stats['saved_seconds']:.1f} 秒")
+    avoided = self.cache_stats['images_cached'] + self.cache_stats['images_denied']
+    if avoided:
+      print(f"📦 內嵌圖片省下 {avoided} 次 OCR（快取命中 {self.cache_stats['images_cached']}，略過清單 {self.cache_stats['images_denied']}）")
 
   def safe_remove(self, file_path):
     """
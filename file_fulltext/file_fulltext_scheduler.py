@@ -0,0 +1,195 @@
+import time
+
+class FileFullTextScheduler:
+  """
+  依各資料表的待處理筆數分配認領，避免排在前面的專案獨佔處理量：
+  - 待處理筆數（空值與認領逾時的資料）以有上限的 COUNT 查詢取得，最多數到 count_limit 筆，每 refresh_seconds 秒重新計算。
+    COUNT 需要以 fullTextCol 開頭的索引才能只讀取待處理的資料列，例如
+    ALTER TABLE 資料表 ADD INDEX idx_fulltext_state (fullTextCol(37));（37 字涵蓋 [file_processing] 與標記時間）
+    沒有這類索引的資料表不計數（否則每次都要讀遍整張表的全文欄位），先假設有 count_limit 筆，
+    認領到的筆數少於要求時即視為已無資料，直到下次重新計算，與認領本身的掃描成本相同
+  - 加權公平分配 (stride scheduling)：每張資料表累計「已認領筆數 / 權重」，每次挑選累計值最小、仍有待處理資料的資料表。
+    權重為 config.json projects 中的 priority（預設 1）；新出現或重新有待處理資料的資料表從目前最小值起算，不會一次補回落後的份額
+  - 同一專案（projectName）在本程序中已認領、尚未處理完的筆數不超過 maxConcurrency（未設定則不限），多台主機各自計算
+  """
+  # 估計值（計數減去已認領筆數）都歸零時，距上次計數超過此秒數才重新確認，見 should_recount
+  RECOUNT_SECONDS = 5
+
+  def __init__(self, refresh_seconds=60, count_limit=100000):
+    self.refresh_seconds = refresh_seconds
+    self.count_limit = count_limit
+    self.entries = {}  # (database, table) -> {'target', 'pending', 'estimated', 'pass', 'claimed'}
+    self.indexed = {}  # (database, table) -> fullTextCol 是否有索引，見 has_state_index
+    self.inflight = {}  # projectName -> 已認領未處理完的筆數
+    self.counted_at = None
+
+  def is_expired(self, targets):
+    if self.counted_at is None or time.monotonic() - self.counted_at >= self.refresh_seconds:
+      return True
+    return {(t.database, t.table) for t in targets} != set(self.entries)
+
+  def should_recount(self):
+    """
+    所有資料表的估計待處理筆數都已歸零時，實際上可能還有資料（計數有上限、期間新增資料），
+    回傳是否該重新計數再確定沒有資料；有資料表只是達到同時處理上限時不必重新計數
+    """
+    if any(entry['pending'] for entry in self.entries.values()):
+      return False
+    return self.counted_at is None or time.monotonic() - self.counted_at >= self.RECOUNT_SECONDS
+
+  def refresh(self, cursor, targets, lease_expired):
+    """
+    重新計算各資料表的待處理筆數；lease_expired 為認領逾時的時間界線，見 FileFullTextProcessor.claim_rows
+    """
+    active_passes = [e['pass'] for e in self.entries.values() if e['pending']]
+    floor = min(active_passes) if active_passes else 0.0
+    entries = {}
+    for target in targets:
+      text_col = target.project['fullTextCol']
+      estimated = not self.has_state_index(cursor, target)
+      if estimated:
+        pending = self.count_limit
+      else:
+        # 子查詢加上 LIMIT，積壓再多也只讀取 count_limit 筆；三個條件都是 fullTextCol 索引上的範圍
+        count_sql = f"""
+          SELECT COUNT(*) AS pending FROM (
+            SELECT 1 FROM {target.database}.{target.table}
+            WHERE {text_col} = '' OR {text_col} IS NULL
+              OR ({text_col} LIKE '[file_processing]%%' AND SUBSTRING({text_col}, 19, 19) < %s)
+            LIMIT {int(self.count_limit)}
+          ) AS backlog;
+        """
+        cursor.execute(count_sql, (lease_expired,))
+        pending = cursor.fetchone()['pending']
+
+      entry = self.entries.get((target.database, target.table))
+      if entry is None:
+        entry = {'pass': floor, 'claimed': 0}
+      elif pending and not entry['pending']:
+        entry['pass'] = max(entry['pass'], floor)
+      entry['target'] = target
+      entry['pending'] = pending
+      entry['estimated'] = estimated
+      entries[(target.database, target.table)] = entry
+    self.entries = entries
+    self.counted_at = time.monotonic()
+
+    total = sum(e['pending'] for e in entries.values() if not e['estimated'])
+    busy = sum(1 for e in entries.values() if e['pending'] and not e['estimated'])
+    estimated = sum(1 for e in entries.values() if e['estimated'])
+    unknown = f"，{estimated} 個資料表無索引未計數" if estimated else ''
+    print(f"📋 待處理 {total} 筆（{busy}/{len(entries)} 個資料表有資料{unknown}）")
+    return entries
+
+  def has_state_index(self, cursor, target):
+    """
+    fullTextCol 是否為某個索引的第一個欄位；每張資料表只查詢一次，沒有索引時提示建立
+    """
+    key = (target.database, target.table)
+    if key not in self.indexed:
+      text_col = target.project['fullTextCol']
+      cursor.execute(
+        """
+          SELECT 1 AS found FROM information_schema.STATISTICS
+          WHERE TABLE_SCHEMA = %s AND TABLE_NAME = %s AND COLUMN_NAME = %s AND SEQ_IN_INDEX = 1
+          LIMIT 1;
+        """,
+        (target.database, target.table, text_col)
+      )
+      self.indexed[key] = cursor.fetchone() is not None
+      if not self.indexed[key]:
+        print(f"⚠ {target.database}.{target.table}.{text_col} 沒有索引，不計算待處理筆數；"
+              f"建議 ALTER TABLE {target.database}.{target.table} ADD INDEX idx_fulltext_state ({text_col}(37));")
+    return self.indexed[key]
+
+  def next_target(self, batch_size):
+    """
+    回傳 (target, 認領筆數)；沒有可認領的資料表時回傳 (None, 0)
+    """
+    best = None
+    for entry in self.entries.values():
+      if not entry['pending'] or self.room(entry['target'].project) <= 0:
+        continue
+      if best is None or entry['pass'] < best['pass']:
+        best = entry
+    if best is None:
+      return None, 0
+    return best['target'], int(min(batch_size, best['pending'], self.room(best['target'].project)))
+
+  @staticmethod
+  def weight(project):
+    return max(float(project.get('priority', 1)), 0.01)
+
+  def room(self, project):
+    limit = project.get('maxConcurrency')
+    if not limit:
+      return float('inf')
+    return limit - self.inflight.get(project['projectName'], 0)
+
+  def claimed(self, target, count, requested=None):
+    entry = self.entries.get((target.database, target.table))
+    if entry is None:
+      return
+    if count and entry['estimated'] and requested and count < requested:
+      # 未計數的資料表：認領不滿一批表示已無待處理資料
+      entry['pending'] = count
+    if count:
+      entry['pass'] += count / self.weight(target.project)
+      entry['claimed'] += count
+      entry['pending'] = max(entry['pending'] - count, 0)
+      self.inflight[target.project['projectName']] = self.inflight.get(target.project['projectName'], 0) + count
+    else:
+      # 已無待處理資料（或剛被其他主機認領），下次重新計算前不再查詢此資料表
+      entry['pending'] = 0
+
+  def finished(self, project, count=1):
+    name = project['projectName']
+    self.inflight[name] = max(self.inflight.get(name, 0) - count, 0)
+
+  def invalidate(self):
+    """
+    下次挑選時重新計算待處理筆數（常駐模式閒置輪詢時使用）
+    """
+    self.counted_at = None
+
+  def backlog(self):
+    """
+    回傳各資料表的積壓狀況，依專案與資料庫排序
+    """
+    rows = []
+    for entry in self.entries.values():
+      target = entry['target']
+      rows.append({
+        'project': target.project['projectName'],
+        'database': target.database,
+        'table': target.table,
+        'pending': entry['pending'],
+        'capped': entry['pending'] >= self.count_limit,
+        'estimated': entry['estimated'],
+        'priority': self.weight(target.project),
+        'claimed': entry['claimed'],
+        'inflight': self.inflight.get(target.project['projectName'], 0),
+        'max_concurrency': target.project.get('maxConcurrency'),
+      })
+    return sorted(rows, key=lambda row: (row['project'], row['database']))
+
+  def report(self):
+    rows = self.backlog()
+    if not rows:
+      print("📋 沒有專案資料表")
+      return
+    print("📋 各專案待處理資料：")
+    for project in dict.fromkeys(row['project'] for row in rows):
+      project_rows = [row for row in rows if row['project'] == project]
+      pending = sum(row['pending'] for row in project_rows if not row['estimated'])
+      capped = '以上' if any(row['capped'] and not row['estimated'] for row in project_rows) else ''
+      unknown = sum(1 for row in project_rows if row['estimated'])
+      capped += f"（另 {unknown} 個資料表無索引未計數）" if unknown else ''
+      first = project_rows[0]
+      limit = f"，同時處理上限 {first['max_concurrency']}" if first['max_concurrency'] else ''
+      print(f"  {project}：{pending} 筆{capped}，權重 {first['priority']:g}{limit}，本次已認領 {sum(row['claimed'] for row in project_rows)} 筆")
+      for row in project_rows:
+        if row['estimated']:
+          print(f"    {row['database']}.{row['table']}：未計數")
+        elif row['pending'] or row['claimed']:
+          print(f"    {row['database']}.{row['table']}：{row['pending']}{'+' if row['capped'] else ''}")
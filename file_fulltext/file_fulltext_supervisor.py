@@ -0,0 +1,222 @@
+import os, time, multiprocessing
+from collections import deque
+from multiprocessing.connection import wait as wait_connections
+
+def _supervised_worker(conn, initializer, initargs, func):
+  """
+  子 process 主迴圈：初始化一次（建立 extractor 與常駐 OCR 引擎），之後逐一處理收到的工作，None 表示結束
+  """
+  initializer(*initargs)
+  parent = multiprocessing.parent_process()
+  while True:
+    try:
+      # 主程序被強制結束時管線不一定會關閉（其他子 process 也繼承了管線），定期確認主程序仍在
+      if not conn.poll(1.0):
+        if parent and not parent.is_alive():
+          return
+        continue
+      job = conn.recv()
+    except (EOFError, OSError):
+      return
+    if job is None:
+      return
+    try:
+      result = func(job)
+    except Exception as e:
+      result = {'status': 'fail', 'error': f'Worker error: {e}'}
+    conn.send(result)
+
+def process_rss(pid):
+  """
+  回傳 process 目前的 RSS (bytes)；Linux 讀 /proc，其他平台需要 psutil，無法取得時回傳 None
+  """
+  try:
+    with open(f'/proc/{pid}/statm') as f:
+      return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+  except (OSError, ValueError, AttributeError):
+    pass
+  try:
+    import psutil
+    return psutil.Process(pid).memory_info().rss
+  except Exception:
+    return None
+
+class FileFullTextSupervisor:
+  """
+  在受監督的子 process 中擷取，單一檔案出問題不會拖住整個流程：
+  - 每件工作有 timeout 秒的時間上限，超過即終止子 process，結果為 {'status': 'timeout'}
+  - 每 poll_interval 秒檢查子 process 的 RSS，超過 max_rss_bytes 即終止，結果為 {'status': 'memory_limit'}
+  - 子 process 異常結束（崩潰、被系統終止）時結果為 fail，並重新啟動
+  - 每個子 process 處理 max_jobs 件後重新啟動，釋放累積的記憶體碎片與外部函式庫的洩漏
+  子 process 以 initializer(*initargs) 初始化後常駐，依序以 func(job) 處理工作
+  """
+  def __init__(self, workers, initializer, initargs, func, timeout=600, max_rss_bytes=2048 * 1024 * 1024, max_jobs=200, poll_interval=1.0):
+    self.workers = max(workers, 1)
+    self.initializer = initializer
+    self.initargs = initargs
+    self.func = func
+    self.timeout = timeout
+    self.max_rss_bytes = max_rss_bytes
+    self.max_jobs = max_jobs
+    self.poll_interval = poll_interval
+    self.slots = [None] * self.workers  # {'process', 'conn', 'jobs', 'job': (key, job, started) 或 None}
+    self.queue = deque()  # 等待空閒子 process 的 (key, job)
+    self.rss_checked_at = 0.0
+    self.warned_rss = False
+
+  def __len__(self):
+    # 尚未完成的工作數（含排隊中）
+    return len(self.queue) + sum(1 for slot in self.slots if slot and slot['job'])
+
+  def submit(self, key, job):
+    self.queue.append((key, job))
+    self.dispatch()
+
+  def run(self, job):
+    """
+    同步處理一件工作並回傳結果
+    """
+    self.submit(None, job)
+    while True:
+      for _, result in self.wait():
+        return result
+
+  def wait(self):
+    """
+    等到至少一件工作完成（或超過預算被終止），回傳 [(key, result), ...]
+    """
+    done = []
+    while not done and len(self):
+      waiting = {slot['conn']: index for index, slot in enumerate(self.slots) if slot and slot['job']}
+      sentinels = {self.slots[index]['process'].sentinel: index for index in waiting.values()}
+      ready = wait_connections([*waiting, *sentinels], timeout=self.next_timeout())
+
+      for item in ready:
+        index = waiting.get(item, sentinels.get(item))
+        slot = self.slots[index]
+        if not slot or not slot['job']:
+          continue  # 同一輪中結果與結束訊號都就緒，已處理
+        key = slot['job'][0]
+        try:
+          result = slot['conn'].recv() if slot['conn'].poll() else None
+        except (EOFError, OSError):
+          result = None
+        if result is None:
+          slot['process'].join(timeout=1)  # 管線先於 process 結束關閉，稍等以取得 exit code
+          exitcode = slot['process'].exitcode
+          self.stop_slot(index, kill=True)
+          done.append((key, {'status': 'fail', 'error': f'Worker exited unexpectedly (exit code {exitcode})'}))
+          continue
+        slot['job'] = None
+        slot['jobs'] += 1
+        if self.max_jobs and slot['jobs'] >= self.max_jobs:
+          self.stop_slot(index)
+        done.append((key, result))
+
+      done += self.enforce_budgets()
+      self.dispatch()
+    return done
+
+  def next_timeout(self):
+    now = time.monotonic()
+    deadlines = [slot['job'][2] + self.timeout for slot in self.slots if slot and slot['job'] and self.timeout]
+    timeout = self.poll_interval if self.max_rss_bytes else None
+    if deadlines:
+      until_deadline = max(min(deadlines) - now, 0)
+      timeout = until_deadline if timeout is None else min(timeout, until_deadline)
+    return timeout
+
+  def enforce_budgets(self):
+    done = []
+    now = time.monotonic()
+    check_rss = self.max_rss_bytes and now - self.rss_checked_at >= self.poll_interval
+    if check_rss:
+      self.rss_checked_at = now
+    for index, slot in enumerate(self.slots):
+      if not slot or not slot['job']:
+        continue
+      key, job, started = slot['job']
+      if self.timeout and now - started >= self.timeout:
+        self.stop_slot(index, kill=True)
+        done.append((key, {'status': 'timeout', 'error': f'Extraction exceeded {self.timeout} seconds'}))
+        continue
+      if check_rss:
+        rss = process_rss(slot['process'].pid)
+        if rss is None and not self.warned_rss:
+          print("⚠ 無法取得子 process 記憶體用量，未限制 RSS（Windows 請安裝 psutil）")
+          self.warned_rss = True
+        if rss and rss > self.max_rss_bytes:
+          self.stop_slot(index, kill=True)
+          done.append((key, {'status': 'memory_limit', 'error': f'Extraction exceeded {self.max_rss_bytes // 1024 // 1024} MB RSS'}))
+    return done
+
+  def dispatch(self):
+    for index in range(self.workers):
+      if not self.queue:
+        return
+      slot = self.slots[index]
+      if slot and slot['job']:
+        continue
+      if slot is None or not slot['process'].is_alive():
+        # 閒置中的子 process 也可能被系統終止（如 OOM killer）
+        if slot:
+          self.stop_slot(index, kill=True)
+        slot = self.start_slot(index)
+      key, job = self.queue.popleft()
+      slot['job'] = (key, job, time.monotonic())
+      slot['conn'].send(job)
+
+  def start_slot(self, index):
+    parent_conn, child_conn = multiprocessing.Pipe()
+    process = multiprocessing.Process(
+      target=_supervised_worker,
+      args=(child_conn, self.initializer, self.initargs, self.func),
+      name=f'fulltext-extract-{index}',
+      daemon=False  # 子 process 本身可能建立平行 OCR 的 process pool
+    )
+    process.start()
+    child_conn.close()
+    self.slots[index] = {'process': process, 'conn': parent_conn, 'jobs': 0, 'job': None}
+    return self.slots[index]
+
+  def stop_slot(self, index, kill=False):
+    """
+    結束子 process；kill 為 True 時直接終止（連同其子 process，需要 psutil），否則請它處理完後自行結束
+    """
+    slot = self.slots[index]
+    self.slots[index] = None
+    if not slot:
+      return
+    process = slot['process']
+    if kill:
+      self.kill_tree(process.pid)
+      process.kill()
+    else:
+      try:
+        slot['conn'].send(None)
+      except (OSError, ValueError):
+        process.kill()
+    process.join(timeout=10)
+    if process.is_alive():
+      process.kill()
+      process.join()
+    slot['conn'].close()
+
+  @staticmethod
+  def kill_tree(pid):
+    # 平行 OCR 的 worker 與 tesseract 執行檔是子 process 的子 process，一併終止
+    try:
+      import psutil
+      for child in psutil.Process(pid).children(recursive=True):
+        child.kill()
+    except Exception:
+      pass
+
+  def close(self):
+    """
+    結束所有子 process；排隊中的工作直接捨棄，處理中的工作中止
+    """
+    self.queue.clear()
+    for index, slot in enumerate(self.slots):
+      if slot:
+        self.stop_slot(index, kill=bool(slot['job']))
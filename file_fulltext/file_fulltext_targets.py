@@ -0,0 +1,59 @@
+import time
+from collections import namedtuple
+
+# project 為 config.json 中對應的專案設定，含 projectName / tableName / idCol / fullTextCol / filePathCol
+FileFullTextTarget = namedtuple('FileFullTextTarget', ['database', 'table', 'project'])
+
+class FileFullTextTargets:
+  """
+  專案資料表探索結果的快取：以一次 information_schema 查詢找出所有 (資料庫, 資料表, 欄位設定)，
+  ttl 秒內重複使用，不必每處理一筆就 SHOW DATABASES / SHOW TABLES。
+  各資料表的處理順序由 FileFullTextScheduler 依待處理筆數決定。
+  """
+  def __init__(self, projects, ttl=600):
+    self.projects = projects
+    self.ttl = ttl
+    self.targets = []
+    self.refreshed_at = None
+
+  def is_expired(self):
+    return self.refreshed_at is None or time.monotonic() - self.refreshed_at >= self.ttl
+
+  def refresh(self, cursor):
+    table_names = {p['tableName'] for p in self.projects}
+    table_names |= {name.lower() for name in table_names}
+    if not table_names:
+      self.targets = []
+    else:
+      placeholders = ', '.join(['%s'] * len(table_names))
+      cursor.execute(
+        f"SELECT TABLE_SCHEMA AS db, TABLE_NAME AS tbl FROM information_schema.TABLES WHERE TABLE_NAME IN ({placeholders});",
+        tuple(sorted(table_names))
+      )
+      existing = {(row['db'], row['tbl'].lower()) for row in cursor.fetchall()}
+      all_databases = sorted({db for db, _ in existing})
+
+      # 與原本 SHOW DATABASES 的順序一致：依 projects 順序，同一專案內依資料庫名稱
+      targets = []
+      seen = set()
+      for proj in self.projects:
+        for database in all_databases:
+          if not database.startswith(proj['projectName']) or database in seen:
+            continue
+          matched_project = next(
+            (c for c in self.projects if database.startswith(c["projectName"])),
+            None
+          )
+          if (database, matched_project['tableName'].lower()) not in existing:
+            continue
+          seen.add(database)
+          targets.append(FileFullTextTarget(database, matched_project['tableName'], matched_project))
+      self.targets = targets
+
+    self.refreshed_at = time.monotonic()
+    print(f"🔎 已探索 {len(self.targets)} 個專案資料表")
+
+  def all(self, cursor):
+    if self.is_expired():
+      self.refresh(cursor)
+    return list(self.targets)
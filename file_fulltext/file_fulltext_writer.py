@@ -0,0 +1,159 @@
+import time, queue, sqlite3, threading
+from mysql.connector import Error
+
+_FLUSH = object()
+_STOP = object()
+
+class FileFullTextWriter:
+  """
+  背景寫回 (write-behind)：擷取結果與狀態標記先放進佇列，由背景執行緒依資料庫/資料表分組，
+  逐筆 UPDATE、每批只 commit 一次，連線從共用的 MySQL 連線池取得、用完歸還。
+  任一資料表累積 batch_size 筆或 max_batch_bytes 位元組時立即寫入，否則最久 flush_seconds 秒寫入一次。
+  尚未寫入就中斷的資料仍是 [file_processing]，認領逾時後會重新處理。
+  claim_pattern 為本程序認領標記的 LIKE 樣式，只寫入標記仍相符的資料列：認領逾時後被其他主機重新認領
+  （或被 FileFullEmpty 清空）的資料由對方處理，不以本程序的結果覆蓋。
+  """
+  def __init__(self, pool, batch_size=50, flush_seconds=2.0, max_batch_bytes=4 * 1024 * 1024, metrics=None, index=None,
+               claim_pattern=None):
+    self.pool = pool  # mysql.connector.pooling.MySQLConnectionPool
+    self.claim_pattern = claim_pattern
+    self.metrics = metrics  # FileFullTextMetrics，記錄每批寫入耗時
+    self.index = index  # FileFullTextIndex，寫入資料庫後同步更新全文檢索索引
+    self.batch_size = max(batch_size, 1)
+    self.flush_seconds = flush_seconds
+    self.max_batch_bytes = max_batch_bytes
+    self.queue = queue.Queue()
+    self.buffers = {}  # (database, table, id_col, text_col) -> {'rows', 'bytes', 'since'}
+    self.retry = {}  # 寫入失敗一次、等待重試的資料，與之後送來的資料分開存放：同上的 key -> {'rows', 'since'}
+    self.stats = {'rows': 0, 'batches': 0, 'dropped': 0, 'lost': 0}
+    self.thread = threading.Thread(target=self.run, name='fulltext-writer', daemon=True)
+    self.thread.start()
+
+  def put(self, database, project, row, text):
+    key = (database, project['tableName'], project['idCol'], project['fullTextCol'])
+    self.queue.put((key, (text, row[project['idCol']])))
+
+  def flush(self):
+    """
+    立即寫入所有暫存的資料，寫完才返回
+    """
+    done = threading.Event()
+    self.queue.put((_FLUSH, done))
+    done.wait()
+
+  def close(self):
+    if not self.thread.is_alive():
+      return
+    done = threading.Event()
+    self.queue.put((_STOP, done))
+    done.wait()
+    self.thread.join()
+    if self.stats['rows']:
+      print(f"🔒 已寫回 {self.stats['rows']} 筆（{self.stats['batches']} 批）")
+    if self.stats['dropped']:
+      print(f"⚠ {self.stats['dropped']} 筆寫入失敗，認領逾時後將重新處理")
+    if self.stats['lost']:
+      print(f"⚠ {self.stats['lost']} 筆的認領已失效（逾時被重新認領或已清空），未寫入")
+
+  def run(self):
+    while True:
+      try:
+        key, value = self.queue.get(timeout=self.next_timeout())
+      except queue.Empty:
+        self.flush_due()
+        continue
+
+      if key is _FLUSH or key is _STOP:
+        retry_keys = list(self.retry)
+        for buffer_key in list(self.buffers):
+          self.write(buffer_key)
+        # 結束前連同這次才失敗的批次都再重試一次
+        for buffer_key in list(self.retry) if key is _STOP else retry_keys:
+          self.write(buffer_key, retry=True)
+        value.set()
+        if key is _STOP:
+          return
+        continue
+
+      text, _ = value
+      buffer = self.buffers.setdefault(key, {'rows': [], 'bytes': 0, 'since': time.monotonic()})
+      buffer['rows'].append(value)
+      buffer['bytes'] += len(text.encode('utf-8'))
+      if len(buffer['rows']) >= self.batch_size or buffer['bytes'] >= self.max_batch_bytes:
+        self.write(key)
+      self.flush_due()
+
+  def next_timeout(self):
+    if not self.buffers and not self.retry:
+      return None
+    oldest = min(buffer['since'] for buffers in (self.buffers, self.retry) for buffer in buffers.values())
+    return max(oldest + self.flush_seconds - time.monotonic(), 0)
+
+  def flush_due(self):
+    now = time.monotonic()
+    for retry, buffers in ((False, self.buffers), (True, self.retry)):
+      for key in [key for key, buffer in buffers.items() if now - buffer['since'] >= self.flush_seconds]:
+        self.write(key, retry)
+
+  def write(self, key, retry=False):
+    """
+    寫入 key 暫存的資料；retry 為 True 時寫入等待重試的資料，再失敗就放棄（認領逾時後重新處理）
+    """
+    buffer = (self.retry if retry else self.buffers).pop(key, None)
+    if not buffer or not buffer['rows']:
+      return
+    database, table, id_col, text_col = key
+    owner_sql = f" AND {text_col} LIKE %s" if self.claim_pattern else ""
+    update_sql = f"""
+      UPDATE {database}.{table}
+      SET {text_col} = %s
+      WHERE {id_col} = %s{owner_sql};
+    """
+    conn = None
+    started = time.perf_counter()
+    try:
+      conn = self.pool.get_connection()
+      cursor = conn.cursor()
+      # UPDATE 的 executemany 本來就是逐筆執行，改為逐筆才能得知每筆是否仍屬於本程序
+      written = []
+      for text, row_id in buffer['rows']:
+        cursor.execute(update_sql, (text, row_id, self.claim_pattern) if self.claim_pattern else (text, row_id))
+        if cursor.rowcount:
+          written.append((text, row_id))
+      conn.commit()
+      cursor.close()
+      self.stats['rows'] += len(written)
+      self.stats['lost'] += len(buffer['rows']) - len(written)
+      self.stats['batches'] += 1
+      if self.metrics:
+        self.metrics.observe('write', time.perf_counter() - started)
+      self.update_index(database, table, written)
+    except Error as e:
+      print(f"❌ {database}.{table} 批次寫入失敗（{len(buffer['rows'])} 筆）：{e}")
+      if conn:
+        try:
+          conn.rollback()
+        except Error:
+          pass
+      if retry:
+        self.stats['dropped'] += len(buffer['rows'])
+      else:
+        # flush_seconds 後重試一次；之後送來的資料另起新批，不會因這批重試失敗而一併放棄
+        pending = self.retry.setdefault(key, {'rows': [], 'since': time.monotonic()})
+        pending['rows'].extend(buffer['rows'])
+    finally:
+      if conn:
+        conn.close()  # 歸還連線池
+
+  def update_index(self, database, table, rows):
+    if not self.index:
+      return
+    started = time.perf_counter()
+    try:
+      self.index.apply(database, table, [(text, row_id) for text, row_id in rows])
+    except sqlite3.Error as e:
+      # 索引只是查詢用的副本，失敗不影響寫回，可用 file_fulltext_index.py --rebuild 補建
+      print(f"⚠ {database}.{table} 全文索引更新失敗：{e}")
+      return
+    if self.metrics:
+      self.metrics.observe('index', time.perf_counter() - started)
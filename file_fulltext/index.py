@@ -1,11 +1,15 @@
 # 防火牆->輸入規則->新增規則->連接埠->port:3306->允許連線->check all->Mysql->complete!
 # 安裝 Python，執行指令「py -V」確認是否安裝成功
-# py -m pip install openpyxl pandas requests SnowNLP mysql-connector-python odfpy openpyxl pytesseract PyMuPDF pdfplumber python-docx python-pptx ezdxf opencv-python
+# py -m pip install openpyxl pandas requests mysql-connector-python odfpy openpyxl pytesseract PyMuPDF pdfplumber python-docx python-pptx ezdxf opencv-python
+# (選用) py -m pip install tesserocr，常駐 OCR 引擎，未安裝時使用 pytesseract
+# (選用) py -m pip install xlrd，讀取舊版 .xls
+# (選用) py -m pip install psutil，Windows 上限制擷取子 process 的記憶體用量（Linux 不需要）
 # 將 Tesseract-OCR 放置 D:\Tesseract-OCR
 # 將 Tesseract-OCR 的安裝路徑加入系統環境變數 Path > D:\Tesseract-OCR
 # 重啟電腦後，執行指令「tesseract --version」確認是否安裝成功
 # 確認 config.json 的設定正確
-import os
+# 查詢已擷取的全文：py file_fulltext_index.py 關鍵字 [--database 資料庫]；其他主機擷取的資料以 --rebuild 補建索引
+import os, argparse
 from file_fulltext_processor import FileFullTextProcessor
 
 base_dir = os.path.dirname(os.path.abspath(__file__))
@@ -18,11 +22,27 @@ base_dir = os.path.dirname(os.path.abspath(__file__))
 # sys.exit()
 
 if __name__ == "__main__":
+  parser = argparse.ArgumentParser(description="擷取附件全文並寫回資料庫")
+  parser.add_argument("--workers", type=int, default=1, help="平行擷取的 process 數量，預設 1 為逐筆處理")
+  parser.add_argument("--backlog", action="store_true", help="只顯示各專案的待處理筆數後結束")
+  parser.add_argument("--daemon", action="store_true", help="常駐模式：沒有資料時定期輪詢、自動套用 config.json 的變更，收到 SIGTERM / Ctrl+C 後釋放認領再結束")
+  args = parser.parse_args()
+
   processor = FileFullTextProcessor(base_dir)
   if processor.connect_mysql():
-    while True:
-      has_processed = processor.process_missing_texts()
-      if not has_processed:
-        print("沒有更多資料，程式結束!")
-        break
+    if args.backlog:
+      processor.report_backlog()
+    elif args.daemon:
+      processor.run_daemon(args.workers)
+      print("已停止常駐模式，程式結束!")
+    elif args.workers > 1:
+      processor.process_with_workers(args.workers)
+      print("沒有更多資料，程式結束!")
+    else:
+      while True:
+        has_processed = processor.process_missing_texts()
+        if not has_processed:
+          print("沒有更多資料，程式結束!")
+          break
+    processor.report_cache_stats()
     processor.close_mysql()